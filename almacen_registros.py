@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from instrumentacion import instrumentado
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Los registros se guardan en formato JSON Lines (un registro por línea) y solo se
+# agregan líneas al final del archivo, así registrar no depende del tamaño del historial.
+# Los archivos .json con el arreglo completo (formato anterior) se migran la primera vez;
+# el .json queda igual y la migración se reconoce porque ya existe el .jsonl.
+#
+# Las escrituras son seguras con varias sesiones de Streamlit (hilos) y varios procesos:
+# cada archivo tiene un candado del proceso y un candado de archivo (<archivo>.lock),
+# los reemplazos completos se escriben en un temporal y se renombran, y las escrituras
+# que llegan al mismo tiempo se agrupan en una sola (group commit).
+EXTENSION_JSONL = ".jsonl"
+SUFIJO_CANDADO = ".lock"
+
+
+# Ruta del archivo JSONL que corresponde a un archivo de registros (horas_extra.json -> horas_extra.jsonl)
+def ruta_jsonl(archivo):
+    base, extension = os.path.splitext(archivo)
+    return archivo if extension == EXTENSION_JSONL else base + EXTENSION_JSONL
+
+
+# Escrituras pendientes de un archivo. Quien toma el candado de escritura escribe
+# de una vez todos los lotes pendientes, incluidos los de otros hilos.
+class _ColaEscritura:
+    def __init__(self):
+        self.candado_pendientes = threading.Lock()
+        self.candado_escritura = threading.Lock()
+        self.pendientes = []
+
+
+class _Lote:
+    def __init__(self, datos):
+        self.datos = datos
+        self.escrito = False
+        self.error = None
+
+
+_colas = {}
+_candado_colas = threading.Lock()
+
+
+def _cola(ruta):
+    ruta = os.path.abspath(ruta)
+    with _candado_colas:
+        cola = _colas.get(ruta)
+        if cola is None:
+            cola = _colas[ruta] = _ColaEscritura()
+        return cola
+
+
+# Candado entre procesos sobre <ruta>.lock (el archivo de datos se puede reemplazar
+# por otro al reescribir, el archivo del candado no).
+@contextmanager
+def _candado_archivo(ruta):
+    with open(ruta + SUFIJO_CANDADO, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _a_linea(registro):
+    return json.dumps(registro, ensure_ascii=False) + "\n"
+
+
+# Escribir un archivo completo de forma atómica: temporal en la misma carpeta y renombrar
+def _escribir_atomico(ruta, datos):
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    descriptor, temporal = tempfile.mkstemp(prefix=os.path.basename(ruta) + ".", suffix=".tmp", dir=carpeta)
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(datos)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+# Migrar una sola vez el arreglo JSON anterior al archivo JSONL. El archivo original no
+# se toca (puede estar en el repositorio): desde que existe el .jsonl ya no se vuelve a leer.
+def migrar_si_hace_falta(archivo):
+    destino = ruta_jsonl(archivo)
+    if destino == archivo or os.path.exists(destino) or not os.path.exists(archivo):
+        return destino
+    with _cola(destino).candado_escritura, _candado_archivo(destino):
+        # Otro hilo o proceso pudo haber migrado mientras se esperaba el candado
+        if os.path.exists(destino) or not os.path.exists(archivo):
+            return destino
+        with open(archivo, "r", encoding="utf-8") as f:
+            contenido = f.read().strip()
+        registros = json.loads(contenido) if contenido else []
+        _escribir_atomico(destino, "".join(_a_linea(r) for r in registros).encode("utf-8"))
+    return destino
+
+
+# Leer los registros uno por uno, sin cargar el archivo completo en memoria
+def leer_registros(archivo):
+    ruta = migrar_si_hace_falta(archivo)
+    try:
+        f = open(ruta, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for linea in f:
+            linea = linea.strip()
+            if linea:
+                yield json.loads(linea)
+
+
+# Registros agregados después de `posicion` (la devuelta por la llamada anterior), para
+# mantener resúmenes al día sin releer todo el archivo. Devuelve (registros, posición,
+# completo); completo indica que se leyó desde el principio porque no había posición o
+# porque el archivo se reescribió desde entonces (reescribir cambia el archivo por otro).
+def leer_registros_desde(archivo, posicion=None):
+    ruta = migrar_si_hace_falta(archivo)
+    inodo, desplazamiento = posicion or (None, 0)
+    try:
+        f = open(ruta, "rb")
+    except FileNotFoundError:
+        return [], [None, 0], posicion is None or desplazamiento > 0
+    with f:
+        estado = os.fstat(f.fileno())
+        completo = posicion is None or inodo != estado.st_ino or desplazamiento > estado.st_size
+        if completo:
+            desplazamiento = 0
+        f.seek(desplazamiento)
+        datos = f.read()
+    # Solo líneas completas: la última puede estar a medio escribir por otro proceso.
+    # Las líneas se decodifican juntas como un solo arreglo JSON (mucho más rápido que
+    # una llamada a json.loads por línea).
+    fin = datos.rfind(b"\n") + 1
+    lineas = [linea for linea in datos[:fin].splitlines() if linea.strip()]
+    registros = json.loads(b"[" + b",".join(lineas) + b"]") if lineas else []
+    return registros, [estado.st_ino, desplazamiento + fin], completo
+
+
+# Agregar registros al final del archivo. Los lotes que llegan al mismo tiempo
+# desde otros hilos se escriben juntos, con una sola escritura y un solo fsync.
+@instrumentado("registros.agregar")
+def agregar_registros(archivo, registros):
+    if not registros:
+        return
+    ruta = migrar_si_hace_falta(archivo)
+    cola = _cola(ruta)
+    lote = _Lote("".join(_a_linea(r) for r in registros).encode("utf-8"))
+    with cola.candado_pendientes:
+        cola.pendientes.append(lote)
+
+    with cola.candado_escritura:
+        if not lote.escrito:
+            with cola.candado_pendientes:
+                pendientes, cola.pendientes = cola.pendientes, []
+            try:
+                with _candado_archivo(ruta), open(ruta, "ab") as f:
+                    f.write(b"".join(l.datos for l in pendientes))
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as e:
+                for l in pendientes:
+                    l.error = e
+            for l in pendientes:
+                l.escrito = True
+
+    if lote.error is not None:
+        raise lote.error
+
+
+# Reemplazar todos los registros del archivo (para correcciones)
+@instrumentado("registros.reescribir")
+def reescribir_registros(archivo, registros):
+    ruta = migrar_si_hace_falta(archivo)
+    with _cola(ruta).candado_escritura, _candado_archivo(ruta):
+        _escribir_atomico(ruta, "".join(_a_linea(r) for r in registros).encode("utf-8"))
@@ -0,0 +1,452 @@
+"""
+API HTTP local para registrar horas extra, días de la familia, permisos y vacaciones
+por lotes (relojes de marcación y otras herramientas internas). Usa solo asyncio de
+la biblioteca estándar: un proceso, un hilo para las solicitudes y un hilo de escritura.
+
+Endpoints (JSON; el cuerpo es una lista de registros o {"registros": [...]}):
+    POST /horas-extra     empleado, fecha, horas_diurnas, minutos_di, horas_nocturnas,
+                          minutos_no, area, pago ("Nomina" o "Tiempo"), hora_inicio_di y
+                          hora_inicio_no (opcionales, "HH:MM")
+    POST /dias-familia    empleado, fecha, area, correo_em, correo_jefe
+    POST /permisos        nombre, fecha, tipo, correo, correo_jefe, pe_motivo (opcional)
+    POST /vacaciones      nombre, fecha_inicio, fecha_fin, correo_em, correo_jefe
+    GET  /salud           estado del servicio
+    GET  /diagnostico     tiempos por operación (ver instrumentacion)
+
+Si API_TOKEN está definido, las solicitudes deben traer "Authorization: Bearer <token>".
+Las horas extra se guardan aunque tengan hallazgos (duplicados, cruces con el turno, ...;
+ver validacion_horas_extra); la respuesta los trae en "hallazgos".
+
+Uso:
+    python api_registros.py [--host 127.0.0.1] [--puerto 8765] [--sin-correo]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+
+import extras
+from configuracion import entorno
+from instrumentacion import medir, resumen
+from validacion_horas_extra import liberar_horas_extra, minutos_hora, preparar_indice, revisar_horas_extra
+
+logger = logging.getLogger(__name__)
+
+HOST = entorno("API_HOST", "127.0.0.1")
+PUERTO = int(entorno("API_PUERTO", "8765"))
+API_TOKEN = entorno("API_TOKEN")
+MAX_CUERPO = 1024 * 1024          # Bytes por solicitud
+MAX_REGISTROS_LOTE = 1000         # Registros por solicitud
+ESPERA_SOLICITUD = 30             # Segundos que una conexión abierta espera la siguiente solicitud
+MEDIOS_PAGO = ("Nomina", "Tiempo")
+
+
+class ErrorSolicitud(Exception):
+    def __init__(self, estado, mensaje, detalles=None):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.detalles = detalles
+
+
+# Validación de los campos de cada tipo de registro: {campo: (tipo, requerido)}.
+# Los tipos son "texto", "fecha" (AAAA-MM-DD), "hora" (HH:MM), "correo" y (mínimo, máximo)
+# para enteros.
+CAMPOS = {
+    "horas-extra": {
+        "empleado": ("texto", True),
+        "fecha": ("fecha", True),
+        "horas_diurnas": ((0, 12), False),
+        "minutos_di": ((0, 59), False),
+        "horas_nocturnas": ((0, 12), False),
+        "minutos_no": ((0, 59), False),
+        "area": ("texto", True),
+        "pago": ("texto", True),
+        "hora_inicio_di": ("hora", False),
+        "hora_inicio_no": ("hora", False),
+    },
+    "dias-familia": {
+        "empleado": ("texto", True),
+        "fecha": ("fecha", True),
+        "area": ("texto", True),
+        "correo_em": ("correo", True),
+        "correo_jefe": ("correo", True),
+    },
+    "permisos": {
+        "nombre": ("texto", True),
+        "fecha": ("fecha", True),
+        "tipo": ("texto", True),
+        "correo": ("correo", True),
+        "correo_jefe": ("correo", True),
+        "pe_motivo": ("texto", False),
+    },
+    "vacaciones": {
+        "nombre": ("texto", True),
+        "fecha_inicio": ("fecha", True),
+        "fecha_fin": ("fecha", True),
+        "correo_em": ("correo", True),
+        "correo_jefe": ("correo", True),
+    },
+}
+
+
+# Fecha AAAA-MM-DD exacta (None si no lo es). date.fromisoformat también acepta 20250701
+# o 2025-W27-2 y strptime acepta 2025-7-1; el texto se guarda tal cual y de él salen los
+# meses de nómina (fecha[:7]), así que solo vale la forma con ceros
+def _fecha(valor):
+    try:
+        fecha = datetime.strptime(valor, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+    return fecha if fecha.isoformat() == valor else None
+
+
+def _errores_campo(valor, tipo):
+    if tipo == "fecha":
+        if _fecha(valor) is None:
+            return "debe ser una fecha AAAA-MM-DD"
+    elif tipo == "hora":
+        if not isinstance(valor, str) or minutos_hora(valor) is None:
+            return "debe ser una hora HH:MM"
+    elif isinstance(tipo, tuple):
+        minimo, maximo = tipo
+        if not isinstance(valor, int) or isinstance(valor, bool) or not minimo <= valor <= maximo:
+            return f"debe ser un entero entre {minimo} y {maximo}"
+    elif not isinstance(valor, str) or not valor.strip():
+        return "debe ser un texto no vacío"
+    elif tipo == "correo" and "@" not in valor:
+        return "debe ser un correo"
+    return None
+
+
+# Errores de una entrada (lista vacía si es válida)
+def validar(tipo, entrada):
+    if not isinstance(entrada, dict):
+        return ["debe ser un objeto"]
+    campos = CAMPOS[tipo]
+    errores = [f"campo desconocido: {c}" for c in entrada if c not in campos]
+    for campo, (tipo_campo, requerido) in campos.items():
+        if campo not in entrada or entrada[campo] is None:
+            if requerido:
+                errores.append(f"{campo}: es obligatorio")
+            continue
+        error = _errores_campo(entrada[campo], tipo_campo)
+        if error:
+            errores.append(f"{campo}: {error}")
+    if errores:
+        return errores
+
+    if tipo == "horas-extra":
+        if entrada["pago"] not in MEDIOS_PAGO:
+            errores.append(f"pago: debe ser uno de {', '.join(MEDIOS_PAGO)}")
+        if not any(entrada.get(c) for c in ("horas_diurnas", "minutos_di", "horas_nocturnas", "minutos_no")):
+            errores.append("se necesita al menos una hora o minuto extra")
+    elif tipo == "vacaciones" and _fecha(entrada["fecha_fin"]) < _fecha(entrada["fecha_inicio"]):
+        errores.append("fecha_fin: es anterior a fecha_inicio")
+    return errores
+
+
+def _ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# Registros a guardar de un lote ya validado: {archivo: [registros]}
+def construir(tipo, entradas):
+    if tipo == "horas-extra":
+        return extras.archivos_horas_extra(extras.construir_registros_horas_extra(entradas))
+    if tipo == "dias-familia":
+        return {extras.ARCHIVO_DIA_FAMILIA: [extras.registro_dia_familia(**e) for e in entradas]}
+    archivo = extras.ARCHIVO_PERMISOS if tipo == "permisos" else extras.ARCHIVO_VACACIONES
+    return {archivo: [dict(e, registrado_en=_ahora()) for e in entradas]}
+
+
+# Correos de una ronda de escritura. Las horas extra y los días de la familia van al mismo
+# destinatario y se agrupan en un correo por ronda; permisos y vacaciones, uno por jefe.
+def _notificar(por_tipo):
+    envios = {
+        "horas-extra": lambda registros: extras.enviar_correo_horas_extra_agrupado(registros),
+        "dias-familia": lambda registros: extras.enviar_correo_dia_familia_agrupado(registros),
+        "permisos": lambda registros: [extras.enviar_correo_permiso(r) for r in registros],
+        "vacaciones": lambda registros: [extras.enviar_correo_vacaciones(r) for r in registros],
+    }
+    for tipo, registros in por_tipo.items():
+        try:
+            envios[tipo](registros)
+        except Exception:
+            logger.exception("No se pudo encolar el correo de %s (%d registros)", tipo, len(registros))
+
+
+class EscritorAgrupado:
+    """
+    Escritura agrupada (group commit) de los lotes que llegan por la API. Cada solicitud
+    deja su lote y espera; una sola tarea toma todos los lotes pendientes y los escribe
+    en un hilo aparte con una escritura por archivo, así que mientras se escribe una
+    ronda se acumula la siguiente. Las respuestas salen cuando los registros ya están en
+    disco; los correos se encolan después, en otro hilo, sin demorar las respuestas.
+
+    Args:
+        notificar (bool, optional): Encolar los correos de cada ronda.
+    """
+
+    def __init__(self, notificar=True):
+        self.notificar = notificar
+        self._pendientes = []  # (tipo, {archivo: [registros]}, futuro)
+        self._hay_pendientes = asyncio.Event()
+        self._hilo_escritura = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-escritura")
+        self._hilo_correo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-correo")
+        self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+        self._escribiendo = False
+        self.rondas = 0
+
+    def pendientes(self):
+        return len(self._pendientes)
+
+    # Guardar un lote; termina cuando el lote está escrito (o lanza el error de la escritura)
+    async def guardar(self, tipo, por_archivo):
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendientes.append((tipo, por_archivo, futuro))
+        self._hay_pendientes.set()
+        await futuro
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._hay_pendientes.wait()
+            self._hay_pendientes.clear()
+            ronda, self._pendientes = self._pendientes, []
+            if not ronda:
+                continue
+
+            por_archivo = {}
+            por_tipo = {}
+            for tipo, archivos, _ in ronda:
+                for archivo, registros in archivos.items():
+                    por_archivo.setdefault(archivo, []).extend(registros)
+                    por_tipo.setdefault(tipo, []).extend(registros)
+            self._escribiendo = True
+            try:
+                await loop.run_in_executor(self._hilo_escritura, _escribir, por_archivo, len(ronda))
+            except Exception as e:
+                for _, _, futuro in ronda:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+                continue
+            finally:
+                self._escribiendo = False
+            self.rondas += 1
+            for _, _, futuro in ronda:
+                if not futuro.done():
+                    futuro.set_result(None)
+            if self.notificar:
+                self._hilo_correo.submit(_notificar, por_tipo)
+
+    # Esperar a que se escriba lo pendiente y detener los hilos
+    async def cerrar(self):
+        while self._pendientes or self._escribiendo:
+            await asyncio.sleep(0.01)
+        self._tarea.cancel()
+        self._hilo_escritura.shutdown(wait=True)
+        self._hilo_correo.shutdown(wait=True)
+
+
+def _escribir(por_archivo, solicitudes):
+    registros = sum(len(r) for r in por_archivo.values())
+    with medir("api.escritura", solicitudes=solicitudes, registros=registros):
+        for archivo, del_archivo in por_archivo.items():
+            extras.almacen.agregar_registros(archivo, del_archivo)
+    if extras.ARCHIVO_HORAS_EXTRA in por_archivo or extras.ARCHIVO_HORAS_EXTRA_NOCTURNAS in por_archivo:
+        from nomina import actualizar_si_cargados
+
+        actualizar_si_cargados()
+
+
+class ServidorRegistros:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio (conexiones persistentes, cuerpos con
+    Content-Length) con las rutas de la API.
+
+    Args:
+        notificar (bool, optional): Encolar los correos de los registros.
+        token (str, optional): Token exigido en Authorization. Por defecto, API_TOKEN.
+    """
+
+    def __init__(self, notificar=True, token=API_TOKEN):
+        self.notificar = notificar
+        self.token = token
+        self.escritor = None
+        self.servidor = None
+        self._conexiones = set()
+
+    async def iniciar(self, host=HOST, puerto=PUERTO):
+        # El índice de validación lee todo el historial la primera vez; mejor antes de atender
+        await asyncio.get_running_loop().run_in_executor(None, preparar_indice)
+        self.escritor = EscritorAgrupado(self.notificar)
+        self.servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self.servidor.sockets[0].getsockname()[:2]
+
+    # Dejar de aceptar conexiones, terminar de escribir lo recibido y cerrar las conexiones abiertas
+    async def cerrar(self):
+        self.servidor.close()
+        await self.escritor.cerrar()
+        for escritor in list(self._conexiones):
+            escritor.close()
+        await self.servidor.wait_closed()
+
+    async def _atender(self, lector, escritor):
+        self._conexiones.add(escritor)
+        try:
+            while True:
+                try:
+                    linea = await asyncio.wait_for(lector.readline(), ESPERA_SOLICITUD)
+                except asyncio.TimeoutError:
+                    break
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(escritor, HTTPStatus.BAD_REQUEST, {"error": "Solicitud mal formada"}, False)
+                    break
+                encabezados = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+
+                conexion = encabezados.get("connection", "").lower()
+                mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+                try:
+                    # Solo cuerpos con Content-Length: un cuerpo por partes (chunked) se
+                    # leería como vacío y sus partes como la siguiente solicitud
+                    if "transfer-encoding" in encabezados:
+                        raise ErrorSolicitud(HTTPStatus.LENGTH_REQUIRED, "Transfer-Encoding no soportado; use Content-Length")
+                    largo = int(encabezados.get("content-length", "0"))
+                    if largo < 0 or largo > MAX_CUERPO:
+                        raise ErrorSolicitud(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"El cuerpo supera {MAX_CUERPO} bytes")
+                    cuerpo = await lector.readexactly(largo) if largo else b""
+                    estado, datos = await self._despachar(metodo, ruta.split("?", 1)[0], encabezados, cuerpo)
+                except ErrorSolicitud as e:
+                    estado, datos = e.estado, {"error": str(e)}
+                    if e.detalles:
+                        datos["detalles"] = e.detalles
+                    # Sin leer el cuerpo no se sabe dónde empieza la siguiente solicitud
+                    mantener = mantener and e.estado not in (HTTPStatus.REQUEST_ENTITY_TOO_LARGE, HTTPStatus.LENGTH_REQUIRED)
+                except ValueError:
+                    estado, datos, mantener = HTTPStatus.BAD_REQUEST, {"error": "Content-Length inválido"}, False
+                except Exception:
+                    logger.exception("Error atendiendo %s %s", metodo, ruta)
+                    estado, datos = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno"}
+                await self._responder(escritor, estado, datos, mantener)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._conexiones.discard(escritor)
+            escritor.close()
+
+    async def _responder(self, escritor, estado, datos, mantener):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(cuerpo)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1") + cuerpo
+        )
+        await escritor.drain()
+
+    async def _despachar(self, metodo, ruta, encabezados, cuerpo):
+        tipo = ruta.strip("/")
+        if ruta == "/salud":
+            return HTTPStatus.OK, {"estado": "ok", "pendientes": self.escritor.pendientes(), "rondas": self.escritor.rondas}
+        if self.token and encabezados.get("authorization") != f"Bearer {self.token}":
+            raise ErrorSolicitud(HTTPStatus.UNAUTHORIZED, "Token inválido o ausente")
+        if ruta == "/diagnostico":
+            return HTTPStatus.OK, resumen()
+        if tipo not in CAMPOS:
+            raise ErrorSolicitud(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {ruta}")
+        if metodo != "POST":
+            raise ErrorSolicitud(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+
+        with medir(f"api.{tipo}"):
+            try:
+                datos = json.loads(cuerpo)
+            except ValueError:
+                raise ErrorSolicitud(HTTPStatus.BAD_REQUEST, "El cuerpo no es JSON válido") from None
+            entradas = datos.get("registros") if isinstance(datos, dict) else datos
+            if not isinstance(entradas, list) or not entradas:
+                raise ErrorSolicitud(HTTPStatus.BAD_REQUEST, "Se espera una lista de registros no vacía")
+            if len(entradas) > MAX_REGISTROS_LOTE:
+                raise ErrorSolicitud(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Máximo {MAX_REGISTROS_LOTE} registros por solicitud")
+            # El lote se acepta completo o se rechaza completo
+            detalles = [
+                {"indice": i, "errores": errores}
+                for i, errores in ((i, validar(tipo, e)) for i, e in enumerate(entradas)) if errores
+            ]
+            if detalles:
+                raise ErrorSolicitud(HTTPStatus.BAD_REQUEST, "Registros inválidos", detalles)
+
+            por_archivo = construir(tipo, entradas)
+            if tipo == "horas-extra":
+                # Se revisan (y reservan en el índice) antes de guardar, así un lote repetido
+                # se detecta aunque el anterior siga en la cola de escritura
+                registros = [r for del_archivo in por_archivo.values() for r in del_archivo]
+                # La revisión lee lo nuevo de los archivos y la programación (y puede
+                # reconstruir el índice): en un hilo, para no detener las demás conexiones
+                hallazgos = await asyncio.get_running_loop().run_in_executor(None, revisar_horas_extra, registros)
+                try:
+                    await self.escritor.guardar(tipo, por_archivo)
+                except BaseException:
+                    liberar_horas_extra(registros)
+                    raise
+            else:
+                await self.escritor.guardar(tipo, por_archivo)
+
+        respuesta = {"recibidos": len(entradas), "guardados": sum(len(r) for r in por_archivo.values())}
+        if tipo == "horas-extra":
+            # Nombres que no están en el directorio de empleados (quedan sin empleado_id)
+            respuesta["sin_directorio"] = sorted({r["empleado"] for r in registros if r["empleado_id"] is None})
+            respuesta["hallazgos"] = hallazgos
+        return HTTPStatus.CREATED, respuesta
+
+
+async def servir(host=HOST, puerto=PUERTO, notificar=True):
+    servidor = ServidorRegistros(notificar)
+    host, puerto = await servidor.iniciar(host, puerto)
+    print(f"Escuchando en http://{host}:{puerto}", flush=True)
+
+    parada = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, parada.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            pass
+    try:
+        await parada.wait()
+    finally:
+        await servidor.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO, help="0 = cualquier puerto libre")
+    parser.add_argument("--sin-correo", action="store_true", help="no encolar correos (pruebas de carga)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(servir(args.host, args.puerto, not args.sin_correo))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,11 @@
-import pandas as pd
 import streamlit as st
-from scheduler import asignar_turnos_con_descanso as asignar_turnos
+from cache_app import clave_programacion, schedule_cacheado, excel_turnos_cacheado
+from reprogramacion import ProgramacionIncremental
+from motores_turnos import MOTOR_OPTIMIZADOR, NOMBRES_MOTORES
+from programacion import HORARIOS_POR_NOMBRE, HORARIOS_PREDEFINIDOS, guardar_programacion
+from optimizador_turnos import MAX_HORAS_SEMANA
 from extras import (
-    registrar_horas_extra,
+    registrar_horas_extra_revisadas,
     generar_pdf_horas_extra,
     enviar_correo_horas_extra_agrupado,
     registrar_dia_familia,
@@ -11,26 +14,21 @@ from extras import (
     generar_pdf_permiso,
     enviar_correo_permiso,
     cargar_registros,
-    enviar_correo_vacaciones
+    enviar_correo_vacaciones,
+    ARCHIVO_DIA_FAMILIA
 )
+from reporte_horas_extra import exportar_pdf_horas_extra, registros_horas_extra
+from excel_export import exportar_horas_extra_excel
+from nomina import reporte_mensual
+from validacion_horas_extra import ARCHIVOS_PROGRAMACION, auditar_mes
+from instrumentacion import resumen as resumen_tiempos, segundos_activo
 from datetime import datetime, timedelta
-from io import BytesIO
-from empleados import EMPLEADOS_POR_AREA
+import os
+import tempfile
+from empleados import EMPLEADOS_POR_AREA, directorio
 
 from correos import CORREOS_JEFES
-# Constantes para archivos
-ARCHIVO_DIA_FAMILIA = "dia_familia.json"
-# Función para obtener los días de la semana
-def obtener_dia(fecha):
-    dias = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
-    return dias[pd.to_datetime(fecha).weekday()]
-# Función para generar el archivo Excel para descarga
-def generar_excel_descarga(df, sheet_name):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name=sheet_name)
-    return output.getvalue()
-
+AREAS_HORAS_EXTRA = ["Logistica","Compras","Cartera","Marketing","Mensajeria","Juridica","Gestion Humana","SST","TI"]
 #titulo de la aplicación
 def main():
     st.set_page_config(page_title="Sistema de Horarios", layout="wide")
@@ -69,31 +67,8 @@ def main():
         with col2:
             month = st.number_input("Mes", min_value=1, max_value=12, value=datetime.now().month)
 # Selección de horarios
-        horarios_predefinidos = [
-            {"nombre": "7:00 AM - 16:00 PM", "horas": 9.0},
-            {"nombre": "7:30 AM - 16:15 PM", "horas": 8.75},
-            {"nombre": "7:30 AM - 17:00 PM", "horas": 9.5},
-            {"nombre": "8:00 AM - 12:00 PM", "horas": 4.0},
-            {"nombre": "7:30 AM - 17:15 PM", "horas": 9.75},
-            {"nombre": "8:00 AM - 11:30 AM", "horas": 3.5},
-            {"nombre": "8:00 AM - 13:00 PM", "horas": 5.0},
-            {"nombre": "8:00 AM - 14:00 PM", "horas": 6.0},
-            {"nombre": "8:00 AM - 15:00 PM", "horas": 7.0},
-            {"nombre": "8:00 AM - 16:00 PM", "horas": 8.0},
-            {"nombre": "8:00 AM - 16:45 PM", "horas": 8.75},
-            {"nombre": "8:00 AM - 16:30 PM", "horas": 8.5},
-            {"nombre": "8:00 AM - 17:00 PM", "horas": 9.0},
-            {"nombre": "8:00 AM - 17:30 PM", "horas": 9.5},
-            {"nombre": "8:00 AM - 18:00 PM", "horas": 10.0},
-            {"nombre": "9:00 AM - 12:30 PM", "horas": 3.5},
-            {"nombre": "9:00 AM - 14:00 PM", "horas": 5.0},
-            {"nombre": "9:00 AM - 18:00 PM", "horas": 9.0},
-            {"nombre": "9:30 AM - 18:00 PM", "horas": 8.5},
-            {"nombre": "10:00 AM - 18:00 PM", "horas": 8.0}
-        ]
-
-        horarios_opciones_display = [h["nombre"] for h in horarios_predefinidos]
-        horarios_mapping = {h["nombre"]: h for h in horarios_predefinidos}
+        horarios_opciones_display = [h["nombre"] for h in HORARIOS_PREDEFINIDOS]
+        horarios_mapping = HORARIOS_POR_NOMBRE
 # Selección de horarios de lunes a jueves
         horarios_seleccionados_nombres = st.multiselect("Selecciona los horarios de trabajo de Lunes a Jueves", horarios_opciones_display)
         horarios_lun_jue = [horarios_mapping[n] for n in horarios_seleccionados_nombres]
@@ -109,6 +84,23 @@ def main():
                 horarios_opciones_display,
             )
             horarios_seleccionadossabado = [horarios_mapping[nombre] for nombre in horarios_seleccionadossabado_nombres]
+# Motor de programación: rotación por grupos u optimizador con restricciones
+        motor = st.selectbox(
+            "Motor de programación", list(NOMBRES_MOTORES.keys()), format_func=NOMBRES_MOTORES.get
+        )
+        restricciones = {}
+        if motor == MOTOR_OPTIMIZADOR:
+            restricciones["max_horas_semana"] = st.number_input(
+                "Máximo de horas por semana", min_value=1.0, max_value=72.0, value=float(MAX_HORAS_SEMANA), step=0.5
+            )
+            restricciones["cobertura_minima"] = {
+                nombre: st.number_input(f"Mínimo de empleados por día en {nombre}", min_value=0, max_value=len(empleados), value=0, key=f"cob_{nombre}")
+                for nombre in horarios_seleccionados_nombres
+            }
+            if trabajan_sabado:
+                restricciones["cobertura_sabado"] = st.number_input(
+                    "Empleados que trabajan cada sábado", min_value=0, max_value=len(empleados), value=len(empleados)
+                )
 # Selecciona si algún empleado tiene el Día de la Familia con su fecha
         dia_familia = st.checkbox("Algún empleado tiene el Día de la Familia?")
         empleados_dia_familia_dict = {}
@@ -137,71 +129,49 @@ def main():
                     fechas_descanso = [fechas_descanso]
                 empleados_descanso_dict[empleado] = [f.strftime("%Y-%m-%d") for f in fechas_descanso]
 # Botón para generar los turnos
-        turnos = None
         if st.button("Generar Turnos"):
             if not empleados:
                 st.error("Por favor, ingresa al menos un empleado antes de generar los turnos.")
             elif not horarios_lun_jue:
                 st.error("Por favor, selecciona al menos un horario de lunes a jueves.")
             else:
+                entradas = {
+                    "empleados": empleados,
+                    "year": year,
+                    "month": month,
+                    "horarios_lunes_a_viernes": horarios_lun_jue,
+                    "trabajan_sabado": trabajan_sabado,
+                    "horario_sabado": horarios_seleccionadossabado,
+                    "horario_viernes": horarios_viernes,
+                    "motor": motor,
+                    "restricciones": restricciones,
+                }
+                novedades = {
+                    "dias_familia": empleados_dia_familia_dict if dia_familia else None,
+                    "vacaciones": empleados_vacaciones_dict if vacaciones else None,
+                    "descansos": empleados_descanso_dict if descansos else None,
+                }
+                # Si otra sesión ya pidió la misma programación, se toma de la caché
+                clave_base = clave_programacion(entradas)
                 try:
-                    turnos = asignar_turnos(
-                        empleados,
-                        year,
-                        month,
-                        horarios_lun_jue,
-                        trabajan_sabado,
-                        horarios_seleccionadossabado,
-                        horarios_viernes
-                    )
+                    programacion = st.session_state.get("programacion")
+                    if programacion is not None and st.session_state.get("clave_base") == clave_base:
+                        # Solo cambiaron novedades: se recalculan únicamente los empleados afectados
+                        st.session_state["diferencias_turnos"] = programacion.actualizar_novedades(**novedades)
+                    else:
+                        schedule = schedule_cacheado(clave_base, entradas)
+                        programacion = ProgramacionIncremental(schedule, **novedades)
+                        st.session_state["diferencias_turnos"] = None
+                        # Restricciones del optimizador que no se pudieron cumplir
+                        st.session_state["infracciones_turnos"] = schedule.infracciones
+                    st.session_state["programacion"] = programacion
+                    st.session_state["clave_base"] = clave_base
+                    st.session_state["df_turnos"] = programacion.tabla()
+                    st.session_state["excesos_descansos"] = programacion.excesos_descansos()
+                    st.session_state["clave_turnos"] = clave_programacion({**entradas, **novedades})
+                    st.session_state["mes_turnos"] = (area, year, month)
                 except Exception as e:
                     st.error(f"Error al asignar turnos: {e}")
-                    turnos = {}
-
-                all_turnos = []
-                for empleado, lista in turnos.items():
-                    for t in lista:
-                        fecha_str = t["fecha"]
-                        fecha_obj = datetime.strptime(fecha_str, "%Y-%m-%d").date()
-                        turno = t["turno"]
-                        horas = t["horas"]
-
-                        if dia_familia and empleado in empleados_dia_familia_dict:
-                            if fecha_obj == empleados_dia_familia_dict[empleado]:
-                                turno = "Día de la Familia"
-                                horas = 0
-
-                        if vacaciones and empleado in empleados_vacaciones_dict:
-                            inicio, fin = empleados_vacaciones_dict[empleado]
-                            if inicio <= fecha_obj <= fin:
-                                turno = "Vacaciones"
-                                horas = 0
-
-                        if descansos and empleado in empleados_descanso_dict:
-                            if fecha_str in empleados_descanso_dict[empleado]:
-                                turno = "Descanso"
-                                horas = 0
-
-                        horas_ajustadas = max(horas - 0.75, 0)
-
-                        all_turnos.append({
-                            "Empleado": empleado,
-                            "Fecha": fecha_str,
-                            "Turno": turno,
-                            "Horas Laboradas": horas_ajustadas,
-                            "Almuerzo": "30 minutos",
-                            "Desayuno": "15 minutos"
-                        })
-
-                df = pd.DataFrame(all_turnos)
-                df["Día"] = df["Fecha"].apply(obtener_dia)
-                df["Semana"] = pd.to_datetime(df["Fecha"]).dt.isocalendar().week
-
-                resumen_semanal = df.groupby(["Empleado", "Semana"])["Horas Laboradas"].sum().reset_index()
-                resumen_semanal.rename(columns={"Horas Laboradas": "Horas Semana"}, inplace=True)
-
-                df = df.merge(resumen_semanal, on=["Empleado", "Semana"], how="left")
-                st.session_state["df_turnos"] = df
 
         if "df_turnos" in st.session_state:
             df = st.session_state["df_turnos"]
@@ -210,6 +180,26 @@ def main():
             if "Horas Totales" not in df.columns:
                 df["Horas Totales"] = df["Horas Laboradas"] - 0.75
 
+            infracciones = st.session_state.get("infracciones_turnos")
+            if infracciones:
+                lineas = "\n".join(f"- {texto}" for texto in infracciones[:20])
+                if len(infracciones) > 20:
+                    lineas += f"\n- ... y {len(infracciones) - 20} más"
+                st.warning(
+                    f"La programación no cumple {len(infracciones)} restricción(es); se muestra la más "
+                    f"cercana que se encontró. Revise la cobertura o el máximo de horas:\n\n{lineas}"
+                )
+
+            excesos = st.session_state.get("excesos_descansos")
+            if excesos:
+                lineas = "\n".join(f"- {texto}" for texto in excesos)
+                st.warning(f"Los descansos y novedades ingresados superan el máximo de descansos por día:\n\n{lineas}")
+
+            diferencias = st.session_state.get("diferencias_turnos")
+            if diferencias is not None and not diferencias.empty:
+                st.subheader("Cambios respecto a la generación anterior")
+                st.dataframe(diferencias)
+
             st.subheader("Turnos Generados")
             st.dataframe(df[[
                 "Empleado", "Fecha", "Día", "Turno", "Almuerzo", "Desayuno", "Horas Laboradas", "Horas Totales"
@@ -217,15 +207,16 @@ def main():
 # Descargar turnos en Excel
             st.download_button(
                 "Descargar Turnos en Excel",
-                generar_excel_descarga(
-                    df[[
-                        "Empleado", "Fecha", "Día", "Turno", "Almuerzo", "Desayuno", "Horas Laboradas", "Horas Totales"
-                    ]],
-                    "Turnos"
-                ),
+                excel_turnos_cacheado(st.session_state["clave_turnos"], df, "Turnos"),
                 file_name=f"Turnos_{year}_{month}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+# Guardar la programación para revisar contra ella las horas extra que se registren
+            area_turnos, year_turnos, month_turnos = st.session_state.get("mes_turnos", (area, year, month))
+            if area_turnos != "Seleccione un área" and st.button("Guardar como programación vigente"):
+                carpeta = os.path.dirname(ARCHIVOS_PROGRAMACION) or "."
+                ruta = guardar_programacion(area_turnos, year_turnos, month_turnos, df, carpeta)
+                st.success(f"Programación de {area_turnos} guardada en {ruta}; las horas extra se revisarán contra ella.")
 
 # Horas Extra
     with tabs[1]:
@@ -240,6 +231,11 @@ def main():
 
             with cols[0]:
                 nombre = st.text_input("Nombre empleado", key=f"he_nombre_{i}")
+                # Sugerencias del directorio mientras el nombre no coincida con un empleado
+                if nombre.strip() and directorio().buscar(nombre) is None:
+                    sugerencias = directorio().autocompletar(nombre, limite=5)
+                    if sugerencias:
+                        st.caption("¿Quisiste decir? " + ", ".join(f"{e.nombre} ({e.area})" for e in sugerencias))
             with cols[1]:
                 fecha = st.date_input("Fecha", key=f"he_fecha_{i}")
             with cols[2]:
@@ -255,8 +251,15 @@ def main():
                 with col_m:
                     horas_no = st.number_input("Horas Nocturnas", 0, 12, key=f"he_nocturnas_horas_{i}")
 
+            # Horas de inicio (opcionales): con ellas se revisan los cruces con el turno
+            col_di, col_no = st.columns(2)
+            with col_di:
+                inicio_di = st.time_input("Hora inicio diurnas (opcional)", value=None, key=f"he_inicio_di_{i}")
+            with col_no:
+                inicio_no = st.time_input("Hora inicio nocturnas (opcional)", value=None, key=f"he_inicio_no_{i}")
+
             area_he = st.selectbox("Área de trabajo", 
-                ["Logistica","Compras","Cartera","Marketing","Mensajeria","Juridica","Gestion Humana","SST","TI"], 
+                AREAS_HORAS_EXTRA, 
                 key=f"he_area_{i}"
             )
 
@@ -266,28 +269,34 @@ def main():
                 key=f"he_pago_{i}"
             )
 
-            campos.append((nombre, fecha, horas_no, horas_di, minutos_di, minutos_no, area_he, pago))
+            campos.append((nombre, fecha, horas_no, horas_di, minutos_di, minutos_no, area_he, pago, inicio_di, inicio_no))
 
         if st.button("Registrar y enviar"):
-            registros = []
-            for nombre, fecha, horas_no, horas_di, minutos_di, minutos_no, area_he, pago in campos:
+            entradas = []
+            for nombre, fecha, horas_no, horas_di, minutos_di, minutos_no, area_he, pago, inicio_di, inicio_no in campos:
                 if not nombre or (horas_di == 0 and minutos_di == 0 and horas_no == 0 and minutos_no == 0):
                     st.error("Completa el nombre y al menos una hora o minuto extra.")
                     break
 
-                registro = registrar_horas_extra(
-                    empleado=nombre,
-                    fecha=fecha,
-                    horas_nocturnas=horas_no,
-                    horas_diurnas=horas_di,
-                    minutos_di=minutos_di,
-                    minutos_no=minutos_no,
-                    area=area_he,
-                    pago=pago
-                )
-                registros.extend(registro)
+                entradas.append({
+                    "empleado": nombre,
+                    "fecha": fecha,
+                    "horas_nocturnas": horas_no,
+                    "horas_diurnas": horas_di,
+                    "minutos_di": minutos_di,
+                    "minutos_no": minutos_no,
+                    "area": area_he,
+                    "pago": pago,
+                    "hora_inicio_di": inicio_di.strftime("%H:%M") if inicio_di else None,
+                    "hora_inicio_no": inicio_no.strftime("%H:%M") if inicio_no else None,
+                })
 
             else:  # Se ejecuta solo si no hubo break
+                # Todo el formulario se guarda con una sola escritura por archivo; los
+                # hallazgos (duplicados, cruces con el turno, ...) no impiden guardarlo
+                registros, hallazgos = registrar_horas_extra_revisadas(entradas)
+                for h in hallazgos:
+                    st.warning(f"{h['empleado']} ({h['fecha']}, {h['tipo']}): {h['detalle']}")
                 if registros:
                     pdf = generar_pdf_horas_extra(registros)
                     st.download_button(
@@ -299,6 +308,87 @@ def main():
                     enviar_correo_horas_extra_agrupado(registros)
                     st.success("Tiempo extra registrado y correo enviado.")     
 
+        # Exportar el historial completo (o un rango) para nómina
+        with st.expander("Exportar historial de horas extra"):
+            col_desde, col_hasta, col_area = st.columns(3)
+            with col_desde:
+                exp_desde = st.date_input("Desde", value=datetime.now().replace(month=1, day=1), key="exp_desde")
+            with col_hasta:
+                exp_hasta = st.date_input("Hasta", key="exp_hasta")
+            with col_area:
+                exp_area = st.selectbox("Área", ["Todas"] + AREAS_HORAS_EXTRA, key="exp_area")
+
+            if st.button("Generar PDF del historial"):
+                # El PDF se escribe por páginas en un archivo temporal
+                with tempfile.TemporaryFile() as archivo_pdf:
+                    cantidad = exportar_pdf_horas_extra(
+                        archivo_pdf, exp_desde, exp_hasta, None if exp_area == "Todas" else exp_area
+                    )
+                    archivo_pdf.seek(0)
+                    st.download_button(
+                        f"Descargar historial ({cantidad} registros)",
+                        archivo_pdf.read(),
+                        file_name=f"historial_horas_extra_{exp_desde}_{exp_hasta}.pdf",
+                        mime="application/pdf"
+                    )
+
+            if st.button("Generar Excel del historial (una hoja por área)"):
+                with tempfile.TemporaryFile() as archivo_excel:
+                    cantidad = exportar_horas_extra_excel(
+                        archivo_excel,
+                        registros_horas_extra(exp_desde, exp_hasta, None if exp_area == "Todas" else exp_area),
+                    )
+                    archivo_excel.seek(0)
+                    st.download_button(
+                        f"Descargar Excel ({cantidad} registros)",
+                        archivo_excel.read(),
+                        file_name=f"historial_horas_extra_{exp_desde}_{exp_hasta}.xlsx",
+                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+
+        # Liquidación del mes desde los acumulados de nómina (no recorre el historial)
+        with st.expander("Liquidación de horas extra del mes"):
+            col_mes, col_agrupar = st.columns(2)
+            with col_mes:
+                liq_mes = st.date_input("Mes (cualquier día del mes)", key="liq_mes")
+            with col_agrupar:
+                liq_agrupar = st.selectbox("Agrupar por", ["Área y empleado", "Área", "Empleado", "Forma de pago"], key="liq_agrupar")
+            agrupar_por = {
+                "Área y empleado": ("area", "empleado"),
+                "Área": ("area",),
+                "Empleado": ("empleado",),
+                "Forma de pago": ("pago",),
+            }[liq_agrupar]
+            if st.button("Ver liquidación"):
+                liquidacion = reporte_mensual(liq_mes, agrupar_por)
+                if liquidacion:
+                    st.dataframe(liquidacion)
+                    st.metric("Total a pagar", f"${sum(f['valor'] for f in liquidacion):,.0f}")
+                else:
+                    st.info("No hay horas extra registradas en ese mes.")
+
+        # Duplicados, horas extra en descansos y cruces con los turnos de todo un mes
+        with st.expander("Auditoría de horas extra del mes"):
+            col_mes, col_area = st.columns(2)
+            with col_mes:
+                aud_mes = st.date_input("Mes (cualquier día del mes)", key="aud_mes")
+            with col_area:
+                aud_area = st.selectbox("Área", ["Todas"] + AREAS_HORAS_EXTRA, key="aud_area")
+            if st.button("Auditar"):
+                hallazgos = auditar_mes(aud_mes, None if aud_area == "Todas" else aud_area)
+                if hallazgos.empty:
+                    st.success("No se encontraron inconsistencias en ese mes.")
+                else:
+                    st.dataframe(hallazgos)
+                    st.caption(", ".join(f"{n} {h}" for h, n in hallazgos["hallazgo"].value_counts().items()))
+
+    # Panel oculto de tiempos: se muestra con ?diagnostico=1 en la URL o DIAGNOSTICO=1 en el entorno
+    if st.query_params.get("diagnostico") == "1" or os.getenv("DIAGNOSTICO") == "1":
+        with st.expander("Diagnóstico de tiempos"):
+            st.caption(f"Mediciones desde el inicio del proceso (hace {segundos_activo() / 60:.0f} min); "
+                       "p50, p95 y máximo sobre los tramos recientes.")
+            st.dataframe(resumen_tiempos())
+
 
 if __name__ == "__main__":
     main()
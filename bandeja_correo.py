@@ -0,0 +1,366 @@
+import io
+import os
+import smtplib
+import sqlite3
+import threading
+import time
+
+from configuracion import entorno
+from instrumentacion import medir
+
+# Bandeja de salida de correos. Los remitentes (extras, email_utils) solo guardan el
+# mensaje en una base de datos local y regresan de inmediato; un hilo en segundo plano
+# los envía por lotes reutilizando la conexión SMTP de cada cuenta y reintenta con
+# espera exponencial los que fallan.
+ARCHIVO_BANDEJA = entorno("ARCHIVO_BANDEJA_CORREO", "bandeja_correo.db")
+
+# Cuentas de envío: nombre -> (variable del usuario, variable de la contraseña).
+# Las contraseñas nunca se guardan en la bandeja, se leen del entorno al enviar.
+CUENTAS = {
+    "extras": ("EMAIL_REMITENTE", "EMAIL_P"),
+    "email_utils": ("EMAIL", "EMAIL_PASSWORD"),
+}
+
+TAMANO_LOTE = 20              # Mensajes por ronda de envío
+MAX_INTENTOS = 6              # Después de esto el mensaje queda como "fallido"
+ESPERA_BASE = 30              # Segundos antes del primer reintento (se duplica en cada intento)
+ESPERA_MAXIMA = 30 * 60       # Máximo de segundos entre reintentos
+INTERVALO_REVISION = 15       # Segundos entre revisiones cuando no hay mensajes nuevos
+CONEXION_INACTIVA = 120       # Segundos sin uso antes de cerrar una conexión SMTP
+RECLAMO_VENCIDO = 10 * 60     # Segundos tras los que un mensaje "enviando" se reintenta
+# Minutos durante los que se acumulan las notificaciones de un mismo destinatario para
+# enviarlas en un solo correo de resumen (0 = enviar cada notificación de inmediato)
+VENTANA_RESUMEN_MINUTOS = float(entorno("VENTANA_RESUMEN_MINUTOS", "0"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensajes (
+    id INTEGER PRIMARY KEY,
+    cuenta TEXT NOT NULL,
+    destinatario TEXT NOT NULL,
+    asunto TEXT NOT NULL,
+    contenido TEXT NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL,
+    reclamado_en REAL,
+    creado_en REAL NOT NULL,
+    enviado_en REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_mensajes_estado ON mensajes (estado, proximo_intento);
+CREATE TABLE IF NOT EXISTS adjuntos (
+    id INTEGER PRIMARY KEY,
+    mensaje_id INTEGER NOT NULL REFERENCES mensajes (id),
+    nombre TEXT NOT NULL,
+    datos BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_adjuntos_mensaje ON adjuntos (mensaje_id);
+CREATE TABLE IF NOT EXISTS notificaciones (
+    id INTEGER PRIMARY KEY,
+    cuenta TEXT NOT NULL,
+    destinatario TEXT NOT NULL,
+    asunto TEXT NOT NULL,
+    contenido TEXT NOT NULL,
+    creado_en REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notificaciones_destinatario ON notificaciones (cuenta, destinatario, id);
+"""
+
+_local = threading.local()
+
+
+def _conexion():
+    con = getattr(_local, "conexion", None)
+    if con is None or getattr(_local, "ruta", None) != ARCHIVO_BANDEJA:
+        con = sqlite3.connect(ARCHIVO_BANDEJA, timeout=30, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=FULL")
+        con.executescript(_ESQUEMA)
+        _local.conexion = con
+        _local.ruta = ARCHIVO_BANDEJA
+    return con
+
+
+# Configuración del servidor SMTP. Para pruebas locales se puede apuntar a un
+# servidor de depuración, p. ej.
+# SMTP_HOST=localhost SMTP_PORT=1025 SMTP_SSL=0 SMTP_STARTTLS=0 SMTP_SIN_LOGIN=1
+def _config_smtp():
+    starttls = entorno("SMTP_STARTTLS")
+    return {
+        "host": entorno("SMTP_HOST", "smtp.gmail.com"),
+        "port": entorno("SMTP_PORT") or None,
+        "smtp_ssl": entorno("SMTP_SSL", "1") == "1",
+        "smtp_starttls": None if starttls is None else starttls == "1",
+        "smtp_skip_login": entorno("SMTP_SIN_LOGIN", "0") == "1",
+    }
+
+
+def _leer_adjunto(adjunto):
+    if isinstance(adjunto, (bytes, bytearray)):
+        return "adjunto", bytes(adjunto)
+    if isinstance(adjunto, tuple):
+        nombre, datos = adjunto
+        return nombre, bytes(datos)
+    if isinstance(adjunto, str):
+        with open(adjunto, "rb") as f:
+            return os.path.basename(adjunto), f.read()
+    # Archivos subidos en Streamlit y otros objetos tipo archivo
+    datos = adjunto.getvalue() if hasattr(adjunto, "getvalue") else adjunto.read()
+    return os.path.basename(getattr(adjunto, "name", "adjunto")), datos
+
+
+def encolar_correo(cuenta, destinatario, asunto, contenido, adjuntos=None):
+    """
+    Guarda un correo en la bandeja de salida y despierta al hilo de envío.
+
+    Args:
+        cuenta (str): Cuenta de envío (ver CUENTAS).
+        destinatario (str): Correo del destinatario.
+        asunto (str): Asunto del correo.
+        contenido (str): Cuerpo del correo (texto o HTML).
+        adjuntos (list, optional): Rutas de archivo, archivos subidos o tuplas (nombre, bytes).
+
+    Returns:
+        int: Id del mensaje en la bandeja.
+    """
+    if cuenta not in CUENTAS:
+        raise ValueError(f"Cuenta de correo desconocida: {cuenta}")
+    adjuntos = [_leer_adjunto(a) for a in (adjuntos or [])]
+    ahora = time.time()
+    con = _conexion()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        mensaje_id = _insertar_mensaje(con, cuenta, destinatario, asunto, contenido, ahora)
+        con.executemany(
+            "INSERT INTO adjuntos (mensaje_id, nombre, datos) VALUES (?, ?, ?)",
+            [(mensaje_id, nombre, datos) for nombre, datos in adjuntos],
+        )
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    iniciar_trabajador()
+    _hay_mensajes.set()
+    return mensaje_id
+
+
+def _insertar_mensaje(con, cuenta, destinatario, asunto, contenido, ahora):
+    cursor = con.execute(
+        "INSERT INTO mensajes (cuenta, destinatario, asunto, contenido, proximo_intento, creado_en) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (cuenta, destinatario, asunto, contenido, ahora, ahora),
+    )
+    return cursor.lastrowid
+
+
+def notificar(cuenta, destinatario, asunto, contenido):
+    """
+    Enviar una notificación. Si VENTANA_RESUMEN_MINUTOS es mayor que cero, las
+    notificaciones de un mismo destinatario se acumulan durante esa ventana y se
+    envían juntas en un solo correo de resumen; si no, se encola de inmediato.
+    """
+    if VENTANA_RESUMEN_MINUTOS <= 0:
+        return encolar_correo(cuenta, destinatario, asunto, contenido)
+    if cuenta not in CUENTAS:
+        raise ValueError(f"Cuenta de correo desconocida: {cuenta}")
+    _conexion().execute(
+        "INSERT INTO notificaciones (cuenta, destinatario, asunto, contenido, creado_en) VALUES (?, ?, ?, ?, ?)",
+        (cuenta, destinatario, asunto, contenido, time.time()),
+    )
+    iniciar_trabajador()
+    return None
+
+
+# Convertir en un correo de resumen las notificaciones de cada destinatario cuya
+# notificación más antigua ya cumplió la ventana
+def agrupar_resumenes(ventana_minutos=None, ahora=None):
+    from plantillas_correo import RESUMEN_ASUNTO, cuerpo_resumen
+
+    ventana = VENTANA_RESUMEN_MINUTOS if ventana_minutos is None else ventana_minutos
+    ahora = time.time() if ahora is None else ahora
+    con = _conexion()
+    grupos = con.execute(
+        "SELECT cuenta, destinatario FROM notificaciones GROUP BY cuenta, destinatario HAVING MIN(creado_en) <= ?",
+        (ahora - ventana * 60,),
+    ).fetchall()
+    for cuenta, destinatario in grupos:
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            filas = con.execute(
+                "SELECT id, asunto, contenido, creado_en FROM notificaciones "
+                "WHERE cuenta = ? AND destinatario = ? ORDER BY id",
+                (cuenta, destinatario),
+            ).fetchall()
+            if filas:
+                desde = time.strftime("%Y-%m-%d %H:%M", time.localtime(filas[0][3]))
+                if len(filas) == 1:
+                    asunto, contenido = filas[0][1], filas[0][2]
+                else:
+                    asunto = RESUMEN_ASUNTO.render(cantidad=len(filas))
+                    contenido = cuerpo_resumen([(f[1], f[2]) for f in filas], desde)
+                _insertar_mensaje(con, cuenta, destinatario, asunto, contenido, ahora)
+                con.execute(
+                    "DELETE FROM notificaciones WHERE cuenta = ? AND destinatario = ? AND id <= ?",
+                    (cuenta, destinatario, filas[-1][0]),
+                )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+    return len(grupos)
+
+
+# Conexiones SMTP abiertas por cuenta, reutilizadas entre envíos
+class _PoolSMTP:
+    def __init__(self):
+        self._conexiones = {}
+
+    def obtener(self, cuenta):
+        yag, _ = self._conexiones.get(cuenta, (None, None))
+        if yag is None or yag.is_closed:
+            import yagmail
+
+            variable_usuario, variable_clave = CUENTAS[cuenta]
+            yag = yagmail.SMTP(entorno(variable_usuario), entorno(variable_clave), **_config_smtp())
+            yag.login()
+        self._conexiones[cuenta] = (yag, time.monotonic())
+        return yag
+
+    def descartar(self, cuenta):
+        yag, _ = self._conexiones.pop(cuenta, (None, None))
+        if yag is not None:
+            try:
+                yag.close()
+            except Exception:
+                pass
+
+    def cerrar_inactivas(self, segundos=CONEXION_INACTIVA):
+        ahora = time.monotonic()
+        for cuenta, (_, usada_en) in list(self._conexiones.items()):
+            if ahora - usada_en >= segundos:
+                self.descartar(cuenta)
+
+
+_pool = _PoolSMTP()
+
+
+# Tomar hasta `limite` mensajes listos para enviar y marcarlos como "enviando"
+def _reclamar(con, limite):
+    ahora = time.time()
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        filas = con.execute(
+            "SELECT id, cuenta, destinatario, asunto, contenido, intentos FROM mensajes "
+            "WHERE (estado = 'pendiente' AND proximo_intento <= ?) "
+            "OR (estado = 'enviando' AND reclamado_en <= ?) "
+            "ORDER BY id LIMIT ?",
+            (ahora, ahora - RECLAMO_VENCIDO, limite),
+        ).fetchall()
+        con.executemany(
+            "UPDATE mensajes SET estado = 'enviando', reclamado_en = ? WHERE id = ?",
+            [(ahora, fila[0]) for fila in filas],
+        )
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return filas
+
+
+def _enviar(yag, destinatario, asunto, contenido, adjuntos):
+    archivos = []
+    for nombre, datos in adjuntos:
+        archivo = io.BytesIO(datos)
+        archivo.name = nombre
+        archivos.append(archivo)
+    destinatarios, mensaje = yag.prepare_send(to=destinatario, subject=asunto, contents=contenido,
+                                              attachments=archivos or None)
+    yag.smtp.sendmail(yag.user, destinatarios, mensaje)
+
+
+def procesar_pendientes(limite=TAMANO_LOTE):
+    """
+    Envía una ronda de hasta `limite` mensajes pendientes, agrupados por cuenta para
+    reutilizar una sola conexión SMTP por cuenta.
+
+    Returns:
+        int: Número de mensajes reclamados en esta ronda (enviados o reprogramados).
+    """
+    con = _conexion()
+    agrupar_resumenes()
+    filas = _reclamar(con, limite)
+    for mensaje_id, cuenta, destinatario, asunto, contenido, intentos in sorted(filas, key=lambda f: (f[1], f[0])):
+        adjuntos = con.execute("SELECT nombre, datos FROM adjuntos WHERE mensaje_id = ? ORDER BY id", (mensaje_id,)).fetchall()
+        try:
+            with medir("smtp.enviar", cuenta=cuenta, adjuntos=len(adjuntos)):
+                try:
+                    _enviar(_pool.obtener(cuenta), destinatario, asunto, contenido, adjuntos)
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # La conexión reutilizada se cerró: reconectar una vez
+                    _pool.descartar(cuenta)
+                    _enviar(_pool.obtener(cuenta), destinatario, asunto, contenido, adjuntos)
+        except Exception as e:
+            _pool.descartar(cuenta)
+            intentos += 1
+            estado = "fallido" if intentos >= MAX_INTENTOS else "pendiente"
+            espera = min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA)
+            con.execute(
+                "UPDATE mensajes SET estado = ?, intentos = ?, proximo_intento = ?, error = ? WHERE id = ?",
+                (estado, intentos, time.time() + espera, repr(e), mensaje_id),
+            )
+        else:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute(
+                "UPDATE mensajes SET estado = 'enviado', enviado_en = ?, error = NULL WHERE id = ?",
+                (time.time(), mensaje_id),
+            )
+            con.execute("DELETE FROM adjuntos WHERE mensaje_id = ?", (mensaje_id,))
+            con.execute("COMMIT")
+    return len(filas)
+
+
+# Enviar todo lo que esté listo en la bandeja (útil en pruebas y tareas programadas)
+def vaciar_bandeja():
+    total = 0
+    while True:
+        enviados = procesar_pendientes()
+        if not enviados:
+            return total
+        total += enviados
+
+
+# Conteo de mensajes por estado (y de notificaciones que esperan su resumen)
+def resumen_bandeja():
+    con = _conexion()
+    resumen = dict(con.execute("SELECT estado, COUNT(*) FROM mensajes GROUP BY estado").fetchall())
+    (en_espera,) = con.execute("SELECT COUNT(*) FROM notificaciones").fetchone()
+    if en_espera:
+        resumen["en_resumen"] = en_espera
+    return resumen
+
+
+_hay_mensajes = threading.Event()
+_hilo = None
+_candado_hilo = threading.Lock()
+
+
+def _bucle_trabajador():
+    while True:
+        try:
+            enviados = procesar_pendientes()
+        except Exception:
+            enviados = 0
+        if enviados:
+            continue
+        _pool.cerrar_inactivas()
+        _hay_mensajes.wait(INTERVALO_REVISION)
+        _hay_mensajes.clear()
+
+
+# Iniciar (una sola vez por proceso) el hilo que envía los correos de la bandeja
+def iniciar_trabajador():
+    global _hilo
+    with _candado_hilo:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_trabajador, name="bandeja-correo", daemon=True)
+            _hilo.start()
@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from calendar_utils import CALENDARIO
+from empleados import EMPLEADOS_POR_AREA
+from motores_turnos import MOTOR_ROTACION, programar_turnos
+
+
+# Lista de (año, mes) desde inicio hasta fin, ambos incluidos. inicio y fin son tuplas (año, mes).
+def rango_meses(inicio, fin):
+    year, month = inicio
+    meses = []
+    while (year, month) <= tuple(fin):
+        meses.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return meses
+
+
+# Inicializador de cada proceso: recibe las tablas del calendario ya construidas
+# para no recalcular los festivos en cada proceso.
+def _inicializar_proceso(tablas_calendario):
+    CALENDARIO.cargar_tablas(tablas_calendario)
+
+
+def _programar(area, empleados, year, month, config, motor, restricciones):
+    return area, year, month, programar_turnos(motor, empleados, year, month, **config, **restricciones)
+
+
+def generar_lote(meses, horarios_lunes_a_viernes, trabajan_sabado=False, horario_sabado=None,
+                 horario_viernes=None, areas=None, config_por_area=None, max_workers=None, progreso=None,
+                 motor=MOTOR_ROTACION, restricciones=None):
+    """
+    Genera los turnos de varias áreas y varios meses en paralelo, un proceso por tarea
+    (área, mes).
+
+    Args:
+        meses (list): Lista de tuplas (año, mes). Ver rango_meses.
+        horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes:
+            Configuración de horarios por defecto, igual que en asignar_turnos_matriz.
+        areas (list, optional): Áreas de EMPLEADOS_POR_AREA a programar. Por defecto, todas.
+        config_por_area (dict, optional): {área: {parámetro: valor}} para cambiar la
+                                          configuración de horarios de algunas áreas.
+        max_workers (int, optional): Número de procesos. Con 1 se ejecuta en el mismo proceso.
+        progreso (callable, optional): Se llama como progreso(completadas, total, area, year, month)
+                                       cada vez que termina una tarea.
+        motor (str, optional): Motor de programación (ver motores_turnos). Por defecto, la rotación.
+        restricciones (dict, optional): Parámetros propios del motor, iguales para todas las áreas.
+
+    Returns:
+        dict: {(área, año, mes): Schedule}, ordenado por el orden de las áreas y luego por mes,
+              sin importar el orden en que terminen los procesos.
+    """
+    areas = list(EMPLEADOS_POR_AREA.keys()) if areas is None else list(areas)
+    config_por_area = config_por_area or {}
+    restricciones = restricciones or {}
+    config_base = {
+        "horarios_lunes_a_viernes": horarios_lunes_a_viernes,
+        "trabajan_sabado": trabajan_sabado,
+        "horario_sabado": horario_sabado,
+        "horario_viernes": horario_viernes,
+    }
+
+    tareas = []
+    for area in areas:
+        empleados = [e.strip() for e in EMPLEADOS_POR_AREA[area] if e.strip()]
+        config = dict(config_base, **config_por_area.get(area, {}))
+        for year, month in meses:
+            tareas.append((area, empleados, year, month, config, motor, restricciones))
+
+    resultados = {}
+    total = len(tareas)
+    if max_workers is None:
+        max_workers = min(total, os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        for completadas, tarea in enumerate(tareas, start=1):
+            area, year, month, schedule = _programar(*tarea)
+            resultados[(area, year, month)] = schedule
+            if progreso:
+                progreso(completadas, total, area, year, month)
+    else:
+        # Las tablas del calendario se construyen una vez aquí y se comparten con los procesos
+        tablas = CALENDARIO.exportar_tablas(sorted({year for year, _ in meses}))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_inicializar_proceso,
+                                 initargs=(tablas,)) as executor:
+            futuros = [executor.submit(_programar, *tarea) for tarea in tareas]
+            for completadas, futuro in enumerate(as_completed(futuros), start=1):
+                area, year, month, schedule = futuro.result()
+                resultados[(area, year, month)] = schedule
+                if progreso:
+                    progreso(completadas, total, area, year, month)
+
+    return {(area, year, month): resultados[(area, year, month)] for area, _, year, month, *_ in tareas}
+
+
+# Unir los resultados de generar_lote en un solo DataFrame con columnas Área, Año y Mes
+def consolidar_lote(resultados):
+    import pandas as pd
+
+    partes = []
+    for (area, year, month), schedule in resultados.items():
+        df = schedule.a_dataframe()
+        df.insert(0, "Área", area.strip())
+        df.insert(1, "Año", year)
+        df.insert(2, "Mes", month)
+        partes.append(df)
+    if not partes:
+        return pd.DataFrame(columns=["Área", "Año", "Mes", "Empleado", "Fecha", "Turno", "Horas"])
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,178 @@
+"""
+Prueba de carga de la API de registros (api_registros.py). Levanta una instancia local
+en una carpeta temporal (fijada a un solo núcleo cuando el sistema lo permite), abre
+varias conexiones persistentes que envían lotes de horas extra durante un tiempo fijo
+y al final verifica que cada registro confirmado esté en disco una sola vez.
+Termina con error si hubo fallas o si no se alcanzan las solicitudes por segundo pedidas.
+
+Uso:
+    python benchmarks/carga_api.py
+    python benchmarks/carga_api.py --conexiones 64 --segundos 20 --lote 5 --minimo 300
+    python benchmarks/carga_api.py --url http://127.0.0.1:8765   # contra una instancia ya levantada
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(CARPETA)
+sys.path.insert(0, RAIZ)
+
+
+def _lote(conexion, n, tamano):
+    return json.dumps([
+        {
+            "empleado": f"Carga C{conexion}-S{n}-R{i}",
+            "fecha": "2025-07-21",
+            "horas_diurnas": 1,
+            "minutos_no": 30,
+            "area": "TI",
+            "pago": "Nomina",
+        }
+        for i in range(tamano)
+    ]).encode("utf-8")
+
+
+async def _cliente(host, puerto, conexion, hasta, tamano, token, resultados):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    autorizacion = f"Authorization: Bearer {token}\r\n" if token else ""
+    n = 0
+    try:
+        while time.perf_counter() < hasta:
+            cuerpo = _lote(conexion, n, tamano)
+            inicio = time.perf_counter()
+            escritor.write(
+                f"POST /horas-extra HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                f"{autorizacion}Content-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo
+            )
+            await escritor.drain()
+            estado = int((await lector.readline()).split()[1])
+            largo = 0
+            while True:
+                linea = await lector.readline()
+                if linea in (b"\r\n", b""):
+                    break
+                nombre, _, valor = linea.decode("latin-1").partition(":")
+                if nombre.lower() == "content-length":
+                    largo = int(valor)
+            respuesta = json.loads(await lector.readexactly(largo))
+            resultados["latencias"].append(time.perf_counter() - inicio)
+            if estado == 201:
+                resultados["guardados"] += respuesta["guardados"]
+            else:
+                resultados["errores"].append((estado, respuesta))
+            n += 1
+    finally:
+        escritor.close()
+
+
+async def _salud(host, puerto):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    escritor.write(f"GET /salud HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+    respuesta = await lector.read()
+    escritor.close()
+    return json.loads(respuesta.split(b"\r\n\r\n", 1)[1])
+
+
+async def _carga(host, puerto, conexiones, segundos, tamano, token):
+    resultados = {"latencias": [], "guardados": 0, "errores": []}
+    rondas_antes = (await _salud(host, puerto))["rondas"]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(host, puerto, c, inicio + segundos, tamano, token, resultados) for c in range(conexiones)
+    ))
+    resultados["duracion"] = time.perf_counter() - inicio
+    # Rondas de escritura: con group commit son muchas menos que las solicitudes
+    resultados["rondas"] = (await _salud(host, puerto))["rondas"] - rondas_antes
+    return resultados
+
+
+def _contar_lineas(carpeta):
+    total = 0
+    for nombre in ("horas_extra.jsonl", "horas_extra_nocturnas.jsonl"):
+        ruta = os.path.join(carpeta, nombre)
+        if os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                total += sum(1 for linea in f if linea.strip())
+    return total
+
+
+def _iniciar_instancia(carpeta, nucleo):
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, ARCHIVO_LOG_TIEMPOS=os.path.join(carpeta, "tiempos.log"))
+    entorno.pop("API_TOKEN", None)
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "api_registros.py"), "--puerto", "0", "--sin-correo"],
+        cwd=carpeta, env=entorno, stdout=subprocess.PIPE, text=True,
+    )
+    if nucleo is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(proceso.pid, {nucleo})
+    linea = proceso.stdout.readline()  # "Escuchando en http://host:puerto"
+    if not linea:
+        raise RuntimeError("La API no arrancó")
+    return proceso, urlsplit(linea.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--conexiones", type=int, default=32)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--lote", type=int, default=1, help="entradas por solicitud")
+    parser.add_argument("--minimo", type=float, default=200, help="solicitudes por segundo exigidas")
+    parser.add_argument("--nucleo", type=int, default=0, help="núcleo de la instancia local (-1 = sin fijar)")
+    parser.add_argument("--url", help="usar una instancia ya levantada (no verifica los archivos)")
+    parser.add_argument("--token", default=os.getenv("API_TOKEN"))
+    args = parser.parse_args()
+
+    carpeta = None
+    proceso = None
+    if args.url:
+        direccion = urlsplit(args.url)
+    else:
+        carpeta = tempfile.mkdtemp(prefix="carga_api_")
+        proceso, direccion = _iniciar_instancia(carpeta, None if args.nucleo < 0 else args.nucleo)
+        args.token = None
+    try:
+        resultados = asyncio.run(_carga(
+            direccion.hostname, direccion.port, args.conexiones, args.segundos, args.lote, args.token
+        ))
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+    latencias = sorted(resultados["latencias"])
+    solicitudes = len(latencias)
+    por_segundo = solicitudes / resultados["duracion"]
+    print(f"{solicitudes} solicitudes en {resultados['duracion']:.1f} s con {args.conexiones} conexiones")
+    print(f"  {por_segundo:,.0f} solicitudes/s, {resultados['guardados'] / resultados['duracion']:,.0f} registros/s")
+    if latencias:
+        print(f"  latencia p50 {statistics.median(latencias) * 1000:.1f} ms, "
+              f"p95 {latencias[int(0.95 * (solicitudes - 1))] * 1000:.1f} ms, máx {latencias[-1] * 1000:.1f} ms")
+        print(f"  {resultados['rondas']} rondas de escritura ({solicitudes / max(resultados['rondas'], 1):.1f} solicitudes por escritura)")
+
+    fallas = []
+    if resultados["errores"]:
+        fallas.append(f"{len(resultados['errores'])} solicitudes con error (primera: {resultados['errores'][0]})")
+    if carpeta is not None:
+        en_disco = _contar_lineas(carpeta)
+        print(f"  registros en disco: {en_disco} (confirmados: {resultados['guardados']})")
+        if en_disco != resultados["guardados"]:
+            fallas.append(f"en disco hay {en_disco} registros y se confirmaron {resultados['guardados']}")
+        shutil.rmtree(carpeta, ignore_errors=True)
+    if por_segundo < args.minimo:
+        fallas.append(f"{por_segundo:,.0f} solicitudes/s < {args.minimo:,.0f}")
+    if fallas:
+        print("Falló: " + "; ".join(fallas))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
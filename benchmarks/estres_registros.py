@@ -0,0 +1,83 @@
+"""
+Prueba de estrés de las escrituras de registros: varios procesos, cada uno con
+muchos hilos registrando horas extra al mismo tiempo sobre los mismos archivos.
+Al final verifica que no se haya perdido ni duplicado ningún registro.
+
+Uso:
+    python benchmarks/estres_registros.py [--hilos 32] [--registros 50] [--procesos 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _registrar(proceso, hilos, registros_por_hilo):
+    import extras
+
+    barrera = threading.Barrier(hilos)
+
+    def trabajador(hilo):
+        barrera.wait()
+        for i in range(registros_por_hilo):
+            extras.registrar_horas_extra(
+                empleado=f"P{proceso}-H{hilo}-R{i}",
+                fecha="2025-07-21",
+                horas_diurnas=1,
+                horas_nocturnas=1,
+                area="TI",
+                pago="Nomina",
+            )
+
+    trabajadores = [threading.Thread(target=trabajador, args=(h,)) for h in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--registros", type=int, default=50, help="registros por hilo")
+    parser.add_argument("--procesos", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        os.chdir(carpeta)
+        inicio = time.perf_counter()
+        procesos = [Process(target=_registrar, args=(p, args.hilos, args.registros)) for p in range(args.procesos)]
+        for p in procesos:
+            p.start()
+        for p in procesos:
+            p.join()
+        duracion = time.perf_counter() - inicio
+
+        import extras
+        esperados = {
+            f"P{p}-H{h}-R{i}"
+            for p in range(args.procesos) for h in range(args.hilos) for i in range(args.registros)
+        }
+        fallas = 0
+        for archivo in (extras.ARCHIVO_HORAS_EXTRA, extras.ARCHIVO_HORAS_EXTRA_NOCTURNAS):
+            nombres = [r["empleado"] for r in extras.cargar_registros(archivo)]
+            perdidos = len(esperados - set(nombres))
+            duplicados = len(nombres) - len(set(nombres))
+            print(f"{archivo}: {len(nombres)} registros, {perdidos} perdidos, {duplicados} duplicados")
+            fallas += perdidos + duplicados
+        if any(p.exitcode != 0 for p in procesos):
+            print("Algún proceso terminó con error")
+            fallas += 1
+
+    total = len(esperados) * 2
+    print(f"{total} registros en {duracion:.2f} s ({total / duracion:.0f} registros/s)")
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Mediciones de rendimiento de las rutas más usadas: calendario, scheduler, procesamiento
+de turnos, registro de horas extra, PDF y Excel. Compara contra la línea base guardada
+en benchmarks/linea_base.json y marca los escenarios más lentos que la línea base por
+encima del umbral más el ruido medido (la dispersión de las repeticiones). Un escenario
+que parece más lento se vuelve a medir y cuenta el mejor mínimo, así una ráfaga de carga
+de la máquina no se reporta como regresión. La comparación es informativa: solo con
+--estricto termina con error si hay regresiones.
+
+Uso:
+    python benchmarks/suite.py                  # medir y comparar contra la línea base
+    python benchmarks/suite.py --guardar        # medir y guardar como nueva línea base
+    python benchmarks/suite.py --filtro scheduler --umbral 0.5
+    python benchmarks/suite.py --rapido         # sin los escenarios más grandes
+    python benchmarks/suite.py --estricto       # terminar con error si hay regresiones
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(CARPETA))
+
+ARCHIVO_LINEA_BASE = os.path.join(CARPETA, "linea_base.json")
+# Umbral de regresión: fracción de tiempo adicional permitida sobre la línea base
+UMBRAL = 0.25
+# Diferencia mínima (segundos) para considerar una regresión; evita falsos positivos
+# en escenarios de pocos microsegundos
+HOLGURA_ABSOLUTA = 0.002
+# Tiempo mínimo de medición por escenario
+TIEMPO_MINIMO = 0.5
+# Mediciones adicionales de un escenario que parece más lento antes de reportarlo
+MEDICIONES_CONFIRMACION = 2
+# Carpetas temporales creadas por los escenarios, se borran al final
+_temporales = []
+
+HORARIOS = [
+    {"nombre": "7:30 AM - 17:00 PM", "horas": 9.5},
+    {"nombre": "8:00 AM - 17:00 PM", "horas": 9.0},
+    {"nombre": "9:00 AM - 18:00 PM", "horas": 9.0},
+]
+HORARIO_VIERNES = [{"nombre": "7:30 AM - 16:15 PM", "horas": 8.75}]
+HORARIO_SABADO = [{"nombre": "8:00 AM - 13:00 PM", "horas": 5.0}]
+
+
+def _empleados(n):
+    return [f"Empleado {i:05d}" for i in range(n)]
+
+
+def _historial_horas_extra(n):
+    return [
+        {
+            "empleado": f"Empleado {i % 500:05d}",
+            "fecha": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "horas": 1.5,
+            "horas_int": 1,
+            "minutos": 30,
+            "tipo": "diurnas" if i % 2 else "nocturnas",
+            "area": "TI",
+            "pago": "Nomina",
+            "registrado_en": "2025-01-01 00:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+# Cada escenario es (nombre, preparar, grande). preparar() devuelve la función a medir;
+# lo que se hace en preparar no cuenta en el tiempo.
+def _escenarios():
+    import calendar_utils
+    import excel_export
+    import extras
+    import nomina
+    import pdf_utils
+    import reporte_horas_extra
+    import validacion_horas_extra
+    from horizonte_turnos import programar_horizonte
+    from optimizador_turnos import asignar_turnos_optimizados
+    from procesamiento_turnos import procesar_turnos
+    from scheduler import asignar_turnos_con_descanso, asignar_turnos_matriz
+
+    escenarios = []
+
+    def calendario_frio():
+        def medir():
+            calendar_utils.CALENDARIO.limpiar()
+            for year in range(2020, 2036):
+                for month in range(1, 13):
+                    calendar_utils.get_dias_laborales(year, month)
+        return medir
+
+    def calendario_caliente():
+        for year in range(2020, 2036):
+            calendar_utils.get_dias_laborales(year, 1)
+
+        def medir():
+            for year in range(2020, 2036):
+                for month in range(1, 13):
+                    calendar_utils.get_dias_laborales(year, month)
+        return medir
+
+    escenarios.append(("calendario/16_anios_frio", calendario_frio, False))
+    escenarios.append(("calendario/16_anios_caliente", calendario_caliente, False))
+
+    for n in (5, 25, 500, 5000):
+        for sabado in (False, True):
+            def preparar(n=n, sabado=sabado):
+                empleados = _empleados(n)
+                return lambda: asignar_turnos_con_descanso(
+                    empleados, 2025, 7, HORARIOS, sabado, HORARIO_SABADO, HORARIO_VIERNES
+                )
+            nombre = f"scheduler/con_descanso_{n}{'_sabados' if sabado else ''}"
+            escenarios.append((nombre, preparar, n >= 5000))
+
+    # Un año programado semana por semana, consumiendo el generador completo
+    for n in (25, 500):
+        def preparar(n=n):
+            empleados = _empleados(n)
+            return lambda: sum(1 for _ in programar_horizonte(
+                empleados, date(2025, 7, 1), date(2026, 6, 30), HORARIOS, True, HORARIO_SABADO, HORARIO_VIERNES
+            ))
+        escenarios.append((f"horizonte/anio_{n}_sabados", preparar, False))
+
+    for n in (25, 500):
+        def preparar(n=n):
+            empleados = _empleados(n)
+            return lambda: asignar_turnos_optimizados(
+                empleados, 2025, 7, HORARIOS, True, HORARIO_SABADO, HORARIO_VIERNES,
+                cobertura_minima={h["nombre"]: n // 4 for h in HORARIOS}, max_horas_semana=44,
+            )
+        escenarios.append((f"optimizador/{n}_sabados", preparar, False))
+
+    # Post-proceso de la pestaña Turnos (antes dentro de app.main)
+    for n in (25, 500, 5000):
+        def preparar(n=n):
+            empleados = _empleados(n)
+            schedule = asignar_turnos_matriz(empleados, 2025, 7, HORARIOS, True, HORARIO_SABADO, HORARIO_VIERNES)
+            vacaciones = {e: (date(2025, 7, 7), date(2025, 7, 18)) for e in empleados[::10]}
+            dias_familia = {e: date(2025, 7, 4) for e in empleados[1::10]}
+            return lambda: procesar_turnos(schedule, dias_familia=dias_familia, vacaciones=vacaciones)
+        escenarios.append((f"procesamiento/{n}", preparar, n >= 5000))
+
+    # Registrar horas extra sobre un historial existente (en una carpeta temporal)
+    for n in (1000, 100000):
+        def preparar(n=n):
+            carpeta = tempfile.mkdtemp(prefix="bench_registros_")
+            _temporales.append(carpeta)
+            os.chdir(carpeta)
+            historial = _historial_horas_extra(n)
+            extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA, historial[::2])
+            extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA_NOCTURNAS, historial[1::2])
+            return lambda: extras.registrar_horas_extra(
+                "Empleado 00001", "2025-07-21", horas_nocturnas=1, horas_diurnas=2, area="TI", pago="Nomina"
+            )
+        escenarios.append((f"registros/registrar_horas_extra_historial_{n}", preparar, n >= 100000))
+
+    # Liquidación del mes desde los acumulados y recálculo completo (correcciones)
+    def historial_nomina(n):
+        carpeta = tempfile.mkdtemp(prefix="bench_nomina_")
+        _temporales.append(carpeta)
+        os.chdir(carpeta)
+        historial = _historial_horas_extra(n)
+        extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA, historial[::2])
+        extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA_NOCTURNAS, historial[1::2])
+        nomina.recalcular()
+
+    def reporte_mensual():
+        historial_nomina(100000)
+        return lambda: nomina.reporte_mensual("2025-07")
+    escenarios.append(("nomina/reporte_mensual_historial_100000", reporte_mensual, False))
+
+    def recalcular():
+        historial_nomina(100000)
+        return nomina.recalcular
+    escenarios.append(("nomina/recalcular_100000", recalcular, True))
+
+    # Validación de horas extra contra los turnos de julio y el historial: un registro
+    # con el índice ya cargado y la auditoría completa del mes
+    def historial_validacion(n):
+        carpeta = tempfile.mkdtemp(prefix="bench_validacion_")
+        _temporales.append(carpeta)
+        os.chdir(carpeta)
+        historial = _historial_horas_extra(n)
+        extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA, historial[::2])
+        extras.almacen.agregar_registros(extras.ARCHIVO_HORAS_EXTRA_NOCTURNAS, historial[1::2])
+        turnos = [
+            {"Empleado": e, "Fecha": f"2025-07-{d:02d}", "Turno": "DESCANSO" if d % 7 == 5 else HORARIOS[0]["nombre"]}
+            for e in _empleados(500) for d in range(1, 32)
+        ]
+        with open("turnos_2025-07.json", "w", encoding="utf-8") as f:
+            json.dump({"programaciones": [{"area": "TI", "year": 2025, "month": 7, "turnos": turnos}]}, f)
+
+    def revisar_registro():
+        historial_validacion(100000)
+        indice = validacion_horas_extra.IndiceHorasExtra()
+        indice.ponerse_al_dia(meses={"2025-07"})
+        registros = extras.construir_registros_horas_extra([
+            {"empleado": "Empleado 00001", "fecha": "2025-07-21", "horas_diurnas": 2, "horas_nocturnas": 1,
+             "area": "TI", "pago": "Nomina", "hora_inicio_di": "17:00"},
+        ])
+        return lambda: indice.revisar(registros)
+    escenarios.append(("validacion/revisar_registro_historial_100000", revisar_registro, False))
+
+    def auditar_mes():
+        historial_validacion(100000)
+        return lambda: validacion_horas_extra.auditar_mes("2025-07")
+    escenarios.append(("validacion/auditar_mes_historial_100000", auditar_mes, False))
+
+    def cartas_permiso():
+        registros = [
+            {"nombre": f"Empleado {i}", "fecha": "2025-07-21", "tipo": "Medio dia", "pe_motivo": ""}
+            for i in range(100)
+        ]
+        return lambda: pdf_utils.generar_pdfs_permiso(registros)
+    escenarios.append(("pdf/100_cartas_permiso", cartas_permiso, False))
+
+    def pdf_historial():
+        registros = _historial_horas_extra(10000)
+        return lambda: reporte_horas_extra.exportar_pdf_horas_extra(io.BytesIO(), registros=registros)
+    escenarios.append(("pdf/historial_10000", pdf_historial, False))
+
+    def excel_turnos():
+        schedule = asignar_turnos_matriz(_empleados(500), 2025, 7, HORARIOS, True, HORARIO_SABADO, HORARIO_VIERNES)
+        df = procesar_turnos(schedule)
+        return lambda: excel_export.exportar_turnos_excel(io.BytesIO(), [("Turnos", df)])
+    escenarios.append(("excel/turnos_500", excel_turnos, False))
+
+    def excel_horas_extra():
+        registros = _historial_horas_extra(10000)
+        return lambda: excel_export.exportar_horas_extra_excel(io.BytesIO(), registros, "mes")
+    escenarios.append(("excel/horas_extra_10000", excel_horas_extra, False))
+
+    return escenarios
+
+
+# Ruido de una medición: cuánto se aleja la mediana del mínimo, como fracción del mínimo
+def _ruido(resultado):
+    return resultado["mediana"] / resultado["minimo"] - 1
+
+
+# Cambio del mínimo respecto a la línea base y si supera el umbral más el ruido de ambas
+# mediciones (y la holgura absoluta)
+def _comparar(resultado, base, umbral):
+    cambio = resultado["minimo"] / base["minimo"] - 1
+    tolerancia = umbral + max(_ruido(resultado), _ruido(base))
+    return cambio, cambio > tolerancia and resultado["minimo"] - base["minimo"] > HOLGURA_ABSOLUTA
+
+
+# Mediana y mínimo de varias repeticiones (al menos 3 y hasta completar TIEMPO_MINIMO)
+def medir(funcion):
+    tiempos = []
+    inicio = time.perf_counter()
+    while len(tiempos) < 3 or (time.perf_counter() - inicio < TIEMPO_MINIMO and len(tiempos) < 1000):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    return {"mediana": statistics.median(tiempos), "minimo": min(tiempos), "repeticiones": len(tiempos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--guardar", action="store_true", help="guardar los resultados como línea base")
+    parser.add_argument("--filtro", default="", help="solo escenarios cuyo nombre contiene este texto")
+    parser.add_argument("--umbral", type=float, default=UMBRAL, help="fracción de regresión permitida")
+    parser.add_argument("--rapido", action="store_true", help="omitir los escenarios más grandes")
+    parser.add_argument("--estricto", action="store_true", help="terminar con error si hay regresiones")
+    parser.add_argument("--linea-base", default=ARCHIVO_LINEA_BASE)
+    args = parser.parse_args()
+
+    linea_base = {}
+    if os.path.exists(args.linea_base):
+        with open(args.linea_base, "r", encoding="utf-8") as f:
+            linea_base = json.load(f).get("escenarios", {})
+
+    carpeta_original = os.getcwd()
+    resultados = {}
+    regresiones = []
+    for nombre, preparar, grande in _escenarios():
+        if args.filtro not in nombre or (args.rapido and grande):
+            continue
+        base = linea_base.get(nombre)
+        try:
+            funcion = preparar()
+            resultado = medir(funcion)
+            # Se compara el mínimo, que varía menos que la mediana con la carga de la máquina;
+            # si parece una regresión se mide otra vez y queda el mejor mínimo
+            for _ in range(MEDICIONES_CONFIRMACION if base and not args.guardar else 0):
+                if not _comparar(resultado, base, args.umbral)[1]:
+                    break
+                otra = medir(funcion)
+                if otra["minimo"] < resultado["minimo"]:
+                    resultado = otra
+        finally:
+            os.chdir(carpeta_original)
+        resultados[nombre] = resultado
+
+        comparacion = ""
+        if base:
+            cambio, regresion = _comparar(resultado, base, args.umbral)
+            comparacion = f"{cambio:+.0%} vs línea base (ruido {max(_ruido(resultado), _ruido(base)):.0%})"
+            if regresion:
+                regresiones.append(nombre)
+                comparacion += "  REGRESIÓN"
+        print(f"{nombre:55s} {resultado['mediana'] * 1000:10.2f} ms  (n={resultado['repeticiones']})  {comparacion}")
+
+    for carpeta in _temporales:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    if args.guardar:
+        # Se conservan los escenarios que no se midieron en esta ejecución
+        linea_base.update(resultados)
+        with open(args.linea_base, "w", encoding="utf-8") as f:
+            json.dump({
+                "maquina": {"python": platform.python_version(), "sistema": platform.platform(), "procesador": platform.machine()},
+                "escenarios": dict(sorted(linea_base.items())),
+            }, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Línea base guardada en {args.linea_base}")
+    elif regresiones:
+        print(f"{len(regresiones)} escenario(s) por encima del umbral de {args.umbral:.0%} más el ruido: {', '.join(regresiones)}")
+        if args.estricto:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Presupuesto de tiempo de importación. Importa cada módulo de entrada en un proceso
+nuevo (como al arrancar Streamlit) y termina con error si tarda más que su presupuesto
+o si al importarlo se cargan dependencias pesadas que solo deben cargarse al usarlas
+(fpdf, yagmail, workalendar, xlsxwriter, pandas).
+
+Uso:
+    python benchmarks/tiempo_importacion.py
+    python benchmarks/tiempo_importacion.py --repeticiones 10 --factor 1.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(CARPETA)
+
+# Módulo -> presupuesto en milisegundos (el mínimo de varias repeticiones)
+PRESUPUESTOS = {
+    "app": 700,
+    "scheduler": 250,
+    "extras": 100,
+    "cache_app": 600,
+    "programacion": 300,
+}
+# Dependencias que ningún módulo de entrada debe cargar al importarse
+PESADAS = ("fpdf", "yagmail", "workalendar", "xlsxwriter", "pandas")
+
+_MEDIR = """
+import json, sys, time
+inicio = time.perf_counter()
+import {modulo}
+print(json.dumps({{"ms": (time.perf_counter() - inicio) * 1000, "modulos": sorted(sys.modules)}}))
+"""
+
+
+def medir(modulo):
+    salida = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", _MEDIR.format(modulo=modulo)],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--factor", type=float, default=1.0,
+                        help="multiplicar los presupuestos (para máquinas más lentas)")
+    args = parser.parse_args()
+
+    fallas = []
+    for modulo, presupuesto in PRESUPUESTOS.items():
+        mediciones = [medir(modulo) for _ in range(args.repeticiones)]
+        ms = min(m["ms"] for m in mediciones)
+        cargadas = sorted({p for p in PESADAS for m in mediciones[0]["modulos"] if m == p or m.startswith(p + ".")})
+        limite = presupuesto * args.factor
+        estado = "ok"
+        if ms > limite:
+            estado = "LENTO"
+            fallas.append(f"{modulo}: {ms:.0f} ms > {limite:.0f} ms")
+        if cargadas:
+            estado = "CARGA " + ", ".join(cargadas)
+            fallas.append(f"{modulo} importa {', '.join(cargadas)}")
+        print(f"{modulo:15s} {ms:8.1f} ms  (presupuesto {limite:.0f} ms)  {estado}")
+
+    if fallas:
+        print("Fuera de presupuesto: " + "; ".join(fallas))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import hashlib
+import json
+import tempfile
+
+import streamlit as st
+
+from configuracion import entorno
+from excel_export import exportar_turnos_excel
+from programacion import programar
+
+# Caché de la aplicación: la misma programación pedida otra vez (otro coordinador,
+# otra recarga de la página o una nueva descarga) se toma de la caché en lugar de
+# recalcularse. La caché es compartida entre sesiones, tiene un número máximo de
+# entradas y cada entrada vence después de CACHE_TTL_SEGUNDOS.
+CACHE_MAX_ENTRADAS = int(entorno("CACHE_MAX_ENTRADAS", "64"))
+CACHE_TTL_SEGUNDOS = int(entorno("CACHE_TTL_SEGUNDOS", "3600"))
+
+
+def clave_programacion(entradas):
+    """
+    Huella (SHA-256) del contenido de una solicitud de programación: empleados, año, mes,
+    horarios y, si se incluyen, novedades. Dos solicitudes con los mismos datos tienen la
+    misma clave.
+
+    Args:
+        entradas (dict): Parámetros de asignar_turnos_matriz y, opcionalmente, de procesar_turnos.
+
+    Returns:
+        str: Clave en hexadecimal.
+    """
+    texto = json.dumps(entradas, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# Programación base (rotación y descansos, sin novedades). Los parámetros que empiezan
+# con "_" no los revisa Streamlit; la caché se indexa solo por la clave, que ya resume
+# todo el contenido.
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL_SEGUNDOS, show_spinner=False)
+def schedule_cacheado(clave, _entradas):
+    return programar(_entradas)
+
+
+# Excel de una programación ya generada, indexado por la misma clave
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, ttl=CACHE_TTL_SEGUNDOS, show_spinner=False)
+def excel_turnos_cacheado(clave, _df, sheet_name):
+    with tempfile.TemporaryFile() as archivo:
+        exportar_turnos_excel(archivo, [(sheet_name, _df)])
+        archivo.seek(0)
+        return archivo.read()
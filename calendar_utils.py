@@ -1,18 +1,122 @@
-from workalendar.america import Colombia
 from datetime import date, timedelta
+from collections import OrderedDict
+from threading import Lock
+from instrumentacion import medir
+
+# Máximo de años que se mantienen en memoria al tiempo
+MAX_ANIOS_EN_CACHE = 16
+
+
+# Tabla de días laborales de un año: un byte por día del año (1 = laboral).
+# Se consideran laborales los días hábiles de Colombia y todos los sábados.
+class TablaAnual:
+    def __init__(self, year, bitmap):
+        self.year = year
+        self.inicio = date(year, 1, 1)
+        self.bitmap = bitmap
+        # Días laborales por mes, calculados una sola vez
+        self.dias_por_mes = [()] * 13
+        for month in range(1, 13):
+            primero = date(year, month, 1).toordinal() - self.inicio.toordinal()
+            ultimo = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)).toordinal() - self.inicio.toordinal()
+            self.dias_por_mes[month] = tuple(
+                self.inicio + timedelta(days=i) for i in range(primero, ultimo) if bitmap[i]
+            )
+
+    def es_laboral(self, dia):
+        return bool(self.bitmap[dia.toordinal() - self.inicio.toordinal()])
+
+
+# Servicio de calendario: construye la tabla de cada año la primera vez que se
+# consulta y la guarda en un caché con desalojo del año menos usado.
+class CalendarioLaboral:
+    def __init__(self, max_anios=MAX_ANIOS_EN_CACHE):
+        self.max_anios = max_anios
+        self._tablas = OrderedDict()
+        self._cal = None
+        self._lock = Lock()
+
+    def _construir(self, year):
+        if self._cal is None:
+            # workalendar se importa solo cuando hay que construir la tabla de un año
+            from workalendar.america import Colombia
+
+            self._cal = Colombia()
+        festivos = {d for d, _ in self._cal.holidays(year)}
+        inicio = date(year, 1, 1)
+        total = (date(year + 1, 1, 1) - inicio).days
+        bitmap = bytearray(total)
+        for i in range(total):
+            dia = inicio + timedelta(days=i)
+            semana = dia.weekday()
+            # Lunes a viernes no festivo, o sábado (aunque sea festivo)
+            if semana == 5 or (semana < 5 and dia not in festivos):
+                bitmap[i] = 1
+        return TablaAnual(year, bytes(bitmap))
+
+    def tabla(self, year):
+        with self._lock:
+            tabla = self._tablas.get(year)
+            if tabla is not None:
+                self._tablas.move_to_end(year)
+                return tabla
+            with medir("calendario.construir_anio", year=year):
+                tabla = self._construir(year)
+            self._tablas[year] = tabla
+            while len(self._tablas) > self.max_anios:
+                self._tablas.popitem(last=False)
+            return tabla
+
+    def es_dia_laboral(self, dia):
+        return self.tabla(dia.year).es_laboral(dia)
+
+    def dias_laborales_mes(self, year, month):
+        return self.tabla(year).dias_por_mes[month]
+
+    def dias_laborales_rango(self, inicio, fin):
+        dias = []
+        for year in range(inicio.year, fin.year + 1):
+            tabla = self.tabla(year)
+            desde = max(inicio, tabla.inicio)
+            hasta = min(fin, date(year, 12, 31))
+            base = tabla.inicio.toordinal()
+            for i in range(desde.toordinal() - base, hasta.toordinal() - base + 1):
+                if tabla.bitmap[i]:
+                    dias.append(tabla.inicio + timedelta(days=i))
+        return dias
+
+    # Tablas ya construidas de varios años, para compartirlas con otros procesos
+    def exportar_tablas(self, years):
+        return {year: self.tabla(year) for year in years}
+
+    # Cargar tablas construidas en otro proceso (ver exportar_tablas)
+    def cargar_tablas(self, tablas):
+        with self._lock:
+            for year, tabla in tablas.items():
+                self._tablas[year] = tabla
+                self._tablas.move_to_end(year)
+            while len(self._tablas) > self.max_anios:
+                self._tablas.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._tablas.clear()
+
+
+# Instancia compartida por todo el proceso
+CALENDARIO = CalendarioLaboral()
+
+
+# Consultar si una fecha es laboral (días hábiles y sábados)
+def es_dia_laboral(dia):
+    return CALENDARIO.es_dia_laboral(dia)
+
+
+# Obtener los días laborales entre dos fechas (ambas incluidas)
+def get_dias_laborales_rango(inicio, fin):
+    return CALENDARIO.dias_laborales_rango(inicio, fin)
+
+
 # obtener los días laborales de un mes específico en Colombia
 def get_dias_laborales(year, month):
-    cal = Colombia()
-    dias_laborales = []
-    dia = date(year, month, 1)
-
-    while dia.month == month:
-       
-        if cal.is_working_day(dia):
-            dias_laborales.append(dia)
-       
-        elif dia.weekday() == 5: 
-            dias_laborales.append(dia)
-        dia += timedelta(days=1)
-
-    return dias_laborales
\ No newline at end of file
+    return list(CALENDARIO.dias_laborales_mes(year, month))
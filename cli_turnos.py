@@ -0,0 +1,125 @@
+"""
+Programación de turnos desde la línea de comandos, sin Streamlit: genera los turnos de
+varias áreas y meses, aplica las novedades de un archivo JSON (vacaciones, días de la
+familia y descansos manuales) y escribe los resultados en Excel, PDF y JSON. Pensado
+para tareas programadas (cron) que dejan lista la programación del mes siguiente.
+
+Uso:
+    python cli_turnos.py --horarios "7:30 AM - 17:00 PM" "8:00 AM - 17:00 PM"
+    python cli_turnos.py --desde 2025-07 --hasta 2025-09 --areas TI Compras \\
+        --horarios "8:00 AM - 17:00 PM" --viernes "7:30 AM - 16:15 PM" \\
+        --sabado "8:00 AM - 13:00 PM" --novedades novedades.json --salida salidas
+    python cli_turnos.py --mes-siguiente --horarios "8:00 AM - 17:00 PM" --formatos excel json
+    python cli_turnos.py --listar
+"""
+import argparse
+import sys
+import time
+from datetime import date
+
+# Los módulos de la programación (numpy, pandas, ...) se importan en main, después de
+# leer los argumentos: --help y los errores de uso responden sin cargarlos.
+
+
+def _mes(texto):
+    try:
+        year, month = (int(p) for p in texto.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mes inválido: {texto!r} (se espera AAAA-MM)") from None
+    return year, month
+
+
+def _mes_siguiente(hoy):
+    return (hoy.year + 1, 1) if hoy.month == 12 else (hoy.year, hoy.month + 1)
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--desde", type=_mes, help="primer mes (AAAA-MM); por defecto, el mes actual")
+    parser.add_argument("--hasta", type=_mes, help="último mes (AAAA-MM); por defecto, igual a --desde")
+    parser.add_argument("--mes-siguiente", action="store_true", help="programar el mes siguiente (para cron)")
+    parser.add_argument("--areas", nargs="+", help="áreas a programar; por defecto, todas")
+    parser.add_argument("--horarios", nargs="+", default=[], help="horarios de lunes a jueves (rotan cada semana)")
+    parser.add_argument("--viernes", nargs="+", default=[], help="horarios del viernes")
+    parser.add_argument("--sabado", nargs="+", default=[], help="horarios del sábado (implica que trabajan sábados)")
+    parser.add_argument("--motor", default="rotacion", choices=["rotacion", "optimizador"])
+    parser.add_argument("--max-horas-semana", type=float, help="solo con --motor optimizador")
+    parser.add_argument("--novedades", help="archivo JSON con vacaciones, días de la familia y descansos")
+    parser.add_argument("--salida", default=".", help="carpeta de salida")
+    parser.add_argument("--nombre", help="nombre de los archivos (sin extensión); por defecto, turnos_<desde>_<hasta>")
+    parser.add_argument("--formatos", nargs="+", default=["excel", "pdf", "json"], choices=["excel", "pdf", "json"])
+    parser.add_argument("--procesos", type=int, default=1, help="procesos en paralelo (1 = en este proceso)")
+    parser.add_argument("--listar", action="store_true", help="mostrar las áreas y los horarios disponibles")
+    parser.add_argument("-q", "--silencioso", action="store_true", help="no mostrar el resumen")
+    args = parser.parse_args(argv)
+
+    if args.mes_siguiente and args.desde:
+        parser.error("--mes-siguiente y --desde no se pueden usar juntos")
+    if not args.listar and not args.horarios:
+        parser.error("se necesita al menos un horario de lunes a jueves (--horarios)")
+    if args.max_horas_semana is not None and args.motor != "optimizador":
+        parser.error("--max-horas-semana solo aplica con --motor optimizador")
+    hoy = date.today()
+    if args.mes_siguiente:
+        args.desde = _mes_siguiente(hoy)
+    args.desde = args.desde or (hoy.year, hoy.month)
+    args.hasta = args.hasta or args.desde
+    return args
+
+
+def main(argv=None):
+    args = _argumentos(argv)
+    inicio = time.perf_counter()
+
+    import programacion
+    from empleados import EMPLEADOS_POR_AREA
+
+    if args.listar:
+        print("Áreas:")
+        for area, empleados in EMPLEADOS_POR_AREA.items():
+            print(f"  {area} ({len(empleados)} empleados)")
+        print("Horarios:")
+        for horario in programacion.HORARIOS_PREDEFINIDOS:
+            print(f"  {horario['nombre']} ({horario['horas']} h)")
+        return 0
+
+    try:
+        novedades = programacion.cargar_novedades(args.novedades) if args.novedades else None
+        restricciones = {}
+        if args.max_horas_semana is not None:
+            restricciones["max_horas_semana"] = args.max_horas_semana
+        resultados = programacion.generar(
+            args.desde, args.hasta,
+            programacion.horarios_por_nombre(args.horarios),
+            trabajan_sabado=bool(args.sabado),
+            horario_sabado=programacion.horarios_por_nombre(args.sabado),
+            horario_viernes=programacion.horarios_por_nombre(args.viernes),
+            areas=args.areas,
+            motor=args.motor,
+            restricciones=restricciones,
+            max_workers=args.procesos,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    desde = f"{args.desde[0]}-{args.desde[1]:02d}"
+    hasta = f"{args.hasta[0]}-{args.hasta[1]:02d}"
+    nombre = args.nombre or (f"turnos_{desde}" if desde == hasta else f"turnos_{desde}_{hasta}")
+    hojas = programacion.tablas(resultados, novedades)
+    rutas = programacion.exportar(
+        resultados, hojas, args.salida, nombre, args.formatos, subtitulo=f"Desde: {desde}  Hasta: {hasta}"
+    )
+
+    if not args.silencioso:
+        turnos = sum(len(df) for _, df in hojas)
+        print(f"{len(resultados)} programaciones (área y mes), {turnos} turnos "
+              f"en {time.perf_counter() - inicio:.2f} s")
+        for ruta in rutas:
+            print(f"  {ruta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
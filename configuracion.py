@@ -0,0 +1,30 @@
+import os
+from functools import lru_cache
+
+# Configuración por variables de entorno. El archivo .env se lee una sola vez por
+# proceso, la primera vez que algún módulo consulta una variable; así el orden en que
+# se importan los módulos no cambia qué valores ven.
+
+# Archivos (colecciones) de registros. Están aquí y no en extras para que el
+# repositorio de registros los conozca sin importar el módulo que lo usa.
+ARCHIVO_HORAS_EXTRA = "horas_extra.json"
+ARCHIVO_HORAS_EXTRA_NOCTURNAS = "horas_extra_nocturnas.json"
+ARCHIVO_DIA_FAMILIA = "dia_familia.json"
+ARCHIVO_PERMISOS = "permisos.json"
+ARCHIVO_VACACIONES = "vacaciones.json"
+ARCHIVOS_REGISTROS = (
+    ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS, ARCHIVO_DIA_FAMILIA, ARCHIVO_PERMISOS, ARCHIVO_VACACIONES,
+)
+
+
+@lru_cache(maxsize=1)
+def cargar_entorno():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+# Valor de una variable de entorno (o del .env), como os.getenv
+def entorno(nombre, defecto=None):
+    cargar_entorno()
+    return os.getenv(nombre, defecto)
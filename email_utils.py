@@ -1,42 +1,28 @@
+from bandeja_correo import encolar_correo, notificar
+from configuracion import entorno
+from plantillas_correo import NOTIFICACION_HORAS_EXTRA, NOTIFICACION_DIA_FAMILIA, NOTIFICACION_INCAPACIDAD
 
-import yagmail
-import os
-from dotenv import load_dotenv
-
-# Cargar variables del archivo .env
-load_dotenv()
-
-EMAIL = os.getenv("EMAIL")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+EMAIL = entorno("EMAIL")
+EMAIL_PASSWORD = entorno("EMAIL_PASSWORD")
 
 # enviar correos electrónicos de notificación horas extra
 def enviar_correo_extra(nombre_empleado, fecha, horas, email_jefe):
-    yag = yagmail.SMTP(EMAIL, EMAIL_PASSWORD)
     asunto = f"Horas extra - {nombre_empleado}"
-    cuerpo = f"""<h3>Registro de horas extra</h3>
-    <p>Empleado: <b>{nombre_empleado}</b><br>
-    Fecha: <b>{fecha}</b><br>
-    Horas: <b>{horas}</b></p>"""
-    yag.send(to=email_jefe, subject=asunto, contents=cuerpo)
+    cuerpo = NOTIFICACION_HORAS_EXTRA.render(nombre=nombre_empleado, fecha=fecha, horas=horas)
+    notificar("email_utils", email_jefe, asunto, cuerpo)
 
 # enviar correos electrónicos de notificación de día de la familia
 def enviar_correo_familia(nombre_empleado, fecha, email_jefe):
-    yag = yagmail.SMTP(EMAIL, EMAIL_PASSWORD)
     asunto = f"Día de la Familia - {nombre_empleado}"
-    cuerpo = f"""<h3>Solicitud de Día de la Familia</h3>
-    <p>Empleado: <b>{nombre_empleado}</b><br>
-    Fecha: <b>{fecha}</b></p>"""
-    yag.send(to=email_jefe, subject=asunto, contents=cuerpo)
+    cuerpo = NOTIFICACION_DIA_FAMILIA.render(nombre=nombre_empleado, fecha=fecha)
+    notificar("email_utils", email_jefe, asunto, cuerpo)
 
+# La incapacidad lleva adjunto, por eso no se agrupa en el resumen
 def enviar_correo_incapacidad(archivo, destinatario, nombre, fecha, area_pe):
-    yag = yagmail.SMTP(EMAIL, EMAIL_PASSWORD)
     asunto = f"Incapacidad - {nombre}"
-    cuerpo = f"""<h3>Incapacidad registrada</h3>
-    <p>Empleado: <b>{nombre}</b><br>
-    Fecha: <b>{fecha}</b><br>
-    Área Personal: <b>{area_pe}</b></p>"""
+    cuerpo = NOTIFICACION_INCAPACIDAD.render(nombre=nombre, fecha=fecha, area_pe=area_pe)
     
     if archivo:
-        yag.send(to=destinatario, subject=asunto, contents=[cuerpo, archivo])
+        encolar_correo("email_utils", destinatario, asunto, cuerpo, adjuntos=[archivo])
     else:
-        yag.send(to=destinatario, subject=asunto, contents=cuerpo)
+        encolar_correo("email_utils", destinatario, asunto, cuerpo)
@@ -1,41 +1,124 @@
-EMPLEADOS_POR_AREA = {
-    "PICKING - CEDI": [
-        "Luis David", "Cristian Ramirez", "Jhonatan Gonzalez",
-        "Cristian Acevedo", "Sebastian Chanci", "Julian Londoño"
-    ],
-    "INVENTARIOS - CEDI":[
-        "MATEO USUGA","LEIDY BORJA","ALDER"
-    ],
-    "RECEPCIÓN":[
-        "MATEO HENAO","ELKIN CHARRIS","ADREX HIGUITA","DANIEL TILANO"
-    ],
-    " FACTURACIÓN":[
-        "ALEJANDRA HOYOS"
-    ],
-    "LOGÍSTICA":[
-        "ENRIQUE TOBON","JUAN DAVID GRACIANO","ELKIN RAMIREZ"
-    ],
-
-    "COMPRAS": [
-        "STEFANY JIMENEZ PATIÑO", "KELLY JOHANA SALGADO SALGADO ", "JUAN CAMILO GOMEZ RAMIREZ",
-        "GERLEIN ESCOBAR ACEVEDO", "YOHALIZETH CAROLINA MARTINEZ GUTIERREZ "
-    ],
-    "VENTAS": [
-        "Bryan castaño", "wilder correa", "Juan Carlos caldera", "Lizeth Sáez", " Ana villa",
-        "Johan Castro", "Andrés Fernández", "brahiam zapata", "Jhonatan Castañeda", "Víctor",
-        "Jorge Jaramillo", "Edgar Henao ", "Julián Giraldo", "Alejandra  rojas", "Alejandra  rojas",
-        "leídy arboleda", "Juan Camilo villa", "eliana cano", "Valeria Pérez", "Miryam Arango",
-        "Alejandro Bermúdez", "Cristina luna", "elkin Restrepo", "lina maria Vásquez", "Kevin Higuita"
-    ],
-    "CARTERA": [
-        "YESHENIA FERNANDEZ HERNANDEZ", "LINA MARCELA CARDENAS LONDOÑO", "ALEJANDRA MARIN ZAPATA",
-        "LEYDI JOHANA ARBOLEDA PALACIOS", "RUBY ELENA TANGARIFE HENAO ",
-        "MIRYAM DE LAS MISERICORDIAS ARANGO LOPEZ ", "ELIANA ANDREA CANO BARRERA "
-    ],
-    "MARKETING": ["DIANA CRISTINA LUNA MUÑOZ", "DEIBY JOSE OYOLA MERCADO"],
-    "MENSAJERIA": ["Jorge Salazar"],
-    "JURIDICA": ["CRISTIAN DAVID GARCIA GARCIA"],
-    "GESTION HUMANA": ["Laura Sánchez"],
-    "SST": ["JENNIFFER ANDREA RIVERA ACEVEDO"],
-    "TI": ["Sebastián Villada", "Jhonatan Arroyave", "Camilo Gómez"]
-}
+import json
+import os
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+from configuracion import entorno
+
+# Directorio de empleados. Se carga una sola vez por proceso desde ARCHIVO_EMPLEADOS,
+# una lista de {"id", "nombre", "area"}; el id es estable (no cambia si el empleado se
+# renombra o cambia de área) y los empleados nuevos se agregan con el siguiente id.
+#
+# Los nombres se indexan normalizados (sin tildes, sin mayúsculas y con un solo espacio
+# entre palabras), así "SEBASTIAN " y "Sebastián" son el mismo empleado. Para autocompletar
+# hay un trie con el comienzo de cada palabra del nombre.
+_CARPETA_MODULO = os.path.dirname(os.path.abspath(__file__))
+ARCHIVO_EMPLEADOS = entorno("ARCHIVO_EMPLEADOS", os.path.join(_CARPETA_MODULO, "empleados.json"))
+# Sugerencias que guarda cada nodo del trie (y máximo que devuelve autocompletar)
+MAX_SUGERENCIAS = 10
+
+Empleado = namedtuple("Empleado", ["id", "nombre", "area"])
+
+
+# Clave de búsqueda de un nombre: sin tildes, en minúsculas y sin espacios repetidos
+def normalizar_nombre(nombre):
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFKD", str(nombre)) if not unicodedata.combining(c)
+    )
+    return " ".join(sin_tildes.casefold().split())
+
+
+class _NodoTrie:
+    __slots__ = ("hijos", "ids")
+
+    def __init__(self):
+        self.hijos = {}
+        self.ids = []
+
+
+class DirectorioEmpleados:
+    """
+    Índices del directorio: por id, por nombre normalizado, por área y un trie de
+    prefijos. Las consultas cuestan O(1) o O(largo del texto buscado).
+
+    Args:
+        empleados (iterable): Diccionarios con "id", "nombre" y "area".
+    """
+
+    def __init__(self, empleados):
+        self.por_id = {}
+        self.por_nombre = {}
+        self.por_area = {}
+        self._trie = _NodoTrie()
+        for datos in empleados:
+            empleado = Empleado(str(datos["id"]), " ".join(datos["nombre"].split()), " ".join(datos["area"].split()))
+            if empleado.id in self.por_id:
+                raise ValueError(f"Id de empleado repetido: {empleado.id}")
+            self.por_id[empleado.id] = empleado
+            clave = normalizar_nombre(empleado.nombre)
+            # Con nombres iguales en dos áreas, la búsqueda por nombre devuelve el primero
+            self.por_nombre.setdefault(clave, empleado)
+            self.por_area.setdefault(empleado.area, []).append(empleado)
+            self._indexar_prefijos(clave, empleado.id)
+
+    # Cada palabra del nombre es un punto de partida: "villa" sugiere a "Ana villa"
+    def _indexar_prefijos(self, clave, id_empleado):
+        inicio = 0
+        while inicio >= 0:
+            nodo = self._trie
+            for caracter in clave[inicio:]:
+                nodo = nodo.hijos.setdefault(caracter, _NodoTrie())
+                if len(nodo.ids) < MAX_SUGERENCIAS and id_empleado not in nodo.ids:
+                    nodo.ids.append(id_empleado)
+            siguiente = clave.find(" ", inicio)
+            inicio = siguiente + 1 if siguiente >= 0 else -1
+
+    def buscar(self, nombre):
+        """
+        Empleado con ese nombre, sin importar tildes, mayúsculas ni espacios.
+
+        Returns:
+            Empleado: O None si el nombre no está en el directorio.
+        """
+        return self.por_nombre.get(normalizar_nombre(nombre))
+
+    # Área de un empleado por su nombre (None si no está en el directorio)
+    def area_de(self, nombre):
+        empleado = self.buscar(nombre)
+        return empleado.area if empleado is not None else None
+
+    def autocompletar(self, prefijo, limite=MAX_SUGERENCIAS):
+        """
+        Empleados cuyo nombre, o alguna de sus palabras, empieza por `prefijo`.
+
+        Returns:
+            list: Hasta `limite` empleados, en el orden del directorio.
+        """
+        clave = normalizar_nombre(prefijo)
+        if not clave:
+            return []
+        nodo = self._trie
+        for caracter in clave:
+            nodo = nodo.hijos.get(caracter)
+            if nodo is None:
+                return []
+        return [self.por_id[i] for i in nodo.ids[:limite]]
+
+    def areas(self):
+        return list(self.por_area)
+
+    # Nombres de los empleados de un área, en el orden del directorio
+    def nombres_area(self, area):
+        return [e.nombre for e in self.por_area.get(area, ())]
+
+
+@lru_cache(maxsize=1)
+def directorio():
+    with open(ARCHIVO_EMPLEADOS, "r", encoding="utf-8") as f:
+        return DirectorioEmpleados(json.load(f))
+
+
+# Empleados por área con el formato anterior ({área: [nombres]}), para el selector de
+# área de la app y batch_scheduler
+EMPLEADOS_POR_AREA = {area: directorio().nombres_area(area) for area in directorio().areas()}
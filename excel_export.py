@@ -0,0 +1,273 @@
+import re
+from datetime import datetime
+
+from instrumentacion import instrumentado
+from procesamiento_turnos import (
+    TURNO_DESCANSO_MANUAL,
+    TURNO_DIA_FAMILIA,
+    TURNO_VACACIONES,
+    procesar_turnos,
+)
+
+# Exportación a Excel con XlsxWriter en modo constant_memory: cada fila se escribe
+# en el archivo temporal de su hoja apenas se recibe, así la memoria no crece con
+# el tamaño de la programación. En este modo las filas de cada hoja se deben escribir
+# en orden, por eso todo se arma recorriendo las filas una sola vez.
+
+# Colores de los turnos especiales (fondo, texto)
+COLORES_TURNO = {
+    "DESCANSO": ("#D9D9D9", "#000000"),
+    TURNO_DESCANSO_MANUAL: ("#D9D9D9", "#000000"),
+    TURNO_VACACIONES: ("#C6EFCE", "#006100"),
+    TURNO_DIA_FAMILIA: ("#FFEB9C", "#9C5700"),
+    "SIN HORARIO": ("#F2F2F2", "#7F7F7F"),
+}
+COLOR_ENCABEZADO = "#19277F"
+
+# Columnas de la hoja de turnos: (título, ancho)
+COLUMNAS_TURNOS = (
+    ("Empleado", 32),
+    ("Fecha", 12),
+    ("Día", 11),
+    ("Turno", 22),
+    ("Almuerzo", 11),
+    ("Desayuno", 11),
+    ("Horas Laboradas", 15),
+    ("Horas Totales", 13),
+    ("Semana", 8),
+    ("Horas Semana", 13),
+)
+COLUMNAS_HORAS_EXTRA = (
+    ("Empleado", 32),
+    ("Fecha", 12),
+    ("Área", 16),
+    ("Tipo", 11),
+    ("Pago", 11),
+    ("Horas", 9),
+    ("Semana", 8),
+)
+# Argumentos por función de Excel (SUM acepta hasta 255)
+MAX_ARGUMENTOS_EXCEL = 255
+
+_CARACTERES_INVALIDOS_HOJA = re.compile(r"[\[\]:*?/\\]")
+
+
+# Nombre de hoja válido para Excel (máximo 31 caracteres) y sin repetir
+def nombre_hoja(nombre, usados):
+    base = _CARACTERES_INVALIDOS_HOJA.sub("-", str(nombre)).strip("'") or "Hoja"
+    base = base[:31]
+    candidato = base
+    n = 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = base[:31 - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+class LibroExcel:
+    """
+    Libro de Excel en modo constant_memory con los formatos creados una sola vez.
+
+    Args:
+        salida: Ruta del archivo o archivo binario abierto para escritura.
+    """
+
+    def __init__(self, salida):
+        import xlsxwriter
+
+        self.libro = xlsxwriter.Workbook(salida, {"constant_memory": True})
+        self.hojas_usadas = set()
+        self.encabezado = self.libro.add_format({
+            "bold": True, "font_color": "#FFFFFF", "bg_color": COLOR_ENCABEZADO, "border": 1
+        })
+        self.numero = self.libro.add_format({"num_format": "0.00"})
+        self.total = self.libro.add_format({"bold": True, "num_format": "0.00", "top": 1})
+        self.formatos_turno = {
+            turno: self.libro.add_format({"bg_color": fondo, "font_color": texto})
+            for turno, (fondo, texto) in COLORES_TURNO.items()
+        }
+
+    def hoja(self, nombre, columnas):
+        hoja = self.libro.add_worksheet(nombre_hoja(nombre, self.hojas_usadas))
+        for columna, (titulo, ancho) in enumerate(columnas):
+            hoja.set_column(columna, columna, ancho)
+            hoja.write_string(0, columna, titulo, self.encabezado)
+        hoja.freeze_panes(1, 0)
+        return hoja
+
+    def cerrar(self):
+        self.libro.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+# Letra de una columna de Excel a partir de su índice (0 -> A, 26 -> AA), como
+# xlsxwriter.utility.xl_col_to_name, sin importar xlsxwriter antes de escribir
+def _letra_columna(indice):
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return letras
+
+
+def _letra(columnas, titulo):
+    return _letra_columna([c[0] for c in columnas].index(titulo))
+
+
+# SUM de las celdas de una columna en las filas dadas (números de fila de Excel, en
+# orden), con las filas seguidas como un solo rango: "=SUM(G2:G7)", "=SUM(F2,F9:F10)".
+# Cada total suma solo sus propias celdas, así recalcular el libro es lineal en las filas
+# (un SUMIFS por fila sobre la columna completa sería cuadrático).
+def _formula_suma(letra, filas):
+    rangos = []
+    inicio = filas[0]
+    for anterior, fila in zip(filas, filas[1:] + [None]):
+        if fila != anterior + 1:
+            rangos.append(f"{letra}{inicio}" if inicio == anterior else f"{letra}{inicio}:{letra}{anterior}")
+            inicio = fila
+    while len(rangos) > MAX_ARGUMENTOS_EXCEL:
+        rangos = [
+            f"SUM({','.join(rangos[i:i + MAX_ARGUMENTOS_EXCEL])})"
+            for i in range(0, len(rangos), MAX_ARGUMENTOS_EXCEL)
+        ]
+    return f"=SUM({','.join(rangos)})"
+
+
+def escribir_hoja_turnos(libro, nombre, df):
+    """
+    Escribe una hoja con la tabla de turnos de procesar_turnos. Los turnos especiales
+    llevan su color y la columna Horas Semana es una fórmula.
+
+    Args:
+        libro (LibroExcel): Libro de destino.
+        nombre (str): Nombre de la hoja.
+        df (pandas.DataFrame): Resultado de procesar_turnos.
+    """
+    hoja = libro.hoja(nombre, COLUMNAS_TURNOS)
+    columnas = ("Empleado", "Fecha", "Día", "Turno", "Almuerzo", "Desayuno", "Horas Laboradas", "Semana", "Horas Semana")
+    # Filas de Excel de cada (empleado, semana). La tabla ya está en memoria, así los
+    # grupos se conocen antes de escribir: la primera fila de cada grupo lleva el SUM de
+    # sus horas y las demás la referencian.
+    grupos = {}
+    for fila, clave in enumerate(zip(df["Empleado"].astype(str), df["Semana"].tolist()), start=2):
+        grupos.setdefault(clave, []).append(fila)
+    letra_horas = _letra(COLUMNAS_TURNOS, "Horas Laboradas")
+    letra_semana = _letra(COLUMNAS_TURNOS, "Horas Semana")
+
+    fila = 0
+    for empleado, fecha, dia, turno, almuerzo, desayuno, horas, semana, horas_semana in df[list(columnas)].itertuples(index=False, name=None):
+        fila += 1
+        filas_grupo = grupos[(str(empleado), semana)]
+        turno = str(turno)
+        hoja.write_string(fila, 0, str(empleado))
+        hoja.write_string(fila, 1, fecha)
+        hoja.write_string(fila, 2, dia)
+        hoja.write_string(fila, 3, turno, libro.formatos_turno.get(turno))
+        hoja.write_string(fila, 4, almuerzo)
+        hoja.write_string(fila, 5, desayuno)
+        hoja.write_number(fila, 6, horas, libro.numero)
+        hoja.write_formula(fila, 7, f"=G{fila + 1}-0.75", libro.numero, horas - 0.75)
+        hoja.write_number(fila, 8, semana)
+        if filas_grupo[0] == fila + 1:
+            formula = _formula_suma(letra_horas, filas_grupo)
+        else:
+            formula = f"={letra_semana}{filas_grupo[0]}"
+        hoja.write_formula(fila, 9, formula, libro.numero, horas_semana)
+    if fila:
+        hoja.autofilter(0, 0, fila, len(COLUMNAS_TURNOS) - 1)
+    return fila
+
+
+@instrumentado("excel.turnos")
+def exportar_turnos_excel(salida, hojas):
+    """
+    Exporta una o varias tablas de turnos, una hoja por tabla.
+
+    Args:
+        salida: Ruta del archivo o archivo binario abierto para escritura.
+        hojas (iterable): Pares (nombre de hoja, DataFrame de procesar_turnos). Se recorren
+                          uno por uno, así que pueden venir de un generador.
+    """
+    with LibroExcel(salida) as libro:
+        for nombre, df in hojas:
+            escribir_hoja_turnos(libro, nombre, df)
+
+
+# Hojas para exportar_turnos_excel a partir de los resultados de batch_scheduler.generar_lote,
+# una por área y mes, con las novedades de procesar_turnos ({"dias_familia": ..., ...}) si
+# se pasan. Cada tabla se calcula justo antes de escribir su hoja.
+def hojas_lote(resultados, novedades=None):
+    for (area, year, month), schedule in resultados.items():
+        yield f"{area.strip()} {year}-{month:02d}", procesar_turnos(schedule, **(novedades or {}))
+
+
+@instrumentado("excel.horas_extra")
+def exportar_horas_extra_excel(salida, registros, agrupar_por="area"):
+    """
+    Exporta registros de horas extra con una hoja por área o por mes, en una sola pasada
+    sobre los registros (cada hoja se va llenando a medida que llegan sus filas). Debajo
+    del total de cada hoja van las horas por empleado y semana ISO (con su año), como
+    números acumulados al escribir: la memoria depende de los grupos, no de las filas.
+
+    Args:
+        salida: Ruta del archivo o archivo binario abierto para escritura.
+        registros (iterable): Registros de horas extra, por ejemplo reporte_horas_extra.registros_horas_extra().
+        agrupar_por (str, optional): "area" o "mes".
+
+    Returns:
+        int: Número de registros exportados.
+    """
+    if agrupar_por not in ("area", "mes"):
+        raise ValueError("agrupar_por debe ser 'area' o 'mes'")
+
+    cantidad = 0
+    with LibroExcel(salida) as libro:
+        hojas = {}
+        for r in registros:
+            fecha = str(r.get("fecha", ""))
+            clave = (r.get("area") or "Sin área") if agrupar_por == "area" else fecha[:7]
+            estado = hojas.get(clave)
+            if estado is None:
+                # [hoja, filas escritas, {(empleado, año ISO, semana ISO): horas}]
+                estado = hojas[clave] = [libro.hoja(clave, COLUMNAS_HORAS_EXTRA), 0, {}]
+            hoja = estado[0]
+            estado[1] += 1
+            fila = estado[1]
+            try:
+                year, semana = datetime.strptime(fecha, "%Y-%m-%d").isocalendar()[:2]
+            except ValueError:
+                year, semana = 0, 0
+            hoja.write_string(fila, 0, str(r.get("empleado", "")))
+            hoja.write_string(fila, 1, fecha)
+            hoja.write_string(fila, 2, r.get("area") or "")
+            hoja.write_string(fila, 3, r.get("tipo", ""))
+            hoja.write_string(fila, 4, r.get("pago") or "")
+            hoja.write_number(fila, 5, r.get("horas", 0), libro.numero)
+            hoja.write_number(fila, 6, semana)
+            grupo = (str(r.get("empleado", "")), year, semana)
+            estado[2][grupo] = estado[2].get(grupo, 0.0) + r.get("horas", 0)
+            cantidad += 1
+
+        # Fila de total al final de cada hoja y, debajo, las horas por empleado y semana.
+        # Las filas siguen en orden (constant_memory) porque van después de los registros.
+        for hoja, filas, grupos in hojas.values():
+            hoja.write_string(filas + 1, 0, "Total", libro.total)
+            hoja.write_formula(filas + 1, 5, f"=SUM(F2:F{filas + 1})", libro.total)
+            fila = filas + 3
+            hoja.write_string(fila, 0, "Horas por empleado y semana", libro.encabezado)
+            hoja.write_string(fila, 1, "Año", libro.encabezado)
+            for (empleado, year, semana), horas in sorted(grupos.items()):
+                fila += 1
+                hoja.write_string(fila, 0, empleado)
+                hoja.write_number(fila, 1, year)
+                hoja.write_number(fila, 5, round(horas, 2), libro.numero)
+                hoja.write_number(fila, 6, semana)
+    return cantidad
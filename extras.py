@@ -1,41 +1,145 @@
-import json
-import yagmail
-import os
+import logging
+import threading
+import time
 from datetime import datetime
-from fpdf import FPDF
-from dotenv import load_dotenv
-
-# Cargar las variables desde el archivo .env
-load_dotenv()
+from bandeja_correo import notificar
+from configuracion import (
+    ARCHIVO_DIA_FAMILIA,
+    ARCHIVO_HORAS_EXTRA,
+    ARCHIVO_HORAS_EXTRA_NOCTURNAS,
+    ARCHIVO_PERMISOS,
+    ARCHIVO_VACACIONES,
+    entorno,
+)
+from empleados import directorio
+from instrumentacion import instrumentado, medir
+from plantillas_correo import cuerpo_horas_extra, cuerpo_dia_familia, cuerpo_permiso, cuerpo_vacaciones
+
+logger = logging.getLogger(__name__)
 # Configuración de correo electrónico.
-EMAIL_REMITENTE = os.getenv("EMAIL_REMITENTE")
-EMAIL_P = os.getenv("EMAIL_P")  # contraseña del correo.
-EMAIL_DESTINATARIO = os.getenv("EMAIL_DESTINATARIO")
-EMAIL_DESTINATARIO_FAMILIA = os.getenv("EMAIL_DESTINATARIO_FAMILIA")
-# Archivos de registros.
-ARCHIVO_HORAS_EXTRA = "horas_extra.json"
-ARCHIVO_HORAS_EXTRA_NOCTURNAS = "horas_extra_nocturnas.json"
+EMAIL_REMITENTE = entorno("EMAIL_REMITENTE")
+EMAIL_P = entorno("EMAIL_P")  # contraseña del correo.
+EMAIL_DESTINATARIO = entorno("EMAIL_DESTINATARIO")
+EMAIL_DESTINATARIO_FAMILIA = entorno("EMAIL_DESTINATARIO_FAMILIA")
+# Dónde se guardan los registros: "jsonl" (archivos) o "sqlite" (base de datos local con índices)
+if entorno("ALMACEN_REGISTROS", "jsonl").lower() == "sqlite":
+    import repositorio_registros as almacen
+else:
+    import almacen_registros as almacen
 VALOR_HORA_EXTRA_DIURNA = 7736
 VALOR_HORA_EXTRA_NOCTURNA = 10831
+# Secuencia de registro de horas extra (ver _secuencia)
+_candado_secuencia = threading.Lock()
+_ultima_secuencia = 0
+
+
+# Número creciente (nanosegundos desde 1970) que ordena los registros de horas extra en el
+# orden en que se registraron; registrado_en tiene resolución de segundos y los registros de
+# un mismo formulario o lote de la API comparten el segundo
+def _secuencia():
+    global _ultima_secuencia
+    with _candado_secuencia:
+        _ultima_secuencia = max(time.time_ns(), _ultima_secuencia + 1)
+        return _ultima_secuencia
+
+
 # Cargar registros guardados.
 def cargar_registros(archivo):
-    try:
-        with open(archivo, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    with medir("registros.leer", archivo=archivo):
+        return list(almacen.leer_registros(archivo))
 
 
-# Guardar registros en JSON
+# Guardar registros (reemplaza todo el archivo; para agregar usar agregar_registros)
 def guardar_registros(archivo, registros):
-    with open(archivo, "w") as f:
-        json.dump(registros, f, indent=4)
+    almacen.reescribir_registros(archivo, registros)
 
 
 # Registrar horas extra
 
 def registrar_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, minutos_di=0, minutos_no=0, area=None, pago=None):
+    return registrar_horas_extra_lote([{
+        "empleado": empleado,
+        "fecha": fecha,
+        "horas_nocturnas": horas_nocturnas,
+        "horas_diurnas": horas_diurnas,
+        "minutos_di": minutos_di,
+        "minutos_no": minutos_no,
+        "area": area,
+        "pago": pago,
+    }])
+
+
+# Registrar las horas extra de varios empleados (un formulario completo) con una
+# sola escritura por archivo. Cada entrada tiene los mismos campos que los
+# parámetros de registrar_horas_extra.
+def registrar_horas_extra_lote(entradas):
+    registros = construir_registros_horas_extra(entradas)
+    guardar_horas_extra(registros)
+    return registros
+
+
+# Como registrar_horas_extra_lote, revisando antes los registros contra la programación
+# y el historial (ver validacion_horas_extra). Devuelve (registros, hallazgos).
+def registrar_horas_extra_revisadas(entradas):
+    from validacion_horas_extra import liberar_horas_extra, revisar_horas_extra
+
+    registros = construir_registros_horas_extra(entradas)
+    hallazgos = revisar_horas_extra(registros)
+    try:
+        guardar_horas_extra(registros)
+    except Exception:
+        liberar_horas_extra(registros)
+        raise
+    return registros, hallazgos
+
+
+# Guardar registros de horas extra ya construidos, con una escritura por archivo
+def guardar_horas_extra(registros):
+    for archivo, del_archivo in archivos_horas_extra(registros).items():
+        almacen.agregar_registros(archivo, del_archivo)
+
+    from nomina import actualizar_si_cargados
+
+    actualizar_si_cargados()
+
+
+# Registros de horas extra (uno diurno y/o uno nocturno por entrada) sin guardarlos
+def construir_registros_horas_extra(entradas):
     registros = []
+    for entrada in entradas:
+        registros.extend(_construir_registros_horas_extra(**entrada))
+    return registros
+
+
+# Registros de horas extra separados por archivo: {archivo: [registros]}
+def archivos_horas_extra(registros):
+    return {
+        ARCHIVO_HORAS_EXTRA: [r for r in registros if r["tipo"] == "diurnas"],
+        ARCHIVO_HORAS_EXTRA_NOCTURNAS: [r for r in registros if r["tipo"] != "diurnas"],
+    }
+
+
+# registrado_en y secuencia del mismo instante, para que ordenar por ambos respete el orden de registro
+def _marca_registro():
+    secuencia = _secuencia()
+    return {
+        "registrado_en": datetime.fromtimestamp(secuencia / 1e9).strftime("%Y-%m-%d %H:%M:%S"),
+        "secuencia": secuencia,
+    }
+
+
+# hora_inicio_di y hora_inicio_no ("HH:MM", opcionales) son la hora en que empezó cada
+# tipo de hora extra; con ellas se revisan los cruces con el turno (validacion_horas_extra)
+def _construir_registros_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, minutos_di=0, minutos_no=0, area=None, pago=None,
+                                     hora_inicio_di=None, hora_inicio_no=None):
+    registros = []
+
+    # Con el nombre del directorio (y su id) los registros se pueden cruzar con los
+    # empleados aunque se haya escrito con otras tildes, mayúsculas o espacios
+    encontrado = directorio().buscar(empleado)
+    empleado_id = None
+    if encontrado is not None:
+        empleado, empleado_id = encontrado.nombre, encontrado.id
 
     # Convertir a decimal para cálculos, pero guardar minutos aparte
     total_horas_di = horas_diurnas + (minutos_di / 60)
@@ -44,6 +148,7 @@ def registrar_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, m
     if total_horas_di > 0:
         registro = {
             "empleado": empleado,
+            "empleado_id": empleado_id,
             "fecha": str(fecha),
             "horas": round(total_horas_di, 2),
             "horas_int": horas_diurnas,
@@ -51,16 +156,15 @@ def registrar_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, m
             "tipo": "diurnas",
             "area": area,
             "pago": pago,
-            "registrado_en": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "hora_inicio": hora_inicio_di,
+            **_marca_registro(),
         }
-        regs = cargar_registros(ARCHIVO_HORAS_EXTRA)
-        regs.append(registro)
-        guardar_registros(ARCHIVO_HORAS_EXTRA, regs)
         registros.append(registro)
 
     if total_horas_no > 0:
         registro = {
             "empleado": empleado,
+            "empleado_id": empleado_id,
             "fecha": str(fecha),
             "horas": round(total_horas_no, 2),
             "horas_int": horas_nocturnas,
@@ -68,11 +172,9 @@ def registrar_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, m
             "tipo": "nocturnas",
             "area": area,
             "pago": pago,
-            "registrado_en": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            "hora_inicio": hora_inicio_no,
+            **_marca_registro(),
         }
-        regs = cargar_registros(ARCHIVO_HORAS_EXTRA_NOCTURNAS)
-        regs.append(registro)
-        guardar_registros(ARCHIVO_HORAS_EXTRA_NOCTURNAS, regs)
         registros.append(registro)
 
     return registros
@@ -80,71 +182,27 @@ def registrar_horas_extra(empleado, fecha, horas_nocturnas=0, horas_diurnas=0, m
 
 # Enviar correo con horas extra
 def enviar_correo_horas_extra_agrupado(registros):
-    yag = yagmail.SMTP(EMAIL_REMITENTE, EMAIL_P)
-    asunto = "Horas extra registradas"
-    cuerpo = "<p>Cordial saludo,<br><br>Se han registrado las siguientes horas extra:</p><ul>"
-    total_general = 0
+    from nomina import tarifas, valor_registro
 
-    for r in registros:
-        # Verificar si el pago es 'tiempo' y no calcular valor
-        if r.get("pago") == "Tiempo":
-            tiempo_str = ""
-            if r["horas_int"] > 0:
-                tiempo_str += f"{r['horas_int']}h "
-            if r["minutos"] > 0:
-                tiempo_str += f"{r['minutos']}m"
-
-            cuerpo += (
-                f"<li>"
-                f"<b>{r['empleado']}</b> | "
-                f"Área: <b>{r.get('area','N/A')}</b> | "
-                f"Pago: <b>Tiempo</b> | "  # Pago en tiempo
-                f"Fecha: <b>{r['fecha']}</b> | "
-                f"Tiempo {r['tipo']}: <b>{tiempo_str.strip()}</b> | "
-                f"Total: <b>No aplica valor monetario</b>"  # No muestra el valor
-                f"</li>"
-            )
-            continue  # No procesar más detalles de cálculo de valor para pago "tiempo"
-
-        # Si no es 'tiempo', calcular el valor para horas extra
-        valor_hora = VALOR_HORA_EXTRA_DIURNA if r["tipo"] == "diurnas" else VALOR_HORA_EXTRA_NOCTURNA
-        total = r["horas"] * valor_hora
-        total_general += total
-
-        # Mostrar horas y minutos exactos
-        tiempo_str = ""
-        if r["horas_int"] > 0:
-            tiempo_str += f"{r['horas_int']}h "
-        if r["minutos"] > 0:
-            tiempo_str += f"{r['minutos']}m"
-
-        cuerpo += (
-            f"<li>"
-            f"<b>{r['empleado']}</b> | "
-            f"Área: <b>{r.get('area','N/A')}</b> | "
-            f"Pago: <b>{r.get('pago','N/A')}</b> | "
-            f"Fecha: <b>{r['fecha']}</b> | "
-            f"Tiempo {r['tipo']}: <b>{tiempo_str.strip()}</b> | "
-            f"Total: <b>${total:,.0f}</b>"  # Solo mostrar valor si no es "tiempo"
-            f"</li>"
-        )
-
-    cuerpo += "</ul>"
-    cuerpo += (
-        f"<p><b>Total a pagar: ${total_general:,.0f}</b><br>"
-        f"Fecha de registro: <b>{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</b><br><br>"
-        "\n\nQuedamos atentos a cualquier comentario o requerimiento adicional."
-        "\n\nAtentamente,\nÁrea de TI"
+    asunto = "Horas extra registradas"
+    tarifas_vigentes = tarifas()
+    cuerpo = cuerpo_horas_extra(
+        registros, lambda r: valor_registro(r, tarifas_vigentes),
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     )
 
     # Enviar el correo solo si hay horas extra registradas
-    yag.send(to=EMAIL_DESTINATARIO, subject=asunto, contents=cuerpo)
+    notificar("extras", EMAIL_DESTINATARIO, asunto, cuerpo)
 
 
 
 # -------------------------------
 # Generar PDF con horas extra
+@instrumentado("pdf.horas_extra")
 def generar_pdf_horas_extra(registros):
+    from fpdf import FPDF
+    from nomina import tarifas, valor_registro
+
     pdf = FPDF()
     pdf.add_page()
     
@@ -154,10 +212,10 @@ def generar_pdf_horas_extra(registros):
     pdf.multi_cell(0, 10, "Cordial saludo,\nSe informa que se han registrado las siguientes horas extra:")
     pdf.ln(5)
 
+    tarifas_vigentes = tarifas()
     total_general = 0
     for r in registros:
-        valor_hora = VALOR_HORA_EXTRA_DIURNA if r["tipo"] == "diurnas" else VALOR_HORA_EXTRA_NOCTURNA
-        total = r["horas"] * valor_hora
+        total = valor_registro(r, tarifas_vigentes)
         total_general += total
         pdf.cell(0, 10, f"Empleado: {r['empleado']}", ln=True)
         pdf.cell(0, 10, f"Área: {r.get('area','')}", ln=True)
@@ -173,150 +231,53 @@ def generar_pdf_horas_extra(registros):
     return pdf.output(dest='S').encode('latin1')
 # registrar días de la familia
 def registrar_dia_familia(empleado, fecha, area, archivo, correo_em, correo_jefe,firma=None):
-    registros = cargar_registros(archivo)
-    reg = {
+    reg = registro_dia_familia(empleado, fecha, area, correo_em, correo_jefe, firma.name if firma else None)
+    almacen.agregar_registros(archivo, [reg])
+    return reg
+# registro de un día de la familia, sin guardarlo (firma es el nombre del archivo de la firma)
+def registro_dia_familia(empleado, fecha, area, correo_em, correo_jefe, firma=None):
+    return {
         "empleado": empleado,
         "fecha": str(fecha),
         "area": area,
         "correo": correo_em,
         "correo_jefe": correo_jefe,
         "registrado_en": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "firma": firma.name if firma else None
+        "firma": firma
     }
-    registros.append(reg)
-    guardar_registros(archivo, registros)
-    return reg
 # enviar correos electrónicos dia de la familia
 def enviar_correo_dia_familia_agrupado(registros):
-    yag = yagmail.SMTP(EMAIL_REMITENTE, EMAIL_P)
     asunto = "Días de la Familia registrados"
-    cuerpo = "Cordial saludo,\n\nSe han solicitado los siguientes Días de la Familia:\n"
-    for r in registros:
-        cuerpo += f"\n- {r['empleado']} | Área: {r.get('area','N/A')} | Fecha: {r['fecha']} | Correo empleado: {r['correo']} | Correo Jefe: {r['correo_jefe']}"
-        #firma si existe
-      
-        cuerpo += f" | Firma: {r['firma']}"
-    cuerpo += f"\n\nFecha de registro: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}" \
-              "\n\nQuedamos atentos a cualquier comentario o requerimiento adicional." \
-              "\n\nAtentamente,\nÁrea de TI"
-    yag.send(to=EMAIL_DESTINATARIO, subject=asunto, contents=cuerpo)
+    cuerpo = cuerpo_dia_familia(registros, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    notificar("extras", EMAIL_DESTINATARIO, asunto, cuerpo)
 # generar PDF de días de la familia
 def generar_pdf_dia_familia(registros):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.image("plantillaSM.png", x=0, y=0, w=210, h=297)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, "Solicitud Día de la Familia", ln=True, align="C")
-    pdf.ln(10)
-    pdf.multi_cell(0, 10, "Cordial saludo,\nSe informa que se ha solicitado el día de la familia para los siguientes empleados:")
-    pdf.ln(5)
-    for r in registros:
-        pdf.cell(0, 10, f"Empleado: {r['empleado']}", ln=True)
-        pdf.cell(0, 10, f"Área: {r.get('area','')}", ln=True)
-        pdf.cell(0, 10, f"Fecha solicitada: {r['fecha']}", ln=True)
+    from pdf_utils import generar_pdfs_dia_familia
 
-        pdf.ln(5)
-    pdf.ln(5)
-    pdf.multi_cell(0, 10, "Quedamos atentos a cualquier comentario o requerimiento adicional.")
-    pdf.cell(0, 10, "Atentamente,\nÁrea de TI", ln=True)
-    return pdf.output(dest='S').encode('latin1')
+    return generar_pdfs_dia_familia([registros])
 # enviar permisos
 def enviar_correo_permiso(registro):
     destinatario = registro["correo_jefe"]
-    destinatario_empleado = registro["correo"] 
 
-# Construir asunto
+# Construir asunto y cuerpo del correo
     asunto = f"Solicitud de Permiso - {registro['nombre']}"
+    cuerpo = cuerpo_permiso(registro)
 
-# Determinar si hay que especificar horas o minutos
-    detalle_tiempo = ""
-    if registro["tipo"] == "Medio dia":
-        detalle_tiempo = " (aproximadamente 4 horas)"
-    elif registro["tipo"] == "Cita medica":
-        detalle_tiempo = " (tiempo estimado: en minutos u horas según cita)"
-
-# Cuerpo del correo
-    cuerpo = f"""<h3>Solicitud de Permiso</h3>
-    <p>Cordial saludo,<br>
-    Se informa que se ha solicitado un permiso para el empleado <b>{registro['nombre']}</b>.<br>
-    Fecha solicitada: <b>{registro['fecha']}</b><br>
-    Tipo de permiso: <b>{registro['tipo']}{detalle_tiempo}</b></p>
-    <p>Correo del empleado: <b>{registro['correo']}</b></p>  <!-- Correo del empleado -->"""
-    
-
-    if registro.get("pe_motivo"):
-        cuerpo += f"<p>Motivo del permiso especial: <b>{registro['pe_motivo']}</b></p>"
-
-    cuerpo += """
-    <p>Quedamos atentos a cualquier comentario o requerimiento adicional.</p>
-    <p>Atentamente,<br>Área de TI</p>"""
-
-   
-    print(f"Correo enviado a: {destinatario}")
-    print(f"Asunto: {asunto}")
-    print(f"Cuerpo del correo:\n{cuerpo}")
+    logger.debug("Correo encolado para %s: %s\n%s", destinatario, asunto, cuerpo)
 
-# Enviar
-    yag = yagmail.SMTP(EMAIL_REMITENTE, EMAIL_P)
-    yag.send(to=destinatario, subject=asunto, contents=cuerpo)
+# Enviar (el correo queda en la bandeja de salida y se envía en segundo plano)
+    notificar("extras", destinatario, asunto, cuerpo)
 
 
 def generar_pdf_permiso(registro):
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.image("plantillaSM.png", x=0, y=0, w=210, h=297)
-    pdf.set_font("Arial", size=12)
-    pdf.cell(0, 10, "Solicitud de Permiso", ln=True, align="C")
-    pdf.ln(10)
-
-# Texto principal
-    pdf.multi_cell(0, 10, f"Cordial saludo,\nSe informa que se ha solicitado un permiso para el empleado {registro['nombre']}.")
-    pdf.ln(5)
-
-# Detalle de tiempo
-    detalle_tiempo = ""
-    if registro["tipo"] == "Medio dia":
-        detalle_tiempo = " (aproximadamente 4 horas)"
-    elif registro["tipo"] == "Cita medica":
-        detalle_tiempo = " (tiempo estimado: en minutos u horas según cita)"
-
-    pdf.cell(0, 10, f"Fecha solicitada: {registro['fecha']}", ln=True)
-    pdf.cell(0, 10, f"Tipo de permiso: {registro['tipo']}{detalle_tiempo}", ln=True)
+    from pdf_utils import generar_pdfs_permiso
 
-    # Motivo si aplica
-    if registro.get("pe_motivo"):
-        pdf.multi_cell(0, 10, f"Motivo del permiso especial: {registro['pe_motivo']}")
-
-    pdf.ln(5)
-    pdf.multi_cell(0, 10, "Quedamos atentos a cualquier comentario o requerimiento adicional.")
-    pdf.cell(0, 10, "Atentamente,", ln=True)
-    pdf.cell(0, 10, "Área de TI", ln=True)
-
-    return pdf.output(dest='S').encode('latin1')
+    return generar_pdfs_permiso([registro])
 
 def enviar_correo_vacaciones(registro):
     destinatario = registro["correo_jefe"]  # Correo del jefe directo.
-    destinatario1 = registro["correo_em"]   # Correo del empleado.
-    
+
     # Asunto y cuerpo del correo.
     asunto = f"Solicitud de Vacaciones - {registro['nombre']}"
-    cuerpo = f"""<h3>Solicitud de Vacaciones</h3>
-    <p>Cordial saludo,<br>
-    Se informa que el empleado <b>{registro['nombre']}</b> ha solicitado sus vacaciones.<br>
-    Fecha solicitada: <b>{registro['fecha_inicio']}</b> hasta <b>{registro['fecha_fin']}</b><br>
-    <p>Correo del empleado: <b>{registro['correo_em']}</b></p>  <!-- Correo del empleado --> 
-    """
-    
-    cuerpo += """
-    <p>Quedamos atentos a cualquier comentario o requerimiento adicional.</p>
-    <p>Atentamente,<br>Área de TI</p>"""
-    
-    
-
-
-
-
-
-
-
-
+    cuerpo = cuerpo_vacaciones(registro)
+    notificar("extras", destinatario, asunto, cuerpo)
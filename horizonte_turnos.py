@@ -0,0 +1,154 @@
+import copy
+import math
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from calendar_utils import CALENDARIO
+from schedule_matrix import CatalogoTurnos, Schedule
+from scheduler import MAX_DESCANSOS_POR_DIA, TURNOS_SIN_DESCANSO, asignar_semana, dias_programables
+
+# Programación de un horizonte de cualquier largo (varios meses o años), semana por
+# semana. A diferencia de asignar_turnos_matriz, que empieza la rotación en cada mes,
+# aquí el índice de la rotación sale de la semana ISO (año y semana), así una semana
+# que cruza de un mes o de un año a otro sigue con el mismo horario para cada grupo.
+#
+# Descansos: cada empleado tiene un día de descanso por mes calendario (si trabajan
+# sábados). Como las semanas se generan en orden y sin ver las siguientes, cada semana
+# descansa la parte proporcional de los pendientes del mes, empezando por quienes llevan
+# más tiempo sin descansar, y sin pasar de MAX_DESCANSOS_POR_DIA por fecha.
+#
+# Después de cada semana se entrega el estado (un diccionario que se puede guardar como
+# JSON) con el que se retoma la generación desde la semana siguiente.
+
+SemanaHorizonte = namedtuple("SemanaHorizonte", ["year", "semana", "schedule", "estado"])
+
+
+def _lunes(dia):
+    return dia - timedelta(days=dia.weekday())
+
+
+def estado_inicial(inicio, indice_rotacion=0):
+    """
+    Estado para empezar un horizonte en `inicio`.
+
+    Args:
+        inicio (date): Primera fecha a programar.
+        indice_rotacion (int, optional): Índice de la rotación en la semana de `inicio`.
+
+    Returns:
+        dict: Estado para programar_horizonte.
+    """
+    return {
+        "lunes_base": _lunes(inicio).isoformat(),
+        "indice_base": indice_rotacion,
+        "siguiente": inicio.isoformat(),
+        "ultima_semana": None,
+        "descansos_mes": {},
+        "ultimo_descanso": {},
+    }
+
+
+# Lunes de las semanas que tienen días programables del mes, en orden
+@lru_cache(maxsize=64)
+def _lunes_del_mes(year, month, trabajan_sabado):
+    dias = dias_programables(year, month, trabajan_sabado)
+    return sorted({_lunes(d) for semana in dias.values() for d in semana})
+
+
+def _asignar_descansos_semana(schedule, lunes, estado, trabajan_sabado):
+    catalogo = schedule.catalogo
+    codigo_descanso = catalogo.codigo("DESCANSO")
+    admite_descanso = np.array(
+        [isinstance(t, str) and t.upper() not in TURNOS_SIN_DESCANSO for t in catalogo.turnos] + [False]
+    )
+    elegibles = admite_descanso[schedule.codigos]
+    descansos_por_columna = [0] * len(schedule.fechas)
+
+    columnas_por_mes = {}
+    for columna, fecha in enumerate(schedule.fechas):
+        columnas_por_mes.setdefault((fecha.year, fecha.month), []).append(columna)
+
+    for (year, month), columnas in columnas_por_mes.items():
+        mes = f"{year:04d}-{month:02d}"
+        ya_descansaron = estado["descansos_mes"].setdefault(mes, [])
+        pendientes = [
+            fila for fila, empleado in enumerate(schedule.empleados)
+            if empleado not in ya_descansaron and elegibles[fila, columnas].any()
+        ]
+        if not pendientes:
+            continue
+        # Semanas que le quedan al mes, contando esta
+        semanas_restantes = sum(1 for l in _lunes_del_mes(year, month, trabajan_sabado) if l >= lunes) or 1
+        cupo = math.ceil(len(pendientes) / semanas_restantes)
+        # Primero quienes llevan más tiempo sin descansar (o nunca han descansado)
+        pendientes.sort(key=lambda f: (estado["ultimo_descanso"].get(schedule.empleados[f], ""), schedule.empleados[f]))
+
+        asignados = 0
+        for fila in pendientes:
+            if asignados == cupo:
+                break
+            candidatas = [
+                c for c in columnas
+                if elegibles[fila, c] and descansos_por_columna[c] < MAX_DESCANSOS_POR_DIA
+            ]
+            if not candidatas:
+                continue
+            columna = min(candidatas, key=lambda c: (descansos_por_columna[c], c))
+            schedule.codigos[fila, columna] = codigo_descanso
+            descansos_por_columna[columna] += 1
+            empleado = schedule.empleados[fila]
+            ya_descansaron.append(empleado)
+            estado["ultimo_descanso"][empleado] = schedule.fechas[columna].isoformat()
+            asignados += 1
+
+
+def programar_horizonte(empleados, inicio, fin, horarios_lunes_a_viernes, trabajan_sabado=False,
+                        horario_sabado=None, horario_viernes=None, estado=None):
+    """
+    Genera la programación de `inicio` a `fin` semana por semana (generador). Solo se
+    guarda en memoria la semana en curso.
+
+    Args:
+        empleados (list): Nombres de los empleados.
+        inicio (date): Primera fecha. Si se pasa `estado`, se continúa desde estado["siguiente"].
+        fin (date): Última fecha (incluida).
+        horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes:
+            Igual que en scheduler.asignar_turnos_matriz.
+        estado (dict, optional): Estado entregado con una semana anterior, para retomar.
+
+    Yields:
+        SemanaHorizonte: Año y semana ISO, Schedule de los días de esa semana dentro del
+                         rango (todas las semanas comparten el catálogo de turnos) y el
+                         estado para continuar en la semana siguiente.
+    """
+    estado = estado_inicial(inicio) if estado is None else copy.deepcopy(estado)
+    desde = date.fromisoformat(estado["siguiente"])
+    lunes_base = date.fromisoformat(estado["lunes_base"])
+    catalogo = CatalogoTurnos()
+
+    while desde <= fin:
+        lunes = _lunes(desde)
+        hasta = min(lunes + timedelta(days=6), fin)
+        dias = [
+            d for d in CALENDARIO.dias_laborales_rango(desde, hasta)
+            if d.weekday() != 6 and (d.weekday() != 5 or trabajan_sabado)
+        ]
+        schedule = Schedule(empleados, dias, catalogo)
+        indice = estado["indice_base"] + (lunes - lunes_base).days // 7
+        asignar_semana(
+            schedule, dias, indice, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes
+        )
+        if trabajan_sabado:
+            _asignar_descansos_semana(schedule, lunes, estado, trabajan_sabado)
+
+        # Los meses ya terminados no se vuelven a consultar
+        mes_actual = f"{hasta.year:04d}-{hasta.month:02d}"
+        estado["descansos_mes"] = {m: e for m, e in estado["descansos_mes"].items() if m >= mes_actual}
+        year, semana, _ = lunes.isocalendar()
+        estado["ultima_semana"] = [year, semana]
+        desde = hasta + timedelta(days=1)
+        estado["siguiente"] = desde.isoformat()
+        yield SemanaHorizonte(year, semana, schedule, copy.deepcopy(estado))
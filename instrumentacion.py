@@ -0,0 +1,147 @@
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from configuracion import entorno
+
+# Medición de tiempos de las rutas más usadas (scheduler, calendario, lectura y escritura
+# de registros, PDF, Excel y envíos SMTP). Cada medición ("tramo") se escribe en un log
+# local con rotación y se guarda en un buffer circular en memoria, del que se calculan
+# percentiles por operación para el panel de diagnóstico de la app.
+ACTIVA = entorno("INSTRUMENTACION", "1") != "0"
+# Archivo del log de tiempos (vacío = solo en memoria)
+ARCHIVO_LOG_TIEMPOS = entorno("ARCHIVO_LOG_TIEMPOS", "tiempos.log")
+TAMANO_LOG_TIEMPOS = int(entorno("TAMANO_LOG_TIEMPOS", str(1024 * 1024)))  # Bytes antes de rotar
+COPIAS_LOG_TIEMPOS = 3
+# Tramos recientes que se guardan en memoria (los más antiguos se descartan)
+TAMANO_BUFFER = int(entorno("TAMANO_BUFFER_TIEMPOS", "5000"))
+
+logger = logging.getLogger("turnos.tiempos")
+
+_lock = threading.Lock()
+_tramos = deque(maxlen=TAMANO_BUFFER)  # (operacion, segundos, error)
+_totales = {}  # operacion -> [conteo, errores, segundos] desde el inicio del proceso
+_inicio = time.time()
+_log_configurado = False
+
+
+# El archivo del log se abre con el primer tramo, no al importar el módulo
+def _configurar_log():
+    global _log_configurado
+    _log_configurado = True
+    if not ARCHIVO_LOG_TIEMPOS or logger.handlers:
+        return
+    manejador = RotatingFileHandler(
+        ARCHIVO_LOG_TIEMPOS, maxBytes=TAMANO_LOG_TIEMPOS, backupCount=COPIAS_LOG_TIEMPOS, encoding="utf-8", delay=True
+    )
+    manejador.setFormatter(logging.Formatter("%(asctime)s %(process)d %(message)s"))
+    logger.addHandler(manejador)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def registrar_tramo(operacion, segundos, error=None, **detalle):
+    """
+    Guarda un tramo ya medido en el buffer, los totales y el log.
+
+    Args:
+        operacion (str): Nombre de la operación, con el formato "modulo.accion".
+        segundos (float): Duración del tramo.
+        error (str, optional): Tipo de la excepción si la operación falló.
+        **detalle: Datos adicionales para el log (tamaño de la entrada, archivo, ...).
+    """
+    if not ACTIVA:
+        return
+    with _lock:
+        if not _log_configurado:
+            _configurar_log()
+        _tramos.append((operacion, segundos, error))
+        total = _totales.setdefault(operacion, [0, 0, 0.0])
+        total[0] += 1
+        total[1] += error is not None
+        total[2] += segundos
+    extra = "".join(f" {clave}={valor}" for clave, valor in detalle.items())
+    logger.info("%s %.3fms%s%s", operacion, segundos * 1000, f" error={error}" if error else "", extra)
+
+
+@contextmanager
+def medir(operacion, **detalle):
+    """
+    Mide el bloque como un tramo de `operacion`. Si el bloque lanza una excepción
+    el tramo se registra con el tipo del error y la excepción sigue su curso.
+
+    Ejemplo:
+        with medir("excel.turnos", hojas=len(hojas)):
+            ...
+    """
+    if not ACTIVA:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        registrar_tramo(operacion, time.perf_counter() - inicio, type(e).__name__, **detalle)
+        raise
+    registrar_tramo(operacion, time.perf_counter() - inicio, **detalle)
+
+
+# Decorador: cada llamada a la función es un tramo de `operacion`
+def instrumentado(operacion):
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with medir(operacion):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def _percentil(ordenados, fraccion):
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+def resumen():
+    """
+    Resumen por operación para el panel de diagnóstico.
+
+    Returns:
+        list: Un diccionario por operación con el conteo, errores y tiempo total desde
+              el inicio del proceso, y p50, p95 y máximo (ms) de los tramos recientes.
+    """
+    with _lock:
+        tramos = list(_tramos)
+        totales = {operacion: list(total) for operacion, total in _totales.items()}
+    recientes = {}
+    for operacion, segundos, _ in tramos:
+        recientes.setdefault(operacion, []).append(segundos)
+
+    filas = []
+    for operacion in sorted(totales):
+        conteo, errores, segundos = totales[operacion]
+        ordenados = sorted(recientes.get(operacion, ())) or [0.0]
+        filas.append({
+            "operacion": operacion,
+            "conteo": conteo,
+            "errores": errores,
+            "total_s": round(segundos, 3),
+            "p50_ms": round(_percentil(ordenados, 0.5) * 1000, 2),
+            "p95_ms": round(_percentil(ordenados, 0.95) * 1000, 2),
+            "max_ms": round(ordenados[-1] * 1000, 2),
+        })
+    return filas
+
+
+# Segundos desde que se importó el módulo (inicio del proceso de la app)
+def segundos_activo():
+    return time.time() - _inicio
+
+
+def reiniciar():
+    with _lock:
+        _tramos.clear()
+        _totales.clear()
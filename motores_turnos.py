@@ -0,0 +1,45 @@
+from optimizador_turnos import asignar_turnos_optimizados
+from scheduler import asignar_turnos_matriz
+
+# Motores de programación disponibles. Todos reciben los mismos parámetros que
+# scheduler.asignar_turnos_matriz y devuelven un Schedule; las restricciones
+# adicionales (cobertura, horas máximas, ...) solo las usan los motores que las admiten.
+MOTOR_ROTACION = "rotacion"
+MOTOR_OPTIMIZADOR = "optimizador"
+
+
+def _rotacion(empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False,
+              horario_sabado=None, horario_viernes=None, **restricciones):
+    return asignar_turnos_matriz(
+        empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes
+    )
+
+
+MOTORES = {
+    MOTOR_ROTACION: _rotacion,
+    MOTOR_OPTIMIZADOR: asignar_turnos_optimizados,
+}
+NOMBRES_MOTORES = {
+    MOTOR_ROTACION: "Rotación por grupos",
+    MOTOR_OPTIMIZADOR: "Optimizador (cobertura, horas y equidad)",
+}
+
+
+def programar_turnos(motor, empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False,
+                     horario_sabado=None, horario_viernes=None, **restricciones):
+    """
+    Programa el mes con el motor indicado.
+
+    Args:
+        motor (str): Clave en MOTORES ("rotacion" u "optimizador").
+        **restricciones: Parámetros propios del motor (ver optimizador_turnos.asignar_turnos_optimizados).
+
+    Returns:
+        Schedule: Programación generada.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de programación desconocido: {motor}")
+    return MOTORES[motor](
+        empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes,
+        **restricciones
+    )
@@ -0,0 +1,326 @@
+import json
+import os
+import tempfile
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+from configuracion import entorno
+from extras import (
+    ARCHIVO_HORAS_EXTRA,
+    ARCHIVO_HORAS_EXTRA_NOCTURNAS,
+    VALOR_HORA_EXTRA_DIURNA,
+    VALOR_HORA_EXTRA_NOCTURNA,
+    almacen,
+)
+from instrumentacion import medir
+
+# Liquidación de horas extra para nómina. Los totales (registros, horas y valor) se
+# mantienen acumulados por mes, área, empleado, tipo y forma de pago, y se guardan en
+# ARCHIVO_ACUMULADOS junto con la posición leída de cada archivo de registros; al
+# consultar solo se leen los registros agregados desde la última vez. Si un archivo se
+# reescribe (correcciones) o cambian las tarifas, todo se recalcula de una vez sobre
+# arreglos de numpy/pandas.
+#
+# Las tarifas tienen fecha de vigencia. ARCHIVO_TARIFAS es una lista de
+# {"desde": "AAAA-MM-DD", "diurnas": valor, "nocturnas": valor}; cada registro se paga
+# con la tarifa vigente en su fecha (las fechas anteriores a la primera vigencia usan
+# la primera). Sin el archivo se usan VALOR_HORA_EXTRA_DIURNA y VALOR_HORA_EXTRA_NOCTURNA.
+ARCHIVO_TARIFAS = entorno("ARCHIVO_TARIFAS_HORAS_EXTRA", "tarifas_horas_extra.json")
+ARCHIVO_ACUMULADOS = entorno("ARCHIVO_ACUMULADOS_NOMINA", "acumulados_nomina.json")
+FUENTES = (ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS)
+# El pago en "Tiempo" se compensa con descanso y no tiene valor monetario
+PAGO_TIEMPO = "Tiempo"
+DIMENSIONES = ("mes", "area", "empleado", "tipo", "pago")
+TARIFAS_POR_DEFECTO = [
+    {"desde": "2000-01-01", "diurnas": VALOR_HORA_EXTRA_DIURNA, "nocturnas": VALOR_HORA_EXTRA_NOCTURNA},
+]
+
+
+class TablaTarifas:
+    """
+    Valores de la hora extra diurna y nocturna con fecha de vigencia.
+
+    Args:
+        vigencias (list): Diccionarios con "desde", "diurnas" y "nocturnas".
+    """
+
+    def __init__(self, vigencias):
+        if not vigencias:
+            raise ValueError("La tabla de tarifas no tiene vigencias")
+        self.vigencias = sorted(vigencias, key=lambda v: str(v["desde"]))
+        self.desde = [str(v["desde"])[:10] for v in self.vigencias]
+        self._desde = np.array(self.desde, dtype="<U10")
+        self._diurnas = np.array([v["diurnas"] for v in self.vigencias], dtype=np.float64)
+        self._nocturnas = np.array([v["nocturnas"] for v in self.vigencias], dtype=np.float64)
+
+    def valor_hora(self, tipo, fecha):
+        indice = max(bisect_right(self.desde, str(fecha)[:10]) - 1, 0)
+        return self.vigencias[indice]["diurnas" if tipo == "diurnas" else "nocturnas"]
+
+    # Valor de la hora para arreglos de tipos y fechas ("AAAA-MM-DD")
+    def valores_hora(self, tipos, fechas):
+        indices = np.maximum(np.searchsorted(self._desde, fechas, side="right") - 1, 0)
+        return np.where(tipos == "diurnas", self._diurnas[indices], self._nocturnas[indices])
+
+    # Identifica la tabla en el archivo de acumulados (si cambia, se recalcula todo)
+    def huella(self):
+        return json.dumps(self.vigencias, sort_keys=True, ensure_ascii=False)
+
+
+_tarifas = None
+_tarifas_modificado = None
+
+
+# Tabla de tarifas vigente; se vuelve a leer si el archivo cambió
+def tarifas():
+    global _tarifas, _tarifas_modificado
+    try:
+        modificado = os.stat(ARCHIVO_TARIFAS).st_mtime_ns
+    except FileNotFoundError:
+        modificado = None
+    if _tarifas is None or modificado != _tarifas_modificado:
+        vigencias = TARIFAS_POR_DEFECTO
+        if modificado is not None:
+            with open(ARCHIVO_TARIFAS, "r", encoding="utf-8") as f:
+                vigencias = json.load(f)
+        _tarifas, _tarifas_modificado = TablaTarifas(vigencias), modificado
+    return _tarifas
+
+
+def valor_registro(r, tabla=None):
+    """
+    Valor a pagar de un registro de horas extra con la tarifa vigente en su fecha.
+    El pago en "Tiempo" no tiene valor monetario.
+
+    Args:
+        r (dict): Registro de horas extra.
+        tabla (TablaTarifas, optional): Por defecto, la tabla de tarifas().
+
+    Returns:
+        float: Horas por el valor de la hora.
+    """
+    if r.get("pago") == PAGO_TIEMPO:
+        return 0
+    return r["horas"] * (tabla or tarifas()).valor_hora(r["tipo"], r["fecha"])
+
+
+class AcumuladosNomina:
+    """
+    Totales de horas extra por mes y, dentro de cada mes, por (área, empleado, tipo, pago).
+    Cada total es [registros, horas, valor].
+
+    Args:
+        tabla (TablaTarifas): Tarifas con las que se calcula el valor.
+    """
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.meses = {}
+        self.posiciones = {}
+
+    # Sumar registros nuevos a los totales
+    def agregar(self, registros):
+        for r in registros:
+            fecha = str(r["fecha"])
+            mes = self.meses.setdefault(fecha[:7], {})
+            clave = (r.get("area") or "", r.get("empleado") or "", r["tipo"], r.get("pago") or "")
+            total = mes.get(clave)
+            if total is None:
+                total = mes[clave] = [0, 0.0, 0.0]
+            total[0] += 1
+            total[1] += r["horas"]
+            total[2] += valor_registro(r, self.tabla)
+
+    # Reemplazar todos los totales a partir del historial completo, con operaciones
+    # sobre columnas en lugar de registro por registro
+    def recalcular(self, registros):
+        import pandas as pd
+
+        self.meses = {}
+        df = pd.DataFrame.from_records(registros, columns=["fecha", "area", "empleado", "tipo", "pago", "horas"])
+        if df.empty:
+            return
+        fechas = df["fecha"].astype(str).to_numpy(dtype="<U10")
+        tipos = df["tipo"].to_numpy(dtype=object)
+        horas = df["horas"].to_numpy(dtype=np.float64)
+        pago = df["pago"].fillna("").to_numpy(dtype=object)
+        valor = np.where(pago == PAGO_TIEMPO, 0.0, horas * self.tabla.valores_hora(tipos, fechas))
+        totales = pd.DataFrame({
+            "mes": fechas.astype("<U7"),
+            "area": df["area"].fillna(""),
+            "empleado": df["empleado"].fillna(""),
+            "tipo": tipos,
+            "pago": pago,
+            "registros": 1,
+            "horas": horas,
+            "valor": valor,
+        }).groupby(list(DIMENSIONES), sort=False)[["registros", "horas", "valor"]].sum()
+        for (mes, area, empleado, tipo, pago), (n, h, v) in zip(totales.index, totales.itertuples(index=False, name=None)):
+            self.meses.setdefault(mes, {})[(area, empleado, tipo, pago)] = [int(n), float(h), float(v)]
+
+    def consultar(self, agrupar_por=("area", "empleado"), desde_mes=None, hasta_mes=None, **filtros):
+        """
+        Totales agrupados, con las horas diurnas y nocturnas en columnas separadas.
+
+        Args:
+            agrupar_por (tuple): Dimensiones de DIMENSIONES por las que se agrupa.
+            desde_mes, hasta_mes (str, optional): Meses "AAAA-MM" incluidos.
+            **filtros: area, empleado, tipo y/o pago con el valor exacto a incluir.
+
+        Returns:
+            list: Un diccionario por grupo, ordenados por las dimensiones de agrupación.
+        """
+        for dimension in tuple(agrupar_por) + tuple(filtros):
+            if dimension not in DIMENSIONES:
+                raise ValueError(f"Dimensión desconocida: {dimension}")
+        grupos = {}
+        for mes in sorted(self.meses):
+            if (desde_mes and mes < desde_mes) or (hasta_mes and mes > hasta_mes):
+                continue
+            for clave, (n, horas, valor) in self.meses[mes].items():
+                fila = dict(zip(DIMENSIONES, (mes,) + clave))
+                if any(fila[d] != v for d, v in filtros.items()):
+                    continue
+                grupo = tuple(fila[d] for d in agrupar_por)
+                total = grupos.get(grupo)
+                if total is None:
+                    total = grupos[grupo] = [0, 0.0, 0.0, 0.0]
+                total[0] += n
+                total[1 if fila["tipo"] == "diurnas" else 2] += horas
+                total[3] += valor
+        return [
+            {**dict(zip(agrupar_por, grupo)), "registros": n, "horas_diurnas": round(diurnas, 2),
+             "horas_nocturnas": round(nocturnas, 2), "valor": round(valor)}
+            for grupo, (n, diurnas, nocturnas, valor) in sorted(grupos.items())
+        ]
+
+    def a_json(self):
+        return {
+            "tarifas": self.tabla.huella(),
+            "posiciones": self.posiciones,
+            "meses": {mes: [list(clave) + total for clave, total in claves.items()] for mes, claves in self.meses.items()},
+        }
+
+    @classmethod
+    def desde_json(cls, datos, tabla):
+        acumulados = cls(tabla)
+        acumulados.posiciones = datos["posiciones"]
+        acumulados.meses = {
+            mes: {tuple(fila[:4]): fila[4:] for fila in filas} for mes, filas in datos["meses"].items()
+        }
+        return acumulados
+
+
+_lock = threading.Lock()
+_acumulados = None
+
+
+def _leer_guardados(tabla):
+    try:
+        with open(ARCHIVO_ACUMULADOS, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if datos.get("tarifas") != tabla.huella():
+        return None
+    return AcumuladosNomina.desde_json(datos, tabla)
+
+
+def _guardar(acumulados):
+    carpeta = os.path.dirname(os.path.abspath(ARCHIVO_ACUMULADOS))
+    descriptor, temporal = tempfile.mkstemp(prefix=os.path.basename(ARCHIVO_ACUMULADOS) + ".", suffix=".tmp", dir=carpeta)
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            # json.dumps usa el codificador en C; json.dump directo al archivo no
+            f.write(json.dumps(acumulados.a_json(), ensure_ascii=False, separators=(",", ":")))
+        os.replace(temporal, ARCHIVO_ACUMULADOS)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+# Historial completo con las posiciones finales de cada archivo
+def _recalcular(tabla):
+    with medir("nomina.recalcular"):
+        acumulados = AcumuladosNomina(tabla)
+        registros = []
+        for archivo in FUENTES:
+            nuevos, acumulados.posiciones[archivo], _ = almacen.leer_registros_desde(archivo)
+            registros.extend(nuevos)
+        acumulados.recalcular(registros)
+    return acumulados
+
+
+# Sumar lo que se agregó a cada archivo desde la última lectura. Devuelve si hubo
+# cambios, o None si algún archivo se reescribió y hay que recalcular todo.
+def _ponerse_al_dia(acumulados):
+    cambio = False
+    for archivo in FUENTES:
+        nuevos, posicion, completo = almacen.leer_registros_desde(archivo, acumulados.posiciones.get(archivo))
+        if completo:
+            return None
+        if nuevos or posicion != acumulados.posiciones.get(archivo):
+            acumulados.agregar(nuevos)
+            acumulados.posiciones[archivo] = posicion
+            cambio = True
+    return cambio
+
+
+def acumulados(guardar=True):
+    """
+    Acumulados de nómina al día con los archivos de registros. La primera llamada del
+    proceso parte de ARCHIVO_ACUMULADOS; las siguientes solo leen los registros nuevos.
+
+    Args:
+        guardar (bool, optional): Guardar ARCHIVO_ACUMULADOS si hubo cambios.
+
+    Returns:
+        AcumuladosNomina: Acumulados compartidos por el proceso (no modificar).
+    """
+    global _acumulados
+    with _lock:
+        tabla = tarifas()
+        actual = _acumulados if _acumulados is not None and _acumulados.tabla is tabla else _leer_guardados(tabla)
+        cambio = _ponerse_al_dia(actual) if actual is not None else None
+        if cambio is None:
+            actual, cambio = _recalcular(tabla), True
+        _acumulados = actual
+        if cambio and guardar:
+            _guardar(actual)
+        return actual
+
+
+# Llamada después de registrar horas extra: suma los registros nuevos solo si los
+# acumulados ya están en memoria (si no, se leerán al consultarlos)
+def actualizar_si_cargados():
+    if _acumulados is not None:
+        acumulados(guardar=False)
+
+
+# Recalcular todo desde el historial (después de corregir registros a mano)
+def recalcular():
+    global _acumulados
+    with _lock:
+        _acumulados = _recalcular(tarifas())
+        _guardar(_acumulados)
+        return _acumulados
+
+
+def reporte_mensual(mes, agrupar_por=("area", "empleado"), **filtros):
+    """
+    Liquidación de horas extra de un mes a partir de los acumulados.
+
+    Args:
+        mes (str|date): Mes "AAAA-MM" (o una fecha del mes).
+        agrupar_por (tuple, optional): Dimensiones de agrupación (ver AcumuladosNomina.consultar).
+        **filtros: area, empleado, tipo y/o pago.
+
+    Returns:
+        list: Un diccionario por grupo con registros, horas diurnas, horas nocturnas y valor.
+    """
+    mes = str(mes)[:7]
+    with medir("nomina.reporte_mensual"):
+        return acumulados().consultar(agrupar_por, desde_mes=mes, hasta_mes=mes, **filtros)
@@ -0,0 +1,361 @@
+import random
+from collections import defaultdict
+
+import numpy as np
+
+from instrumentacion import instrumentado
+from procesamiento_turnos import DESCUENTO_ALIMENTACION, semanas_por_columna
+from schedule_matrix import Schedule, etiqueta_turno
+from scheduler import MAX_DESCANSOS_POR_DIA, dias_programables
+
+# Motor de programación por restricciones, alternativo a la rotación por grupos de
+# scheduler.asignar_turnos_matriz. Cada semana cada empleado tiene un horario de lunes a
+# viernes, como en la rotación, pero la asignación busca:
+#   - cobertura mínima de empleados por horario y día (restricción dura),
+#   - máximo de horas por semana por empleado (se cumple con días de descanso),
+#   - reparto parejo de horarios, sábados trabajados y descansos entre empleados.
+# Se resuelve con una asignación de costo mínimo por semana, una asignación voraz de
+# descansos y una búsqueda local que mejora el resultado hasta que no mejora más o se
+# agotan las pasadas dadas. Las pasadas (no el tiempo) acotan el trabajo, así el resultado
+# depende solo de los parámetros y la semilla, no de la velocidad de la máquina.
+MAX_HORAS_SEMANA = 48
+MAX_PASADAS = 50
+
+TURNO_DESCANSO = "DESCANSO"
+TURNO_DIA_LIBRE = "DIA LIBRE"
+TURNO_SIN_HORARIO = "SIN HORARIO"
+
+
+def _como_lista(horarios):
+    if not horarios:
+        return []
+    return list(horarios) if isinstance(horarios, list) else [horarios]
+
+
+# Cuántos empleados van a cada horario en una semana: primero la cobertura mínima y el
+# resto repartido hacia los horarios menos usados en lo que va del mes
+def _cupos(n, cobertura, usados):
+    k = len(cobertura)
+    cupos = np.zeros(k, dtype=np.int64)
+    disponibles = n
+    for s in np.argsort(-cobertura, kind="stable"):
+        cupos[s] = min(cobertura[s], disponibles)
+        disponibles -= cupos[s]
+    total = usados + cupos
+    for _ in range(disponibles):
+        s = int(np.argmin(total))
+        cupos[s] += 1
+        total[s] += 1
+    return cupos
+
+
+# Asignar un horario a cada empleado respetando los cupos, con costo = semanas que el
+# empleado ya tuvo ese horario. Asignación voraz y luego intercambios entre pares
+# mientras bajen el costo, hasta max_pasadas pasadas.
+def _asignar_horarios(uso, cupos, rng, max_pasadas):
+    n, k = uso.shape
+    orden = sorted(((uso[e, s], rng.random(), e, s) for e in range(n) for s in range(k)))
+    asignacion = np.full(n, -1, dtype=np.int64)
+    restantes = cupos.copy()
+    for _, _, e, s in orden:
+        if asignacion[e] == -1 and restantes[s] > 0:
+            asignacion[e] = s
+            restantes[s] -= 1
+
+    mejoro = True
+    pasadas = 0
+    while mejoro and pasadas < max_pasadas:
+        mejoro = False
+        pasadas += 1
+        costo_actual = uso[np.arange(n), asignacion]
+        for e1 in range(n):
+            s1 = asignacion[e1]
+            # Intercambio con el empleado que más ahorra
+            ahorro = costo_actual[e1] + costo_actual - uso[e1, asignacion] - uso[np.arange(n), s1]
+            e2 = int(np.argmax(ahorro))
+            if ahorro[e2] > 0:
+                asignacion[e1], asignacion[e2] = asignacion[e2], s1
+                costo_actual[e1] = uso[e1, asignacion[e1]]
+                costo_actual[e2] = uso[e2, asignacion[e2]]
+                mejoro = True
+    return asignacion
+
+
+@instrumentado("scheduler.optimizador")
+def asignar_turnos_optimizados(empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False,
+                               horario_sabado=None, horario_viernes=None, cobertura_minima=None,
+                               cobertura_sabado=None, max_horas_semana=MAX_HORAS_SEMANA, descansos_por_mes=1,
+                               max_pasadas=MAX_PASADAS, semilla=0):
+    """
+    Programa el mes con restricciones de cobertura, horas y equidad.
+
+    Args:
+        empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes:
+            Igual que en scheduler.asignar_turnos_matriz.
+        cobertura_minima (dict, optional): {nombre del horario: mínimo de empleados por día}.
+        cobertura_sabado (int, optional): Empleados que deben trabajar cada sábado. Por defecto todos;
+                                          los demás quedan con "DIA LIBRE", repartiendo los sábados.
+        max_horas_semana (float, optional): Máximo de horas laboradas (sin alimentación) por semana.
+                                            Si se supera, se asignan días de descanso en esa semana.
+        descansos_por_mes (int, optional): Descansos al mes por empleado cuando trabajan sábados.
+        max_pasadas (int, optional): Pasadas máximas de cada búsqueda local (intercambios de
+                                     horarios por semana y movimientos de descansos).
+        semilla (int, optional): Semilla para desempatar; la misma semilla da el mismo resultado.
+
+    Returns:
+        Schedule: Matriz empleados x días con los códigos de turno. Si las restricciones no
+                  se pueden cumplir todas, la programación es la más cercana que se encontró
+                  y schedule.infracciones dice cuáles no se cumplen.
+    """
+    rng = random.Random(semilla)
+
+    dias_por_semana = dias_programables(year, month, trabajan_sabado)
+    schedule = Schedule(empleados, sorted(d for dias in dias_por_semana.values() for d in dias))
+    n = len(schedule.empleados)
+    if n == 0 or not horarios_lunes_a_viernes or not schedule.fechas:
+        return schedule
+    catalogo = schedule.catalogo
+
+    codigos_lv = np.array([catalogo.codigo(h) for h in horarios_lunes_a_viernes])
+    codigos_viernes = [catalogo.codigo(h) for h in _como_lista(horario_viernes)]
+    codigos_sabado = [catalogo.codigo(h) for h in _como_lista(horario_sabado)] or [catalogo.codigo(TURNO_SIN_HORARIO)]
+    codigo_dia_libre = catalogo.codigo(TURNO_DIA_LIBRE)
+    cobertura_minima = cobertura_minima or {}
+    cobertura = np.array([int(cobertura_minima.get(etiqueta_turno(h), 0)) for h in horarios_lunes_a_viernes])
+
+    uso = np.zeros((n, len(codigos_lv)))
+    sabados = np.zeros(n, dtype=np.int64)
+
+    # 1. Horario de cada empleado por semana y sábados
+    for semana_idx, semana in enumerate(sorted(dias_por_semana)):
+        asignacion = _asignar_horarios(uso, _cupos(n, cobertura, uso.sum(axis=0)), rng, max_pasadas)
+        uso[np.arange(n), asignacion] += 1
+        for dia in dias_por_semana[semana]:
+            columna = schedule.indice_fecha[dia]
+            if dia.weekday() == 4 and codigos_viernes:
+                schedule.codigos[:, columna] = np.array(codigos_viernes)[asignacion % len(codigos_viernes)]
+            elif dia.weekday() == 5:
+                requeridos = n if cobertura_sabado is None else min(int(cobertura_sabado), n)
+                # Trabajan el sábado quienes menos sábados llevan
+                orden = sorted(range(n), key=lambda e: (sabados[e], rng.random()))
+                trabajan = np.zeros(n, dtype=bool)
+                trabajan[orden[:requeridos]] = True
+                sabados[trabajan] += 1
+                schedule.codigos[:, columna] = np.where(
+                    trabajan, codigos_sabado[semana_idx % len(codigos_sabado)], codigo_dia_libre
+                )
+            else:
+                schedule.codigos[:, columna] = codigos_lv[asignacion]
+
+    # 2. Descansos
+    _ProgramadorDescansos(
+        schedule, codigos_lv, cobertura, cobertura_sabado, max_horas_semana, rng
+    ).asignar(descansos_por_mes if trabajan_sabado else 0, max_pasadas)
+    schedule.infracciones = infracciones(schedule, cobertura_minima, cobertura_sabado, max_horas_semana)
+    return schedule
+
+
+class _ProgramadorDescansos:
+    def __init__(self, schedule, codigos_lv, cobertura, cobertura_sabado, max_horas_semana, rng):
+        self.schedule = schedule
+        self.rng = rng
+        self.max_horas_semana = max_horas_semana
+        catalogo = schedule.catalogo
+        self.codigo_descanso = catalogo.codigo(TURNO_DESCANSO)
+        no_laborables = {TURNO_DESCANSO, TURNO_DIA_LIBRE, TURNO_SIN_HORARIO}
+        # Última posición: SIN_TURNO
+        self.laborable = np.array([e.upper() not in no_laborables for e in catalogo.etiquetas] + [False])
+        self.horas_codigo = np.append(np.maximum(catalogo.horas_array() - DESCUENTO_ALIMENTACION, 0), 0.0)
+
+        _, semanas, self.semana_idx = semanas_por_columna(schedule.fechas)
+        self.n_semanas = len(semanas)
+        self.columnas_semana = [np.flatnonzero(self.semana_idx == s) for s in range(self.n_semanas)]
+        self.descansos_por_dia = np.zeros(len(schedule.fechas), dtype=np.int64)
+        # Turnos antes de los descansos, para devolver el turno al mover un descanso
+        self.base = schedule.codigos.copy()
+
+        # Mínimo de empleados trabajando por código y día (solo horarios de lunes a viernes y sábados)
+        self.minimo_por_codigo = defaultdict(int)
+        for codigo, minimo in zip(codigos_lv, cobertura):
+            self.minimo_por_codigo[int(codigo)] = max(self.minimo_por_codigo[int(codigo)], int(minimo))
+        self.minimo_sabado = int(cobertura_sabado or 0)
+        self.es_sabado = np.array([f.weekday() == 5 for f in schedule.fechas])
+
+    def _horas_semana(self, fila, semana):
+        return self.horas_codigo[self.schedule.codigos[fila, self.columnas_semana[semana]]].sum()
+
+    # Se puede quitar al empleado de ese día sin dejar el horario por debajo de la cobertura
+    def _cubre(self, fila, columna):
+        codigos = self.schedule.codigos[:, columna]
+        codigo = codigos[fila]
+        if self.es_sabado[columna]:
+            return self.laborable[codigos].sum() - 1 >= self.minimo_sabado
+        minimo = self.minimo_por_codigo.get(int(codigo), 0)
+        return minimo == 0 or (codigos == codigo).sum() - 1 >= minimo
+
+    def _candidatas(self, fila, columnas, respetar_maximo=True):
+        return [
+            c for c in columnas
+            if self.laborable[self.schedule.codigos[fila, c]] and self._cubre(fila, c)
+            and (not respetar_maximo or self.descansos_por_dia[c] < MAX_DESCANSOS_POR_DIA)
+        ]
+
+    def _descansar(self, fila, columna):
+        self.schedule.codigos[fila, columna] = self.codigo_descanso
+        self.descansos_por_dia[columna] += 1
+
+    def _elegir(self, fila, columnas, respetar_maximo=True):
+        candidatas = self._candidatas(fila, columnas, respetar_maximo)
+        if not candidatas:
+            return None
+        return min(candidatas, key=lambda c: (self.descansos_por_dia[c], -self.horas_codigo[self.schedule.codigos[fila, c]], c))
+
+    def asignar(self, descansos_por_mes, max_pasadas):
+        filas = list(range(len(self.schedule.empleados)))
+        self.rng.shuffle(filas)
+
+        # Semanas por encima del máximo de horas: descansar hasta quedar dentro del máximo
+        for fila in filas:
+            for semana in range(self.n_semanas):
+                while self._horas_semana(fila, semana) > self.max_horas_semana:
+                    # Primero respetando el máximo de descansos por día; si no hay opción, el
+                    # día menos cargado (el máximo de horas pesa más)
+                    columnas = self.columnas_semana[semana]
+                    columna = self._elegir(fila, columnas)
+                    if columna is None:
+                        columna = self._elegir(fila, columnas, respetar_maximo=False)
+                    if columna is None:
+                        break
+                    self._descansar(fila, columna)
+
+        # Descansos del mes, prefiriendo las semanas de 6 días (como la rotación)
+        for fila in filas:
+            faltan = descansos_por_mes - int((self.schedule.codigos[fila] == self.codigo_descanso).sum())
+            for _ in range(max(faltan, 0)):
+                semanas = sorted(
+                    range(self.n_semanas),
+                    key=lambda s: (-self.laborable[self.schedule.codigos[fila, self.columnas_semana[s]]].sum(), s),
+                )
+                columna = None
+                for respetar_maximo in (True, False):
+                    for semana in semanas:
+                        columna = self._elegir(fila, self.columnas_semana[semana], respetar_maximo)
+                        if columna is not None:
+                            break
+                    if columna is not None:
+                        self._descansar(fila, columna)
+                        break
+
+        self._mejorar(max_pasadas)
+
+    # Búsqueda local: mover descansos dentro de la misma semana hacia días menos cargados
+    def _mejorar(self, max_pasadas):
+        filas, columnas = np.nonzero(self.schedule.codigos == self.codigo_descanso)
+        descansos = list(zip(filas.tolist(), columnas.tolist()))
+        if not descansos:
+            return
+        for _ in range(max_pasadas):
+            mejoro = False
+            self.rng.shuffle(descansos)
+            for i, (fila, columna) in enumerate(descansos):
+                semana = self.semana_idx[columna]
+                mejor = None
+                for c in self._candidatas(fila, self.columnas_semana[semana]):
+                    if self.descansos_por_dia[c] + 1 < self.descansos_por_dia[columna]:
+                        if mejor is None or self.descansos_por_dia[c] < self.descansos_por_dia[mejor]:
+                            mejor = c
+                if mejor is None:
+                    continue
+                # Mover: el día anterior recupera su turno; se deshace si la semana pasa del máximo
+                self.schedule.codigos[fila, columna] = self.base[fila, columna]
+                self.schedule.codigos[fila, mejor] = self.codigo_descanso
+                if self._horas_semana(fila, semana) > self.max_horas_semana:
+                    self.schedule.codigos[fila, mejor] = self.base[fila, mejor]
+                    self.schedule.codigos[fila, columna] = self.codigo_descanso
+                    continue
+                self.descansos_por_dia[columna] -= 1
+                self.descansos_por_dia[mejor] += 1
+                descansos[i] = (fila, mejor)
+                mejoro = True
+            if not mejoro:
+                return
+
+
+def evaluar_programacion(schedule, cobertura_minima=None, cobertura_sabado=None, max_horas_semana=MAX_HORAS_SEMANA):
+    """
+    Revisa una programación (de cualquier motor) contra las restricciones.
+
+    Returns:
+        dict: faltantes_cobertura (lista de (fecha, horario, mínimo, asignados)),
+              semanas_sobre_maximo (lista de (empleado, semana ISO, horas)),
+              max_descansos_en_un_dia, y el rango (mínimo, máximo) por empleado de
+              sabados_trabajados y descansos.
+    """
+    catalogo = schedule.catalogo
+    codigos = schedule.codigos
+    etiquetas = np.array(catalogo.etiquetas + [""], dtype=object)
+    faltantes = []
+    cobertura_minima = cobertura_minima or {}
+    # La cobertura de los horarios de lunes a viernes se revisa en los días en que se usan
+    # (no en los viernes con horario propio ni en los sábados)
+    en_uso = np.isin(etiquetas[codigos], list(cobertura_minima)).any(axis=0) if cobertura_minima else None
+    for etiqueta, minimo in cobertura_minima.items():
+        asignados = (etiquetas[codigos] == etiqueta).sum(axis=0)
+        for columna, fecha in enumerate(schedule.fechas):
+            if fecha.weekday() < 5 and en_uso[columna] and asignados[columna] < minimo:
+                faltantes.append((fecha.strftime("%Y-%m-%d"), etiqueta, minimo, int(asignados[columna])))
+
+    no_laborables = {TURNO_DESCANSO, TURNO_DIA_LIBRE, TURNO_SIN_HORARIO, ""}
+    laborable = np.array([e.upper() not in no_laborables for e in etiquetas])
+    es_sabado = np.array([f.weekday() == 5 for f in schedule.fechas], dtype=bool)
+    if cobertura_sabado:
+        for columna in np.flatnonzero(es_sabado):
+            trabajando = int(laborable[codigos[:, columna]].sum())
+            if trabajando < cobertura_sabado:
+                faltantes.append((schedule.fechas[columna].strftime("%Y-%m-%d"), "Sábado", int(cobertura_sabado), trabajando))
+
+    horas_codigo = np.append(np.maximum(catalogo.horas_array() - DESCUENTO_ALIMENTACION, 0), 0.0)
+    semanas, semanas_unicas, semana_idx = semanas_por_columna(schedule.fechas)
+    horas = horas_codigo[codigos]
+    sobre_maximo = []
+    for s, semana in enumerate(semanas_unicas):
+        horas_semana = horas[:, semana_idx == s].sum(axis=1)
+        for fila in np.flatnonzero(horas_semana > max_horas_semana):
+            sobre_maximo.append((schedule.empleados[fila], int(semana), float(horas_semana[fila])))
+
+    es_descanso = etiquetas[codigos] == TURNO_DESCANSO
+    sabados = laborable[codigos][:, es_sabado].sum(axis=1) if len(schedule.empleados) else np.zeros(0)
+    descansos = es_descanso.sum(axis=1)
+
+    def rango(valores):
+        return (int(valores.min()), int(valores.max())) if len(valores) else (0, 0)
+
+    return {
+        "faltantes_cobertura": faltantes,
+        "semanas_sobre_maximo": sobre_maximo,
+        "max_descansos_en_un_dia": int(es_descanso.sum(axis=0).max()) if es_descanso.size else 0,
+        "sabados_trabajados": rango(sabados),
+        "descansos": rango(descansos),
+    }
+
+
+# Restricciones que una programación no cumple, como textos para mostrar (lista vacía si
+# las cumple todas): cobertura, máximo de horas por semana y máximo de descansos por día
+def infracciones(schedule, cobertura_minima=None, cobertura_sabado=None, max_horas_semana=MAX_HORAS_SEMANA):
+    evaluacion = evaluar_programacion(schedule, cobertura_minima, cobertura_sabado, max_horas_semana)
+    textos = [
+        f"{fecha}: {horario} con {asignados} empleados (mínimo {minimo})"
+        for fecha, horario, minimo, asignados in evaluacion["faltantes_cobertura"]
+    ]
+    textos += [
+        f"{empleado}: {horas:g} horas en la semana {semana} (máximo {max_horas_semana:g})"
+        for empleado, semana, horas in evaluacion["semanas_sobre_maximo"]
+    ]
+    if evaluacion["max_descansos_en_un_dia"] > MAX_DESCANSOS_POR_DIA:
+        etiquetas = np.array(schedule.catalogo.etiquetas + [""], dtype=object)
+        descansos = (etiquetas[schedule.codigos] == TURNO_DESCANSO).sum(axis=0)
+        textos += [
+            f"{schedule.fechas[columna].strftime('%Y-%m-%d')}: {int(descansos[columna])} descansos (máximo {MAX_DESCANSOS_POR_DIA})"
+            for columna in np.flatnonzero(descansos > MAX_DESCANSOS_POR_DIA)
+        ]
+    return textos
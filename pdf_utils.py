@@ -0,0 +1,132 @@
+import os
+from functools import lru_cache
+
+from fpdf import FPDF
+
+from instrumentacion import instrumentado
+from plantillas_correo import detalle_tiempo_permiso
+
+# Membrete de las cartas. El repositorio lo trae en la raíz y en images/.
+NOMBRES_MEMBRETE = ("plantillaSM.png", "PlantillaSM.png", os.path.join("images", "PlantillaSM.png"))
+_CARPETA_MODULO = os.path.dirname(os.path.abspath(__file__))
+
+
+# Ruta del membrete: primero en la carpeta de trabajo y luego junto a este archivo
+@lru_cache(maxsize=1)
+def ruta_membrete():
+    for carpeta in (os.getcwd(), _CARPETA_MODULO):
+        for nombre in NOMBRES_MEMBRETE:
+            ruta = os.path.join(carpeta, nombre)
+            if os.path.exists(ruta):
+                return ruta
+    raise FileNotFoundError("No se encontró el membrete (PlantillaSM.png)")
+
+
+# El PNG se lee y decodifica una sola vez por proceso; cada documento reutiliza el resultado.
+# _parsepng e images son de fpdf 1.7 (versión fijada en requirements.txt); con otra versión
+# que no los tenga, cada documento carga la imagen con image() como cualquier otra.
+@lru_cache(maxsize=1)
+def _membrete():
+    parsear = getattr(FPDF(), "_parsepng", None)
+    return parsear(ruta_membrete()) if parsear is not None else None
+
+
+# Documento con el membrete en cada página. Dentro de un mismo documento la imagen
+# se guarda una sola vez y todas las páginas la referencian.
+class DocumentoCarta(FPDF):
+    def __init__(self):
+        super().__init__()
+        ruta = ruta_membrete()
+        membrete = _membrete()
+        if membrete is not None and isinstance(getattr(self, "images", None), dict):
+            self.images[ruta] = dict(membrete, i=len(self.images) + 1)
+        self._ruta_membrete = ruta
+
+    def header(self):
+        self.image(self._ruta_membrete, x=0, y=0, w=210, h=297)
+
+    def nueva_carta(self):
+        self.add_page()
+        self.set_font("Arial", size=12)
+
+    def bytes(self):
+        return self.output(dest='S').encode('latin1')
+
+
+def _escribir_dia_familia(pdf, registros):
+    pdf.cell(0, 10, "Solicitud Día de la Familia", ln=True, align="C")
+    pdf.ln(10)
+    pdf.multi_cell(0, 10, "Cordial saludo,\nSe informa que se ha solicitado el día de la familia para los siguientes empleados:")
+    pdf.ln(5)
+    for r in registros:
+        pdf.cell(0, 10, f"Empleado: {r['empleado']}", ln=True)
+        pdf.cell(0, 10, f"Área: {r.get('area','')}", ln=True)
+        pdf.cell(0, 10, f"Fecha solicitada: {r['fecha']}", ln=True)
+
+        pdf.ln(5)
+    pdf.ln(5)
+    pdf.multi_cell(0, 10, "Quedamos atentos a cualquier comentario o requerimiento adicional.")
+    pdf.cell(0, 10, "Atentamente,\nÁrea de TI", ln=True)
+
+
+def _escribir_permiso(pdf, registro):
+    pdf.cell(0, 10, "Solicitud de Permiso", ln=True, align="C")
+    pdf.ln(10)
+
+    # Texto principal
+    pdf.multi_cell(0, 10, f"Cordial saludo,\nSe informa que se ha solicitado un permiso para el empleado {registro['nombre']}.")
+    pdf.ln(5)
+
+    detalle_tiempo = detalle_tiempo_permiso(registro["tipo"])
+    pdf.cell(0, 10, f"Fecha solicitada: {registro['fecha']}", ln=True)
+    pdf.cell(0, 10, f"Tipo de permiso: {registro['tipo']}{detalle_tiempo}", ln=True)
+
+    # Motivo si aplica
+    if registro.get("pe_motivo"):
+        pdf.multi_cell(0, 10, f"Motivo del permiso especial: {registro['pe_motivo']}")
+
+    pdf.ln(5)
+    pdf.multi_cell(0, 10, "Quedamos atentos a cualquier comentario o requerimiento adicional.")
+    pdf.cell(0, 10, "Atentamente,", ln=True)
+    pdf.cell(0, 10, "Área de TI", ln=True)
+
+
+def _generar_cartas(cartas, escribir, un_documento):
+    if un_documento:
+        pdf = DocumentoCarta()
+        for carta in cartas:
+            pdf.nueva_carta()
+            escribir(pdf, carta)
+        return pdf.bytes()
+    documentos = []
+    for carta in cartas:
+        pdf = DocumentoCarta()
+        pdf.nueva_carta()
+        escribir(pdf, carta)
+        documentos.append(pdf.bytes())
+    return documentos
+
+
+@instrumentado("pdf.permiso")
+def generar_pdfs_permiso(registros, un_documento=True):
+    """
+    Genera las cartas de varias solicitudes de permiso en una sola pasada.
+
+    Args:
+        registros (list): Registros de permiso (ver extras.generar_pdf_permiso).
+        un_documento (bool, optional): Si es True, devuelve un solo PDF con una carta por
+                                       página; si es False, una lista con un PDF por carta.
+    """
+    return _generar_cartas(registros, _escribir_permiso, un_documento)
+
+
+@instrumentado("pdf.dia_familia")
+def generar_pdfs_dia_familia(cartas, un_documento=True):
+    """
+    Genera varias cartas de Día de la Familia en una sola pasada.
+
+    Args:
+        cartas (list): Lista de cartas; cada carta es la lista de registros que incluye.
+        un_documento (bool, optional): Igual que en generar_pdfs_permiso.
+    """
+    return _generar_cartas(cartas, _escribir_dia_familia, un_documento)
@@ -0,0 +1,214 @@
+import html
+from string import Formatter
+
+# Plantillas de los correos. Cada plantilla se separa una sola vez en partes fijas y
+# campos, y el cuerpo se arma con un solo "".join en lugar de concatenar con +=.
+
+
+class Plantilla:
+    def __init__(self, texto):
+        # Lista de (texto fijo, campo, formato); campo es None al final del texto
+        self.partes = [
+            (literal, campo, formato or "")
+            for literal, campo, formato, _ in Formatter().parse(texto)
+        ]
+
+    def partes_render(self, valores):
+        for literal, campo, formato in self.partes:
+            yield literal
+            if campo is not None:
+                yield format(valores[campo], formato)
+
+    def render(self, **valores):
+        return "".join(self.partes_render(valores))
+
+
+# Horas extra
+HORAS_EXTRA_ENCABEZADO = "<p>Cordial saludo,<br><br>Se han registrado las siguientes horas extra:</p><ul>"
+HORAS_EXTRA_ITEM_TIEMPO = Plantilla(
+    "<li>"
+    "<b>{empleado}</b> | "
+    "Área: <b>{area}</b> | "
+    "Pago: <b>Tiempo</b> | "
+    "Fecha: <b>{fecha}</b> | "
+    "Tiempo {tipo}: <b>{tiempo}</b> | "
+    "Total: <b>No aplica valor monetario</b>"
+    "</li>"
+)
+HORAS_EXTRA_ITEM_VALOR = Plantilla(
+    "<li>"
+    "<b>{empleado}</b> | "
+    "Área: <b>{area}</b> | "
+    "Pago: <b>{pago}</b> | "
+    "Fecha: <b>{fecha}</b> | "
+    "Tiempo {tipo}: <b>{tiempo}</b> | "
+    "Total: <b>${total:,.0f}</b>"
+    "</li>"
+)
+HORAS_EXTRA_PIE = Plantilla(
+    "</ul>"
+    "<p><b>Total a pagar: ${total_general:,.0f}</b><br>"
+    "Fecha de registro: <b>{fecha_registro}</b><br><br>"
+    "\n\nQuedamos atentos a cualquier comentario o requerimiento adicional."
+    "\n\nAtentamente,\nÁrea de TI"
+)
+
+# Días de la familia (texto plano)
+DIA_FAMILIA_ENCABEZADO = "Cordial saludo,\n\nSe han solicitado los siguientes Días de la Familia:\n"
+DIA_FAMILIA_ITEM = Plantilla(
+    "\n- {empleado} | Área: {area} | Fecha: {fecha} | Correo empleado: {correo} | Correo Jefe: {correo_jefe} | Firma: {firma}"
+)
+DIA_FAMILIA_PIE = Plantilla(
+    "\n\nFecha de registro: {fecha_registro}"
+    "\n\nQuedamos atentos a cualquier comentario o requerimiento adicional."
+    "\n\nAtentamente,\nÁrea de TI"
+)
+
+PIE_HTML = """
+    <p>Quedamos atentos a cualquier comentario o requerimiento adicional.</p>
+    <p>Atentamente,<br>Área de TI</p>"""
+
+PERMISO = Plantilla("""<h3>Solicitud de Permiso</h3>
+    <p>Cordial saludo,<br>
+    Se informa que se ha solicitado un permiso para el empleado <b>{nombre}</b>.<br>
+    Fecha solicitada: <b>{fecha}</b><br>
+    Tipo de permiso: <b>{tipo}{detalle_tiempo}</b></p>
+    <p>Correo del empleado: <b>{correo}</b></p>  <!-- Correo del empleado -->""")
+PERMISO_MOTIVO = Plantilla("<p>Motivo del permiso especial: <b>{pe_motivo}</b></p>")
+
+VACACIONES = Plantilla("""<h3>Solicitud de Vacaciones</h3>
+    <p>Cordial saludo,<br>
+    Se informa que el empleado <b>{nombre}</b> ha solicitado sus vacaciones.<br>
+    Fecha solicitada: <b>{fecha_inicio}</b> hasta <b>{fecha_fin}</b><br>
+    <p>Correo del empleado: <b>{correo_em}</b></p>  <!-- Correo del empleado -->"""
+    # El espacio antes del salto de línea venía en el cuerpo original
+    " \n    ")
+
+# email_utils
+NOTIFICACION_HORAS_EXTRA = Plantilla("""<h3>Registro de horas extra</h3>
+    <p>Empleado: <b>{nombre}</b><br>
+    Fecha: <b>{fecha}</b><br>
+    Horas: <b>{horas}</b></p>""")
+NOTIFICACION_DIA_FAMILIA = Plantilla("""<h3>Solicitud de Día de la Familia</h3>
+    <p>Empleado: <b>{nombre}</b><br>
+    Fecha: <b>{fecha}</b></p>""")
+NOTIFICACION_INCAPACIDAD = Plantilla("""<h3>Incapacidad registrada</h3>
+    <p>Empleado: <b>{nombre}</b><br>
+    Fecha: <b>{fecha}</b><br>
+    Área Personal: <b>{area_pe}</b></p>""")
+
+# Resumen de varias notificaciones para un mismo destinatario
+RESUMEN_ENCABEZADO = Plantilla(
+    "<p>Cordial saludo,<br><br>Se agrupan las siguientes {cantidad} notificaciones "
+    "registradas desde {desde}:</p>"
+)
+RESUMEN_ITEM = Plantilla("<hr><h4>{asunto}</h4>\n{cuerpo}\n")
+RESUMEN_ITEM_TEXTO = Plantilla("<hr><h4>{asunto}</h4>\n<p>{cuerpo}</p>\n")
+RESUMEN_ASUNTO = Plantilla("Resumen de notificaciones ({cantidad})")
+
+
+# Horas y minutos exactos, p. ej. "2h 30m"
+def texto_tiempo(horas_int, minutos):
+    partes = []
+    if horas_int > 0:
+        partes.append(f"{horas_int}h")
+    if minutos > 0:
+        partes.append(f"{minutos}m")
+    return " ".join(partes)
+
+
+def cuerpo_horas_extra(registros, valor_registro, fecha_registro):
+    """
+    Cuerpo HTML del correo de horas extra. Los registros con pago en "Tiempo" no
+    suman valor monetario.
+
+    Args:
+        registros (list): Registros de horas extra.
+        valor_registro (callable): Valor a pagar de un registro (ver nomina.valor_registro).
+        fecha_registro (str): Fecha y hora del registro, para el pie del correo.
+
+    Returns:
+        str: Cuerpo del correo.
+    """
+    partes = [HORAS_EXTRA_ENCABEZADO]
+    total_general = 0
+    for r in registros:
+        valores = {
+            "empleado": r["empleado"],
+            "area": r.get("area", "N/A"),
+            "pago": r.get("pago", "N/A"),
+            "fecha": r["fecha"],
+            "tipo": r["tipo"],
+            "tiempo": texto_tiempo(r["horas_int"], r["minutos"]),
+        }
+        if r.get("pago") == "Tiempo":
+            partes.extend(HORAS_EXTRA_ITEM_TIEMPO.partes_render(valores))
+            continue
+        valores["total"] = valor_registro(r)
+        total_general += valores["total"]
+        partes.extend(HORAS_EXTRA_ITEM_VALOR.partes_render(valores))
+    partes.extend(HORAS_EXTRA_PIE.partes_render({"total_general": total_general, "fecha_registro": fecha_registro}))
+    return "".join(partes)
+
+
+def cuerpo_dia_familia(registros, fecha_registro):
+    partes = [DIA_FAMILIA_ENCABEZADO]
+    for r in registros:
+        partes.extend(DIA_FAMILIA_ITEM.partes_render({
+            "empleado": r["empleado"],
+            "area": r.get("area", "N/A"),
+            "fecha": r["fecha"],
+            "correo": r["correo"],
+            "correo_jefe": r["correo_jefe"],
+            "firma": r["firma"],
+        }))
+    partes.extend(DIA_FAMILIA_PIE.partes_render({"fecha_registro": fecha_registro}))
+    return "".join(partes)
+
+
+# Detalle del tiempo según el tipo de permiso (también se usa en el PDF)
+def detalle_tiempo_permiso(tipo):
+    if tipo == "Medio dia":
+        return " (aproximadamente 4 horas)"
+    if tipo == "Cita medica":
+        return " (tiempo estimado: en minutos u horas según cita)"
+    return ""
+
+
+def cuerpo_permiso(registro):
+    partes = list(PERMISO.partes_render({
+        "nombre": registro["nombre"],
+        "fecha": registro["fecha"],
+        "tipo": registro["tipo"],
+        "detalle_tiempo": detalle_tiempo_permiso(registro["tipo"]),
+        "correo": registro["correo"],
+    }))
+    if registro.get("pe_motivo"):
+        partes.extend(PERMISO_MOTIVO.partes_render(registro))
+    partes.append(PIE_HTML)
+    return "".join(partes)
+
+
+def cuerpo_vacaciones(registro):
+    return VACACIONES.render(
+        nombre=registro["nombre"],
+        fecha_inicio=registro["fecha_inicio"],
+        fecha_fin=registro["fecha_fin"],
+        correo_em=registro["correo_em"],
+    ) + PIE_HTML
+
+
+# Un solo correo con todas las notificaciones pendientes de un destinatario.
+# notificaciones es una lista de (asunto, cuerpo) en orden de llegada.
+def cuerpo_resumen(notificaciones, desde):
+    partes = list(RESUMEN_ENCABEZADO.partes_render({"cantidad": len(notificaciones), "desde": desde}))
+    for asunto, cuerpo in notificaciones:
+        valores = {"asunto": html.escape(asunto), "cuerpo": cuerpo}
+        if cuerpo.lstrip().startswith("<"):
+            partes.extend(RESUMEN_ITEM.partes_render(valores))
+        else:
+            # Cuerpo en texto plano (días de la familia): en HTML se perderían los saltos de línea
+            valores["cuerpo"] = html.escape(cuerpo).replace("\n", "<br>")
+            partes.extend(RESUMEN_ITEM_TEXTO.partes_render(valores))
+    partes.append(PIE_HTML)
+    return "".join(partes)
@@ -0,0 +1,176 @@
+import numpy as np
+from datetime import date, datetime
+
+from instrumentacion import instrumentado
+from schedule_matrix import SIN_TURNO
+
+DIAS_SEMANA = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+# Tiempo de almuerzo y desayuno que se descuenta de cada turno (en horas)
+DESCUENTO_ALIMENTACION = 0.75
+ALMUERZO = "30 minutos"
+DESAYUNO = "15 minutos"
+# Turnos con los que se reemplazan los días con novedades
+TURNO_DIA_FAMILIA = "Día de la Familia"
+TURNO_VACACIONES = "Vacaciones"
+TURNO_DESCANSO_MANUAL = "Descanso"
+TURNOS_NOVEDAD = (TURNO_DIA_FAMILIA, TURNO_VACACIONES, TURNO_DESCANSO_MANUAL)
+
+
+def _a_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor), "%Y-%m-%d").date()
+
+
+# Catálogo con los turnos de las novedades. Si el de la programación no los tiene todos,
+# se completan en una copia (los códigos existentes no cambian): la programación, que puede
+# estar compartida en la caché de la aplicación, no se modifica.
+def catalogo_con_novedades(catalogo):
+    if all(catalogo.buscar(turno) is not None for turno in TURNOS_NOVEDAD):
+        return catalogo
+    copia = catalogo.copia()
+    for turno in TURNOS_NOVEDAD:
+        copia.codigo(turno)
+    return copia
+
+
+def aplicar_novedades(schedule, dias_familia=None, vacaciones=None, descansos=None, catalogo=None):
+    """
+    Aplica las novedades (día de la familia, vacaciones y descansos manuales) sobre
+    una copia de la matriz de códigos. Solo se modifican los días en que el empleado
+    tiene turno; si una fecha tiene varias novedades, prevalece el descanso manual,
+    luego las vacaciones y por último el día de la familia. Ni la matriz ni el catálogo
+    de la programación se modifican.
+
+    Args:
+        schedule (Schedule): Programación generada por el scheduler.
+        dias_familia (dict, optional): {empleado: fecha}.
+        vacaciones (dict, optional): {empleado: (inicio, fin)}, ambas fechas incluidas.
+        descansos (dict, optional): {empleado: [fechas]}, fechas como date o "YYYY-MM-DD".
+        catalogo (CatalogoTurnos, optional): catalogo_con_novedades(schedule.catalogo), si ya
+                                             se calculó.
+
+    Returns:
+        numpy.ndarray: Matriz de códigos con las novedades aplicadas, con los códigos de
+                       catalogo_con_novedades(schedule.catalogo).
+    """
+    codigos = schedule.codigos.copy()
+    if catalogo is None:
+        catalogo = catalogo_con_novedades(schedule.catalogo)
+    con_turno = codigos != SIN_TURNO
+
+    # Día de la familia: tabla de (fila, columna)
+    if dias_familia:
+        celdas = [
+            (schedule.indice_empleado[e], schedule.indice_fecha[_a_fecha(f)])
+            for e, f in dias_familia.items()
+            if e in schedule.indice_empleado and _a_fecha(f) in schedule.indice_fecha
+        ]
+        _marcar_celdas(codigos, con_turno, celdas, catalogo.buscar(TURNO_DIA_FAMILIA))
+
+    # Vacaciones: tabla de intervalos por fila comparada contra el vector de fechas
+    if vacaciones:
+        filas = [schedule.indice_empleado[e] for e in vacaciones if e in schedule.indice_empleado]
+        if filas:
+            intervalos = [vacaciones[e] for e in vacaciones if e in schedule.indice_empleado]
+            inicios = np.array([_a_fecha(i) for i, _ in intervalos], dtype="datetime64[D]")
+            fines = np.array([_a_fecha(f) for _, f in intervalos], dtype="datetime64[D]")
+            fechas = np.asarray(schedule.fechas, dtype="datetime64[D]")
+            en_vacaciones = (fechas[None, :] >= inicios[:, None]) & (fechas[None, :] <= fines[:, None])
+            en_vacaciones &= con_turno[filas]
+            bloque = codigos[filas]
+            bloque[en_vacaciones] = catalogo.buscar(TURNO_VACACIONES)
+            codigos[filas] = bloque
+
+    # Descansos manuales: tabla de (fila, columna)
+    if descansos:
+        celdas = [
+            (schedule.indice_empleado[e], schedule.indice_fecha[_a_fecha(f)])
+            for e, fechas in descansos.items() if e in schedule.indice_empleado
+            for f in fechas if _a_fecha(f) in schedule.indice_fecha
+        ]
+        _marcar_celdas(codigos, con_turno, celdas, catalogo.buscar(TURNO_DESCANSO_MANUAL))
+
+    return codigos
+
+
+def _marcar_celdas(codigos, con_turno, celdas, codigo):
+    if not celdas:
+        return
+    filas, columnas = np.array(celdas, dtype=np.intp).T
+    marcar = con_turno[filas, columnas]
+    codigos[filas[marcar], columnas[marcar]] = codigo
+
+
+@instrumentado("turnos.procesar")
+def procesar_turnos(schedule, dias_familia=None, vacaciones=None, descansos=None):
+    """
+    Convierte una programación en la tabla de turnos que se muestra y descarga en
+    la aplicación: aplica las novedades y calcula el día de la semana, la semana ISO,
+    las horas laboradas (descontando alimentación) y el total de horas por semana,
+    todo sobre la matriz de códigos.
+
+    Returns:
+        pandas.DataFrame: Columnas Empleado, Fecha, Turno, Horas Laboradas, Almuerzo,
+                          Desayuno, Día, Semana y Horas Semana.
+    """
+    catalogo = catalogo_con_novedades(schedule.catalogo)
+    return tabla_turnos(schedule, aplicar_novedades(schedule, dias_familia, vacaciones, descansos, catalogo), catalogo)
+
+
+# Horas laboradas por celda (descontando alimentación); 0 en las celdas sin turno
+def horas_laboradas(catalogo, codigos):
+    # La última posición corresponde a SIN_TURNO
+    horas_por_codigo = np.append(catalogo.horas_array(), 0.0)
+    horas = np.maximum(horas_por_codigo[codigos] - DESCUENTO_ALIMENTACION, 0)
+    horas[codigos == SIN_TURNO] = 0
+    return horas
+
+
+# Semana ISO de cada columna y su posición entre las semanas del mes
+def semanas_por_columna(fechas):
+    semanas = np.array([f.isocalendar()[1] for f in fechas], dtype=np.int64)
+    semanas_unicas, semana_idx = np.unique(semanas, return_inverse=True)
+    return semanas, semanas_unicas, semana_idx
+
+
+# Total de horas por empleado y semana (una columna por semana de semanas_por_columna)
+def horas_por_semana(horas, semana_idx, n_semanas):
+    columnas_por_semana = np.zeros((horas.shape[-1], n_semanas))
+    columnas_por_semana[np.arange(horas.shape[-1]), semana_idx] = 1
+    return horas @ columnas_por_semana
+
+
+# Tabla de turnos de procesar_turnos a partir de una matriz de códigos ya con novedades
+# (del catálogo dado; por defecto, el de la programación)
+def tabla_turnos(schedule, codigos, catalogo=None):
+    import pandas as pd
+
+    catalogo = catalogo if catalogo is not None else schedule.catalogo
+    horas = horas_laboradas(catalogo, codigos)
+    con_turno = codigos != SIN_TURNO
+
+    # Datos por columna: texto de la fecha, día de la semana y semana ISO
+    fechas_str = np.array([f.strftime("%Y-%m-%d") for f in schedule.fechas], dtype=object)
+    dias_str = np.array([DIAS_SEMANA[f.weekday()] for f in schedule.fechas], dtype=object)
+    semanas, semanas_unicas, semana_idx = semanas_por_columna(schedule.fechas)
+
+    # Total de horas por empleado y semana, repartido de nuevo a cada celda
+    horas_semana_celda = horas_por_semana(horas, semana_idx, len(semanas_unicas))[:, semana_idx]
+
+    filas, columnas = np.nonzero(con_turno)
+    return pd.DataFrame({
+        "Empleado": pd.Categorical.from_codes(filas, categories=pd.Index(schedule.empleados, dtype=object)),
+        "Fecha": fechas_str[columnas],
+        "Turno": pd.Categorical.from_codes(
+            codigos[filas, columnas], categories=pd.Index(catalogo.etiquetas, dtype=object)
+        ),
+        "Horas Laboradas": horas[filas, columnas],
+        "Almuerzo": ALMUERZO,
+        "Desayuno": DESAYUNO,
+        "Día": dias_str[columnas],
+        "Semana": semanas[columnas],
+        "Horas Semana": horas_semana_celda[filas, columnas],
+    })
@@ -0,0 +1,247 @@
+import json
+import os
+import re
+from datetime import datetime
+
+from batch_scheduler import generar_lote, rango_meses
+from empleados import EMPLEADOS_POR_AREA, directorio, normalizar_nombre
+from excel_export import exportar_turnos_excel, hojas_lote
+from motores_turnos import MOTOR_ROTACION, programar_turnos
+
+# Núcleo de la programación de turnos, sin Streamlit: horarios disponibles, novedades,
+# generación de varias áreas y meses, y escritura de los resultados en Excel, PDF y JSON.
+# Lo usan la aplicación (app.py, cache_app.py) y la línea de comandos (cli_turnos.py).
+# Las dependencias de cada formato (xlsxwriter, el PDF) se cargan solo al exportar.
+
+HORARIOS_PREDEFINIDOS = [
+    {"nombre": "7:00 AM - 16:00 PM", "horas": 9.0},
+    {"nombre": "7:30 AM - 16:15 PM", "horas": 8.75},
+    {"nombre": "7:30 AM - 17:00 PM", "horas": 9.5},
+    {"nombre": "8:00 AM - 12:00 PM", "horas": 4.0},
+    {"nombre": "7:30 AM - 17:15 PM", "horas": 9.75},
+    {"nombre": "8:00 AM - 11:30 AM", "horas": 3.5},
+    {"nombre": "8:00 AM - 13:00 PM", "horas": 5.0},
+    {"nombre": "8:00 AM - 14:00 PM", "horas": 6.0},
+    {"nombre": "8:00 AM - 15:00 PM", "horas": 7.0},
+    {"nombre": "8:00 AM - 16:00 PM", "horas": 8.0},
+    {"nombre": "8:00 AM - 16:45 PM", "horas": 8.75},
+    {"nombre": "8:00 AM - 16:30 PM", "horas": 8.5},
+    {"nombre": "8:00 AM - 17:00 PM", "horas": 9.0},
+    {"nombre": "8:00 AM - 17:30 PM", "horas": 9.5},
+    {"nombre": "8:00 AM - 18:00 PM", "horas": 10.0},
+    {"nombre": "9:00 AM - 12:30 PM", "horas": 3.5},
+    {"nombre": "9:00 AM - 14:00 PM", "horas": 5.0},
+    {"nombre": "9:00 AM - 18:00 PM", "horas": 9.0},
+    {"nombre": "9:30 AM - 18:00 PM", "horas": 8.5},
+    {"nombre": "10:00 AM - 18:00 PM", "horas": 8.0}
+]
+HORARIOS_POR_NOMBRE = {h["nombre"]: h for h in HORARIOS_PREDEFINIDOS}
+# Formatos de salida de exportar y la extensión de su archivo
+FORMATOS = {"excel": "xlsx", "pdf": "pdf", "json": "json"}
+# Columnas de la tabla de turnos que se guardan en el JSON
+COLUMNAS_JSON = ["Empleado", "Fecha", "Día", "Turno", "Horas Laboradas", "Semana", "Horas Semana"]
+
+
+# Horarios predefinidos a partir de sus nombres (ValueError si alguno no existe)
+def horarios_por_nombre(nombres):
+    desconocidos = [n for n in nombres if n not in HORARIOS_POR_NOMBRE]
+    if desconocidos:
+        raise ValueError(f"Horarios desconocidos: {', '.join(desconocidos)}")
+    return [HORARIOS_POR_NOMBRE[n] for n in nombres]
+
+
+# Programación base (rotación y descansos, sin novedades) de una solicitud con el
+# formato de cache_app.clave_programacion
+def programar(entradas):
+    return programar_turnos(
+        entradas.get("motor", MOTOR_ROTACION),
+        entradas["empleados"],
+        entradas["year"],
+        entradas["month"],
+        entradas["horarios_lunes_a_viernes"],
+        entradas["trabajan_sabado"],
+        entradas["horario_sabado"],
+        entradas["horario_viernes"],
+        **entradas.get("restricciones", {}),
+    )
+
+
+def _fecha(valor, empleado):
+    try:
+        return datetime.strptime(str(valor), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Fecha inválida para {empleado}: {valor!r} (se espera AAAA-MM-DD)") from None
+
+
+# Nombre del empleado como está en el directorio (sin importar tildes ni mayúsculas)
+def _nombre_canonico(nombre):
+    empleado = directorio().buscar(nombre)
+    return empleado.nombre if empleado is not None else nombre.strip()
+
+
+def leer_novedades(datos):
+    """
+    Convierte las novedades de un archivo JSON al formato de procesar_turnos:
+
+        {
+            "dias_familia": {"Empleado": "2025-07-04"},
+            "vacaciones": {"Empleado": ["2025-07-07", "2025-07-18"]},
+            "descansos": {"Empleado": ["2025-07-10", "2025-07-24"]}
+        }
+
+    Todas las claves son opcionales. Los nombres se buscan en el directorio de empleados
+    y las novedades que no caen en el mes programado se ignoran.
+
+    Args:
+        datos (dict): Contenido del archivo.
+
+    Returns:
+        dict: {"dias_familia": {empleado: date}, "vacaciones": {empleado: (date, date)},
+               "descansos": {empleado: [date]}}.
+    """
+    desconocidas = set(datos) - {"dias_familia", "vacaciones", "descansos"}
+    if desconocidas:
+        raise ValueError(f"Novedades desconocidas: {', '.join(sorted(desconocidas))}")
+
+    novedades = {"dias_familia": {}, "vacaciones": {}, "descansos": {}}
+    for empleado, fecha in datos.get("dias_familia", {}).items():
+        novedades["dias_familia"][_nombre_canonico(empleado)] = _fecha(fecha, empleado)
+    for empleado, rango in datos.get("vacaciones", {}).items():
+        if len(rango) != 2:
+            raise ValueError(f"Las vacaciones de {empleado} deben ser [inicio, fin]")
+        inicio, fin = _fecha(rango[0], empleado), _fecha(rango[1], empleado)
+        if fin < inicio:
+            raise ValueError(f"Las vacaciones de {empleado} terminan antes de empezar")
+        novedades["vacaciones"][_nombre_canonico(empleado)] = (inicio, fin)
+    for empleado, fechas in datos.get("descansos", {}).items():
+        if isinstance(fechas, str):
+            fechas = [fechas]
+        novedades["descansos"][_nombre_canonico(empleado)] = [_fecha(f, empleado) for f in fechas]
+    return novedades
+
+
+# Novedades desde un archivo JSON (ver leer_novedades)
+def cargar_novedades(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return leer_novedades(json.load(f))
+
+
+def generar(desde, hasta, horarios_lunes_a_viernes, trabajan_sabado=False, horario_sabado=None,
+            horario_viernes=None, areas=None, motor=MOTOR_ROTACION, restricciones=None, max_workers=None):
+    """
+    Programa varias áreas y meses (ver batch_scheduler.generar_lote).
+
+    Args:
+        desde (tuple): (año, mes) del primer mes.
+        hasta (tuple): (año, mes) del último mes, incluido.
+        horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes:
+            Igual que en scheduler.asignar_turnos_matriz.
+        areas (list, optional): Áreas del directorio de empleados. Por defecto, todas.
+        motor (str, optional): Motor de programación (ver motores_turnos).
+        restricciones (dict, optional): Parámetros propios del motor.
+        max_workers (int, optional): Número de procesos. Con 1 se ejecuta en el mismo proceso.
+
+    Returns:
+        dict: {(área, año, mes): Schedule}.
+    """
+    if areas is not None:
+        desconocidas = [a for a in areas if a not in EMPLEADOS_POR_AREA]
+        if desconocidas:
+            raise ValueError(f"Áreas desconocidas: {', '.join(desconocidas)}")
+    meses = rango_meses(desde, hasta)
+    if not meses:
+        raise ValueError("El mes final es anterior al mes inicial")
+    return generar_lote(
+        meses, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes,
+        areas=areas, max_workers=max_workers, motor=motor, restricciones=restricciones,
+    )
+
+
+# Tablas de turnos (título, DataFrame de procesar_turnos) de los resultados de generar,
+# con las novedades aplicadas. Se calculan una vez para todos los formatos.
+def tablas(resultados, novedades=None):
+    return list(hojas_lote(resultados, novedades))
+
+
+# Una programación (área y mes) tal como se guarda en el JSON
+def _programacion_json(area, year, month, df):
+    # Por columnas con tolist (tipos de Python) en lugar de DataFrame.to_dict por filas
+    columnas = [df[c].tolist() for c in COLUMNAS_JSON]
+    return {
+        "area": area,
+        "year": int(year),
+        "month": int(month),
+        "turnos": [dict(zip(COLUMNAS_JSON, fila)) for fila in zip(*columnas)],
+    }
+
+
+def _escribir_json(salida, resultados, hojas):
+    programaciones = [
+        _programacion_json(area, year, month, df) for (area, year, month), (_, df) in zip(resultados, hojas)
+    ]
+    json.dump({"generado": datetime.now().isoformat(timespec="seconds"), "programaciones": programaciones},
+              salida, ensure_ascii=False)
+
+
+def guardar_programacion(area, year, month, df, carpeta="."):
+    """
+    Guarda la programación de un área y un mes (la tabla de la aplicación) como JSON
+    turnos_AAAA-MM_<área>.json, el formato de exportar, para que validacion_horas_extra
+    revise las horas extra contra ella. El nombre queda después del turnos_AAAA-MM.json de
+    cli_turnos.py, así que para esa área y mes vale lo guardado desde la aplicación.
+
+    Args:
+        area (str): Área de trabajo.
+        year (int): Año.
+        month (int): Mes.
+        df (pandas.DataFrame): Tabla de turnos con las columnas de COLUMNAS_JSON.
+        carpeta (str, optional): Carpeta de salida (se crea si no existe).
+
+    Returns:
+        str: Ruta del archivo escrito.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    nombre_area = re.sub(r"[^a-z0-9]+", "_", normalizar_nombre(area)).strip("_")
+    ruta = os.path.join(carpeta, f"turnos_{int(year)}-{int(month):02d}_{nombre_area}.json")
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"generado": datetime.now().isoformat(timespec="seconds"),
+                   "programaciones": [_programacion_json(area, year, month, df)]}, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def exportar(resultados, hojas, carpeta, nombre, formatos=tuple(FORMATOS), subtitulo=""):
+    """
+    Escribe las tablas de turnos en los formatos pedidos. Cada archivo se escribe
+    primero con otro nombre y se renombra al terminar, así quien lo lea (otro proceso,
+    una tarea programada) nunca ve un archivo a medias.
+
+    Args:
+        resultados (dict): Resultado de generar.
+        hojas (list): Resultado de tablas(resultados, ...), en el mismo orden.
+        carpeta (str): Carpeta de salida (se crea si no existe).
+        nombre (str): Nombre de los archivos, sin extensión.
+        formatos (iterable, optional): Claves de FORMATOS.
+        subtitulo (str, optional): Subtítulo de las páginas del PDF.
+
+    Returns:
+        list: Rutas de los archivos escritos.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = []
+    for formato in formatos:
+        ruta = os.path.join(carpeta, f"{nombre}.{FORMATOS[formato]}")
+        temporal = ruta + ".tmp"
+        if formato == "excel":
+            exportar_turnos_excel(temporal, hojas)
+        elif formato == "pdf":
+            from reporte_horas_extra import exportar_pdf_turnos
+
+            exportar_pdf_turnos(temporal, hojas, subtitulo)
+        else:
+            with open(temporal, "w", encoding="utf-8") as f:
+                _escribir_json(f, resultados, hojas)
+        os.replace(temporal, ruta)
+        rutas.append(ruta)
+    return rutas
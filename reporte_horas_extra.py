@@ -0,0 +1,344 @@
+import zlib
+from functools import lru_cache
+from itertools import chain
+
+from instrumentacion import instrumentado
+from extras import ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS, almacen
+from nomina import tarifas, valor_registro
+
+# Exportación del historial de horas extra a un PDF con tabla paginada.
+# Los registros se leen uno por uno y cada página se escribe en el archivo de salida
+# apenas se llena, así la memoria no depende de cuántos registros se exporten
+# (FPDF guarda todas las páginas en memoria hasta el final, por eso aquí se escribe
+# el PDF directamente).
+
+# Página A4 vertical, en puntos
+ANCHO_PAGINA = 595.28
+ALTO_PAGINA = 841.89
+MARGEN = 40
+ALTO_FILA = 14
+TAMANO_LETRA = 9
+
+# (título, ancho, alineación)
+COLUMNAS = (
+    ("Fecha", 62, "L"),
+    ("Empleado", 150, "L"),
+    ("Área", 90, "L"),
+    ("Tipo", 58, "L"),
+    ("Pago", 55, "L"),
+    ("Horas", 45, "R"),
+    ("Valor", 55, "R"),
+)
+# Tabla de la programación de turnos (exportar_pdf_turnos)
+COLUMNAS_TURNOS = (
+    ("Empleado", 150, "L"),
+    ("Fecha", 62, "L"),
+    ("Día", 60, "L"),
+    ("Turno", 130, "L"),
+    ("Horas", 55, "R"),
+    ("Horas Semana", 58, "R"),
+)
+COLUMNAS_SUBTOTAL = (
+    ("Registros", 55, "R"),
+    ("Horas diurnas", 80, "R"),
+    ("Horas nocturnas", 80, "R"),
+    ("Valor", 80, "R"),
+)
+
+_FUENTES = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+
+def _texto_pdf(texto):
+    texto = texto.encode("latin-1", "replace").decode("latin-1")
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+# Anchos de los caracteres de cada fuente (las tablas de fpdf se cargan al primer uso)
+@lru_cache(maxsize=None)
+def _anchos(fuente):
+    from fpdf.fonts import fpdf_charwidths
+
+    return fpdf_charwidths[{"F1": "helvetica", "F2": "helveticaB"}[fuente]]
+
+
+def _ancho_texto(texto, fuente, tamano):
+    anchos = _anchos(fuente)
+    return sum(anchos.get(c, 556) for c in texto) * tamano / 1000
+
+
+# Recortar el texto para que quepa en la columna
+def _ajustar(texto, ancho, fuente, tamano):
+    if _ancho_texto(texto, fuente, tamano) <= ancho:
+        return texto
+    while texto and _ancho_texto(texto + "...", fuente, tamano) > ancho:
+        texto = texto[:-1]
+    return texto + "..."
+
+
+class EscritorPDF:
+    """
+    PDF mínimo que escribe cada página en el archivo de salida al terminarla.
+    En memoria solo quedan la página actual y la posición de cada objeto (para la tabla xref).
+
+    Args:
+        salida: Archivo binario abierto para escritura.
+    """
+
+    # Objetos fijos; las páginas se numeran desde el 5
+    _CATALOGO, _PAGINAS, _FUENTE_NORMAL, _FUENTE_NEGRITA = 1, 2, 3, 4
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.posiciones = {}
+        self.paginas = []
+        self.siguiente_objeto = 5
+        self.contenido = None
+        self.numero_pagina = 0
+        self.posicion = 0
+        self._escribir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _escribir(self, datos):
+        self.salida.write(datos)
+        self.posicion += len(datos)
+
+    def _objeto(self, numero, cuerpo):
+        self.posiciones[numero] = self.posicion
+        self._escribir(b"%d 0 obj\n" % numero + cuerpo + b"\nendobj\n")
+
+    def nueva_pagina(self):
+        self.terminar_pagina()
+        self.contenido = []
+        self.numero_pagina += 1
+
+    def texto(self, x, y, texto, fuente="F1", tamano=TAMANO_LETRA):
+        # y se mide desde arriba, como en FPDF
+        self.contenido.append(
+            "BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (fuente, tamano, x, ALTO_PAGINA - y, _texto_pdf(texto))
+        )
+
+    def linea(self, x1, y1, x2, y2):
+        self.contenido.append(
+            "%.2f %.2f m %.2f %.2f l S" % (x1, ALTO_PAGINA - y1, x2, ALTO_PAGINA - y2)
+        )
+
+    def terminar_pagina(self):
+        if self.contenido is None:
+            return
+        datos = zlib.compress("\n".join(self.contenido).encode("latin-1"))
+        numero_contenido = self.siguiente_objeto
+        numero_pagina = numero_contenido + 1
+        self.siguiente_objeto += 2
+        self._objeto(
+            numero_contenido,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(datos) + datos + b"\nendstream",
+        )
+        self._objeto(
+            numero_pagina,
+            (
+                "<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+                "/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+                % (self._PAGINAS, ANCHO_PAGINA, ALTO_PAGINA, self._FUENTE_NORMAL, self._FUENTE_NEGRITA, numero_contenido)
+            ).encode("latin-1"),
+        )
+        self.paginas.append(numero_pagina)
+        self.contenido = None
+
+    def cerrar(self):
+        if not self.paginas and self.contenido is None:
+            self.nueva_pagina()
+        self.terminar_pagina()
+        for numero, nombre in ((self._FUENTE_NORMAL, "F1"), (self._FUENTE_NEGRITA, "F2")):
+            self._objeto(
+                numero,
+                ("<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % _FUENTES[nombre]).encode("latin-1"),
+            )
+        hijos = " ".join("%d 0 R" % p for p in self.paginas)
+        self._objeto(self._PAGINAS, ("<< /Type /Pages /Kids [%s] /Count %d >>" % (hijos, len(self.paginas))).encode("latin-1"))
+        self._objeto(self._CATALOGO, b"<< /Type /Catalog /Pages %d 0 R >>" % self._PAGINAS)
+
+        total = self.siguiente_objeto
+        inicio_xref = self.posicion
+        lineas = [b"xref\n0 %d\n" % total, b"0000000000 65535 f \n"]
+        lineas.extend(b"%010d 00000 n \n" % self.posiciones[n] for n in range(1, total))
+        self._escribir(b"".join(lineas))
+        self._escribir(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (total, self._CATALOGO, inicio_xref))
+
+
+class _TablaPaginada:
+    def __init__(self, pdf, titulo, subtitulo):
+        self.pdf = pdf
+        self.titulo = titulo
+        self.subtitulo = subtitulo
+        self.columnas = None
+        self.y = None
+
+    def _encabezado_pagina(self):
+        self.pdf.nueva_pagina()
+        self.pdf.texto(MARGEN, MARGEN + 12, self.titulo, "F2", 14)
+        self.pdf.texto(MARGEN, MARGEN + 28, self.subtitulo, "F1", 9)
+        self.pdf.texto(ANCHO_PAGINA - MARGEN - 50, ALTO_PAGINA - MARGEN / 2, f"Página {self.pdf.numero_pagina}", "F1", 8)
+        self.y = MARGEN + 50
+
+    def _encabezado_columnas(self):
+        self._fila([c[0] for c in self.columnas], "F2")
+        self.pdf.linea(MARGEN, self.y - ALTO_FILA + 4, ANCHO_PAGINA - MARGEN, self.y - ALTO_FILA + 4)
+
+    def _fila(self, valores, fuente="F1"):
+        x = MARGEN
+        for valor, (_, ancho, alineacion) in zip(valores, self.columnas):
+            texto = _ajustar(str(valor), ancho - 4, fuente, TAMANO_LETRA)
+            if alineacion == "R":
+                posicion = x + ancho - 4 - _ancho_texto(texto, fuente, TAMANO_LETRA)
+            else:
+                posicion = x
+            self.pdf.texto(posicion, self.y, texto, fuente)
+            x += ancho
+        self.y += ALTO_FILA
+
+    # Empezar una sección con otras columnas; si no cabe, pasa a una página nueva
+    def columnas_nuevas(self, columnas, titulo_seccion=None):
+        self.columnas = columnas
+        if self.y is None or self.y + 4 * ALTO_FILA > ALTO_PAGINA - MARGEN:
+            self._encabezado_pagina()
+        if titulo_seccion:
+            self.y += ALTO_FILA / 2
+            self.pdf.texto(MARGEN, self.y, titulo_seccion, "F2", 11)
+            self.y += ALTO_FILA
+        self._encabezado_columnas()
+
+    def fila(self, valores, fuente="F1"):
+        if self.y + ALTO_FILA > ALTO_PAGINA - MARGEN:
+            self._encabezado_pagina()
+            self._encabezado_columnas()
+        self._fila(valores, fuente)
+
+
+# Registros de horas extra (diurnas y nocturnas) de un rango de fechas y, opcionalmente, de un área
+def registros_horas_extra(desde=None, hasta=None, area=None):
+    desde = str(desde) if desde is not None else None
+    hasta = str(hasta) if hasta is not None else None
+    # Con la base de datos el filtro lo hacen los índices
+    if hasattr(almacen, "registros_filtrados"):
+        yield from almacen.registros_filtrados((ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS), desde, hasta, area)
+        return
+    for r in chain(almacen.leer_registros(ARCHIVO_HORAS_EXTRA), almacen.leer_registros(ARCHIVO_HORAS_EXTRA_NOCTURNAS)):
+        fecha = str(r.get("fecha", ""))
+        if desde is not None and fecha < desde:
+            continue
+        if hasta is not None and fecha > hasta:
+            continue
+        if area is not None and r.get("area") != area:
+            continue
+        yield r
+
+
+def _acumular(subtotales, clave, r, valor):
+    s = subtotales.get(clave)
+    if s is None:
+        s = subtotales[clave] = [0, 0.0, 0.0, 0.0]
+    s[0] += 1
+    s[1 if r["tipo"] == "diurnas" else 2] += r["horas"]
+    s[3] += valor
+
+
+def _filas_subtotal(subtotales):
+    for clave in sorted(subtotales, key=lambda c: str(c)):
+        registros, diurnas, nocturnas, valor = subtotales[clave]
+        yield (clave or "Sin área", registros, f"{diurnas:,.2f}", f"{nocturnas:,.2f}", f"${valor:,.0f}")
+
+
+@instrumentado("pdf.historial_horas_extra")
+def exportar_pdf_horas_extra(salida, desde=None, hasta=None, area=None, registros=None):
+    """
+    Escribe el historial de horas extra en un PDF con una tabla paginada y, al final,
+    los subtotales por empleado y por área.
+
+    Args:
+        salida: Ruta del archivo o archivo binario abierto para escritura.
+        desde (date|str, optional): Primera fecha incluida.
+        hasta (date|str, optional): Última fecha incluida.
+        area (str, optional): Exportar solo esta área.
+        registros (iterable, optional): Registros a exportar; por defecto se leen del almacén
+                                        con registros_horas_extra(desde, hasta, area).
+
+    Returns:
+        int: Número de registros exportados.
+    """
+    if isinstance(salida, str):
+        with open(salida, "wb") as f:
+            return exportar_pdf_horas_extra(f, desde, hasta, area, registros)
+
+    if registros is None:
+        registros = registros_horas_extra(desde, hasta, area)
+
+    rango = f"Desde: {desde or 'inicio'}  Hasta: {hasta or 'hoy'}  Área: {area or 'Todas'}"
+    pdf = EscritorPDF(salida)
+    tabla = _TablaPaginada(pdf, "Historial de Horas Extra", rango)
+    tabla.columnas_nuevas(COLUMNAS)
+
+    tarifas_vigentes = tarifas()
+    por_empleado = {}
+    por_area = {}
+    cantidad = 0
+    for r in registros:
+        valor = valor_registro(r, tarifas_vigentes)
+        tabla.fila((
+            r.get("fecha", ""),
+            r.get("empleado", ""),
+            r.get("area") or "",
+            r.get("tipo", ""),
+            r.get("pago") or "",
+            f"{r['horas']:,.2f}",
+            f"${valor:,.0f}",
+        ))
+        _acumular(por_empleado, r.get("empleado", ""), r, valor)
+        _acumular(por_area, r.get("area"), r, valor)
+        cantidad += 1
+
+    tabla.columnas_nuevas((("Empleado", 220, "L"),) + COLUMNAS_SUBTOTAL, "Subtotales por empleado")
+    for fila in _filas_subtotal(por_empleado):
+        tabla.fila(fila)
+
+    tabla.columnas_nuevas((("Área", 220, "L"),) + COLUMNAS_SUBTOTAL, "Subtotales por área")
+    for fila in _filas_subtotal(por_area):
+        tabla.fila(fila)
+    total = [sum(s[i] for s in por_area.values()) for i in range(4)]
+    tabla.fila(("Total general", total[0], f"{total[1]:,.2f}", f"{total[2]:,.2f}", f"${total[3]:,.0f}"), "F2")
+
+    pdf.cerrar()
+    return cantidad
+
+
+# La misma tabla paginada sirve para la programación de turnos (una sección por tabla)
+@instrumentado("pdf.turnos")
+def exportar_pdf_turnos(salida, hojas, subtitulo=""):
+    """
+    Escribe una o varias tablas de turnos en un PDF, una sección por tabla.
+
+    Args:
+        salida: Ruta del archivo o archivo binario abierto para escritura.
+        hojas (iterable): Pares (título de la sección, DataFrame de procesar_turnos),
+                          igual que en excel_export.exportar_turnos_excel.
+        subtitulo (str, optional): Texto debajo del título de cada página.
+
+    Returns:
+        int: Número de filas (turnos) exportadas.
+    """
+    if isinstance(salida, str):
+        with open(salida, "wb") as f:
+            return exportar_pdf_turnos(f, hojas, subtitulo)
+
+    pdf = EscritorPDF(salida)
+    tabla = _TablaPaginada(pdf, "Programación de Turnos", subtitulo)
+    cantidad = 0
+    columnas = ["Empleado", "Fecha", "Día", "Turno", "Horas Laboradas", "Horas Semana"]
+    for titulo, df in hojas:
+        tabla.columnas_nuevas(COLUMNAS_TURNOS, titulo)
+        for empleado, fecha, dia, turno, horas, horas_semana in df[columnas].itertuples(index=False, name=None):
+            tabla.fila((empleado, fecha, dia, turno, f"{horas:,.2f}", f"{horas_semana:,.2f}"))
+            cantidad += 1
+    if tabla.y is None:  # Sin tablas: una página con el encabezado
+        tabla.columnas_nuevas(COLUMNAS_TURNOS)
+
+    pdf.cerrar()
+    return cantidad
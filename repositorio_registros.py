@@ -0,0 +1,222 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import almacen_registros
+from configuracion import ARCHIVOS_REGISTROS, entorno
+from instrumentacion import instrumentado
+
+# Base de datos local con todos los registros (horas extra, días de la familia,
+# permisos, vacaciones). Ofrece las mismas funciones que almacen_registros
+# (leer_registros, agregar_registros, reescribir_registros) más consultas por
+# empleado, área, fecha y tipo que usan índices en lugar de recorrer los archivos.
+ARCHIVO_BD = entorno("ARCHIVO_BD_REGISTROS", "registros.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS registros (
+    id INTEGER PRIMARY KEY,
+    coleccion TEXT NOT NULL,
+    tipo TEXT,
+    empleado TEXT,
+    fecha TEXT,
+    area TEXT,
+    horas REAL,
+    datos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_registros_empleado_fecha ON registros (empleado, fecha);
+CREATE INDEX IF NOT EXISTS idx_registros_area_fecha ON registros (area, fecha, horas);
+CREATE INDEX IF NOT EXISTS idx_registros_tipo ON registros (tipo);
+CREATE INDEX IF NOT EXISTS idx_registros_coleccion ON registros (coleccion, id);
+CREATE INDEX IF NOT EXISTS idx_registros_coleccion_fecha ON registros (coleccion, fecha);
+CREATE TABLE IF NOT EXISTS colecciones (
+    nombre TEXT PRIMARY KEY,
+    importada_en TEXT NOT NULL
+);
+"""
+
+_local = threading.local()
+# Bases (rutas) en las que ya se importaron todas las colecciones conocidas en este proceso
+_importadas = set()
+_candado_importadas = threading.Lock()
+
+
+# Conexión propia de cada hilo (Streamlit atiende cada sesión en un hilo)
+def conexion(ruta=None):
+    ruta = ruta or ARCHIVO_BD
+    conexiones = getattr(_local, "conexiones", None)
+    if conexiones is None:
+        conexiones = _local.conexiones = {}
+    con = conexiones.get(ruta)
+    if con is None:
+        con = sqlite3.connect(ruta, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.executescript(_ESQUEMA)
+        conexiones[ruta] = con
+    return con
+
+
+# Nombre de la colección de un archivo de registros (horas_extra.json -> horas_extra)
+def nombre_coleccion(archivo):
+    return os.path.splitext(os.path.basename(archivo))[0]
+
+
+def _fila(coleccion, registro):
+    return (
+        coleccion,
+        registro.get("tipo") or coleccion,
+        registro.get("empleado") or registro.get("nombre"),
+        str(registro["fecha"]) if registro.get("fecha") is not None else registro.get("fecha_inicio"),
+        registro.get("area"),
+        registro.get("horas"),
+        json.dumps(registro, ensure_ascii=False),
+    )
+
+
+# Importar una sola vez los registros existentes en los archivos JSON/JSONL
+def _importar_si_hace_falta(con, archivo):
+    coleccion = nombre_coleccion(archivo)
+    if con.execute("SELECT 1 FROM colecciones WHERE nombre = ?", (coleccion,)).fetchone():
+        return coleccion
+    # BEGIN IMMEDIATE toma el candado de escritura antes de revisar, para que dos
+    # sesiones o procesos no importen la misma colección al tiempo
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        if not con.execute("SELECT 1 FROM colecciones WHERE nombre = ?", (coleccion,)).fetchone():
+            con.executemany(
+                "INSERT INTO registros (coleccion, tipo, empleado, fecha, area, horas, datos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_fila(coleccion, r) for r in almacen_registros.leer_registros(archivo)),
+            )
+            con.execute(
+                "INSERT INTO colecciones (nombre, importada_en) VALUES (?, ?)",
+                (coleccion, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    return coleccion
+
+
+def leer_registros(archivo):
+    con = conexion()
+    coleccion = _importar_si_hace_falta(con, archivo)
+    for (datos,) in con.execute("SELECT datos FROM registros WHERE coleccion = ? ORDER BY id", (coleccion,)):
+        yield json.loads(datos)
+
+
+# Registros agregados después de `posicion`, con el mismo contrato que
+# almacen_registros.leer_registros_desde. La posición es (último id leído, cantidad
+# de registros hasta ese id); si la cantidad ya no coincide, la colección se reescribió.
+def leer_registros_desde(archivo, posicion=None):
+    con = conexion()
+    coleccion = _importar_si_hace_falta(con, archivo)
+    ultimo_id, cantidad = posicion or (0, 0)
+    (previos,) = con.execute(
+        "SELECT COUNT(*) FROM registros WHERE coleccion = ? AND id <= ?", (coleccion, ultimo_id)
+    ).fetchone()
+    completo = posicion is None or previos != cantidad
+    if completo:
+        ultimo_id, cantidad = 0, 0
+    filas = con.execute(
+        "SELECT id, datos FROM registros WHERE coleccion = ? AND id > ? ORDER BY id", (coleccion, ultimo_id)
+    ).fetchall()
+    if filas:
+        ultimo_id = filas[-1][0]
+    return [json.loads(datos) for _, datos in filas], [ultimo_id, cantidad + len(filas)], completo
+
+
+# Inserción masiva en una sola transacción
+@instrumentado("registros.agregar")
+def agregar_registros(archivo, registros):
+    if not registros:
+        return
+    con = conexion()
+    coleccion = _importar_si_hace_falta(con, archivo)
+    with con:
+        con.executemany(
+            "INSERT INTO registros (coleccion, tipo, empleado, fecha, area, horas, datos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_fila(coleccion, r) for r in registros],
+        )
+
+
+@instrumentado("registros.reescribir")
+def reescribir_registros(archivo, registros):
+    con = conexion()
+    coleccion = _importar_si_hace_falta(con, archivo)
+    with con:
+        con.execute("DELETE FROM registros WHERE coleccion = ?", (coleccion,))
+        con.executemany(
+            "INSERT INTO registros (coleccion, tipo, empleado, fecha, area, horas, datos) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_fila(coleccion, r) for r in registros],
+        )
+
+
+# Conexión para las consultas por columnas: antes de la primera, se importan todas las
+# colecciones conocidas (las consultas no dicen de qué archivo leen, así que una colección
+# sin importar daría resultados vacíos en lugar del historial)
+def _conexion_consultas():
+    con = conexion()
+    if ARCHIVO_BD not in _importadas:
+        with _candado_importadas:
+            for archivo in ARCHIVOS_REGISTROS:
+                _importar_si_hace_falta(con, archivo)
+            _importadas.add(ARCHIVO_BD)
+    return con
+
+
+def _filtros(empleado=None, area=None, tipo=None, desde=None, hasta=None, coleccion=None):
+    condiciones = []
+    parametros = []
+    for columna, valor in (("empleado", empleado), ("area", area), ("tipo", tipo), ("coleccion", coleccion)):
+        if valor is not None:
+            condiciones.append(f"{columna} = ?")
+            parametros.append(valor)
+    if desde is not None:
+        condiciones.append("fecha >= ?")
+        parametros.append(str(desde))
+    if hasta is not None:
+        condiciones.append("fecha <= ?")
+        parametros.append(str(hasta))
+    where = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+    return where, parametros
+
+
+# Registros de un empleado entre dos fechas (incluidas), opcionalmente de un tipo
+def registros_por_empleado(empleado, desde=None, hasta=None, tipo=None):
+    where, parametros = _filtros(empleado=empleado, tipo=tipo, desde=desde, hasta=hasta)
+    filas = _conexion_consultas().execute(f"SELECT datos FROM registros{where} ORDER BY fecha, id", parametros)
+    return [json.loads(datos) for (datos,) in filas]
+
+
+# Registros de un área entre dos fechas (incluidas), opcionalmente de un tipo
+def registros_por_area(area, desde=None, hasta=None, tipo=None):
+    where, parametros = _filtros(area=area, tipo=tipo, desde=desde, hasta=hasta)
+    filas = _conexion_consultas().execute(f"SELECT datos FROM registros{where} ORDER BY fecha, id", parametros)
+    return [json.loads(datos) for (datos,) in filas]
+
+
+# Registros de un tipo ("diurnas", "nocturnas", "dia_familia", ...) entre dos fechas
+def registros_por_tipo(tipo, desde=None, hasta=None):
+    where, parametros = _filtros(tipo=tipo, desde=desde, hasta=hasta)
+    filas = _conexion_consultas().execute(f"SELECT datos FROM registros{where} ORDER BY fecha, id", parametros)
+    return [json.loads(datos) for (datos,) in filas]
+
+
+# Suma de horas con los filtros dados (por ejemplo, horas del área X en julio)
+def total_horas(empleado=None, area=None, tipo=None, desde=None, hasta=None):
+    where, parametros = _filtros(empleado=empleado, area=area, tipo=tipo, desde=desde, hasta=hasta)
+    (total,) = _conexion_consultas().execute(f"SELECT COALESCE(SUM(horas), 0) FROM registros{where}", parametros).fetchone()
+    return float(total)
+
+
+# Registros de varios archivos con filtros de área y fechas, en el orden de cada archivo
+# (lo usa reporte_horas_extra.registros_horas_extra en lugar de filtrar en Python)
+def registros_filtrados(archivos, desde=None, hasta=None, area=None):
+    con = _conexion_consultas()
+    for archivo in archivos:
+        where, parametros = _filtros(area=area, desde=desde, hasta=hasta, coleccion=_importar_si_hace_falta(con, archivo))
+        for (datos,) in con.execute(f"SELECT datos FROM registros{where} ORDER BY id", parametros):
+            yield json.loads(datos)
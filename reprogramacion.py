@@ -0,0 +1,184 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from procesamiento_turnos import (
+    TURNO_DESCANSO_MANUAL,
+    aplicar_novedades,
+    catalogo_con_novedades,
+    horas_laboradas,
+    horas_por_semana,
+    semanas_por_columna,
+    tabla_turnos,
+)
+from schedule_matrix import SIN_TURNO
+from scheduler import MAX_DESCANSOS_POR_DIA
+
+# Tipos de novedad, en el mismo orden de los parámetros de aplicar_novedades
+NOVEDADES = ("dias_familia", "vacaciones", "descansos")
+COLUMNAS_DIFERENCIAS = [
+    "Empleado", "Fecha", "Semana", "Turno anterior", "Turno nuevo",
+    "Horas Semana anterior", "Horas Semana nueva",
+]
+
+
+class ProgramacionIncremental:
+    """
+    Programación de un mes sobre la que se pueden cambiar las novedades (día de la
+    familia, vacaciones y descansos manuales) de un empleado sin recalcular todo el mes:
+    solo se rehace la fila del empleado, sus horas por semana en las semanas que
+    cambiaron y el conteo de descansos de las fechas afectadas. Con ese conteo,
+    excesos_descansos indica las fechas en que las novedades dejan más de
+    MAX_DESCANSOS_POR_DIA descansos.
+
+    El resultado es siempre el mismo que daría procesar_turnos con todas las novedades.
+
+    Args:
+        schedule (Schedule): Programación base (rotación y descansos del scheduler). No se modifica.
+        dias_familia, vacaciones, descansos (dict, optional): Novedades iniciales, con el
+                                                              formato de aplicar_novedades.
+    """
+
+    def __init__(self, schedule, dias_familia=None, vacaciones=None, descansos=None):
+        self.schedule = schedule
+        self.novedades = {
+            "dias_familia": dict(dias_familia or {}),
+            "vacaciones": dict(vacaciones or {}),
+            "descansos": dict(descansos or {}),
+        }
+        # Catálogo propio con los turnos de las novedades (el de schedule no se toca)
+        self.catalogo = catalogo_con_novedades(schedule.catalogo)
+        self.codigos = aplicar_novedades(schedule, **self.novedades, catalogo=self.catalogo)
+        _, self.semanas, self.semana_idx = semanas_por_columna(schedule.fechas)
+        self.horas_semana = horas_por_semana(
+            horas_laboradas(self.catalogo, self.codigos), self.semana_idx, len(self.semanas)
+        )
+        self.descansos_por_fecha = self._es_descanso(self.codigos).sum(axis=0)
+        # Los códigos de schedule valen en self.catalogo: la copia solo agrega turnos al final
+        self.descansos_base = self._es_descanso(schedule.codigos).sum(axis=0)
+
+    # Celdas que son descanso (el del scheduler o uno manual)
+    def _es_descanso(self, codigos):
+        descansos = [self.catalogo.buscar("DESCANSO"), self.catalogo.buscar(TURNO_DESCANSO_MANUAL)]
+        return np.isin(codigos, [codigo for codigo in descansos if codigo is not None])
+
+    def excesos_descansos(self):
+        """
+        Fechas en que las novedades dejan más descansos que MAX_DESCANSOS_POR_DIA. Las que
+        ya venían así en la programación base no se cuentan (las reporta el optimizador).
+
+        Returns:
+            list: Textos "AAAA-MM-DD: N descansos (máximo M)", en orden de fecha.
+        """
+        limite = np.maximum(self.descansos_base, MAX_DESCANSOS_POR_DIA)
+        return [
+            f"{self.schedule.fechas[columna].strftime('%Y-%m-%d')}: "
+            f"{int(self.descansos_por_fecha[columna])} descansos (máximo {MAX_DESCANSOS_POR_DIA})"
+            for columna in np.flatnonzero(self.descansos_por_fecha > limite)
+        ]
+
+    # Fila del empleado con sus novedades aplicadas sobre la fila base
+    def _fila_con_novedades(self, empleado):
+        fila = self.schedule.indice_empleado[empleado]
+        vista = SimpleNamespace(
+            codigos=self.schedule.codigos[fila:fila + 1],
+            catalogo=self.schedule.catalogo,
+            fechas=self.schedule.fechas,
+            indice_fecha=self.schedule.indice_fecha,
+            indice_empleado={empleado: 0},
+        )
+        novedades = {
+            tipo: {empleado: valores[empleado]} if empleado in valores else None
+            for tipo, valores in self.novedades.items()
+        }
+        return aplicar_novedades(vista, **novedades, catalogo=self.catalogo)[0]
+
+    def actualizar_empleado(self, empleado, **cambios):
+        """
+        Cambia las novedades de un empleado y recalcula solo su fila.
+
+        Args:
+            empleado (str): Empleado de la programación.
+            **cambios: dias_familia, vacaciones y/o descansos con el nuevo valor para este
+                       empleado (una fecha, un par (inicio, fin) o una lista de fechas);
+                       None quita la novedad.
+
+        Returns:
+            pandas.DataFrame: Celdas que cambiaron (ver COLUMNAS_DIFERENCIAS).
+        """
+        import pandas as pd
+
+        if empleado not in self.schedule.indice_empleado:
+            raise KeyError(f"El empleado {empleado} no está en la programación")
+        for tipo, valor in cambios.items():
+            if tipo not in NOVEDADES:
+                raise ValueError(f"Novedad desconocida: {tipo}")
+            if valor is None:
+                self.novedades[tipo].pop(empleado, None)
+            else:
+                self.novedades[tipo][empleado] = valor
+
+        fila = self.schedule.indice_empleado[empleado]
+        anterior = self.codigos[fila].copy()
+        nueva = self._fila_con_novedades(empleado)
+        columnas = np.flatnonzero(anterior != nueva)
+        if len(columnas) == 0:
+            return pd.DataFrame(columns=COLUMNAS_DIFERENCIAS)
+
+        self.codigos[fila, columnas] = nueva[columnas]
+        self.descansos_por_fecha[columnas] += (
+            self._es_descanso(nueva[columnas]).astype(np.int64) - self._es_descanso(anterior[columnas])
+        )
+
+        # Horas por semana: solo las semanas con alguna columna cambiada
+        horas_semana_anterior = self.horas_semana[fila].copy()
+        semanas_afectadas = np.unique(self.semana_idx[columnas])
+        en_semanas = np.isin(self.semana_idx, semanas_afectadas)
+        horas_fila = horas_laboradas(self.catalogo, nueva[en_semanas])
+        self.horas_semana[fila, semanas_afectadas] = 0
+        np.add.at(self.horas_semana[fila], self.semana_idx[en_semanas], horas_fila)
+
+        etiquetas = self.catalogo.etiquetas
+        semana_col = self.semana_idx[columnas]
+        return pd.DataFrame({
+            "Empleado": empleado,
+            "Fecha": [self.schedule.fechas[c].strftime("%Y-%m-%d") for c in columnas],
+            "Semana": self.semanas[semana_col],
+            "Turno anterior": [etiquetas[c] if c != SIN_TURNO else "" for c in anterior[columnas]],
+            "Turno nuevo": [etiquetas[c] if c != SIN_TURNO else "" for c in nueva[columnas]],
+            "Horas Semana anterior": horas_semana_anterior[semana_col],
+            "Horas Semana nueva": self.horas_semana[fila, semana_col],
+        }, columns=COLUMNAS_DIFERENCIAS)
+
+    def actualizar_novedades(self, dias_familia=None, vacaciones=None, descansos=None):
+        """
+        Reemplaza todas las novedades y recalcula solo los empleados cuyas novedades
+        cambiaron respecto a las actuales.
+
+        Returns:
+            pandas.DataFrame: Celdas que cambiaron, de todos los empleados.
+        """
+        import pandas as pd
+
+        nuevas = {
+            "dias_familia": dias_familia or {},
+            "vacaciones": vacaciones or {},
+            "descansos": descansos or {},
+        }
+        diferencias = []
+        empleados = set().union(*self.novedades.values(), *nuevas.values())
+        for empleado in sorted(e for e in empleados if e in self.schedule.indice_empleado):
+            cambios = {
+                tipo: nuevas[tipo].get(empleado)
+                for tipo in NOVEDADES
+                if nuevas[tipo].get(empleado) != self.novedades[tipo].get(empleado)
+            }
+            if cambios:
+                diferencias.append(self.actualizar_empleado(empleado, **cambios))
+        if not diferencias:
+            return pd.DataFrame(columns=COLUMNAS_DIFERENCIAS)
+        return pd.concat(diferencias, ignore_index=True)
+
+    # Tabla completa con el formato de procesar_turnos
+    def tabla(self):
+        return tabla_turnos(self.schedule, self.codigos, self.catalogo)
@@ -0,0 +1,151 @@
+import numpy as np
+
+# pandas se importa dentro de los métodos que arman DataFrames: programar un mes
+# solo necesita numpy.
+
+# Código de las celdas sin turno (domingos, sábados no laborados, etc.)
+SIN_TURNO = -1
+
+
+# Texto con el que se muestra un turno. Los horarios de app.py son diccionarios
+# con "nombre" y "horas"; los turnos especiales son strings ("DESCANSO", ...).
+def etiqueta_turno(turno):
+    if isinstance(turno, dict):
+        return str(turno.get("nombre", ""))
+    return str(turno)
+
+
+# Catálogo de turnos: a cada turno distinto se le asigna un código entero.
+class CatalogoTurnos:
+    def __init__(self):
+        self.turnos = []      # Valor original del turno (str o dict)
+        self.etiquetas = []   # Texto para mostrar
+        self.horas = []       # Horas del turno (0 para los turnos especiales)
+        self._codigo_por_etiqueta = {}
+
+    def __len__(self):
+        return len(self.turnos)
+
+    # Código de un turno ya registrado, o None; a diferencia de codigo no agrega el turno
+    def buscar(self, turno):
+        return self._codigo_por_etiqueta.get(etiqueta_turno(turno))
+
+    # Copia independiente: registrar turnos en ella no cambia este catálogo y los códigos
+    # que ya existen son los mismos
+    def copia(self):
+        otro = CatalogoTurnos()
+        otro.turnos = list(self.turnos)
+        otro.etiquetas = list(self.etiquetas)
+        otro.horas = list(self.horas)
+        otro._codigo_por_etiqueta = dict(self._codigo_por_etiqueta)
+        return otro
+
+    def codigo(self, turno):
+        etiqueta = etiqueta_turno(turno)
+        codigo = self._codigo_por_etiqueta.get(etiqueta)
+        if codigo is None:
+            codigo = len(self.turnos)
+            self._codigo_por_etiqueta[etiqueta] = codigo
+            self.turnos.append(turno)
+            self.etiquetas.append(etiqueta)
+            self.horas.append(float(turno.get("horas", 0)) if isinstance(turno, dict) else 0.0)
+        return codigo
+
+    def horas_array(self):
+        return np.asarray(self.horas, dtype=np.float64)
+
+    def a_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame({
+            "Código": np.arange(len(self.turnos), dtype=np.int16),
+            "Turno": self.etiquetas,
+            "Horas": self.horas_array(),
+        })
+
+
+class Schedule:
+    """
+    Programación de turnos en forma de matriz: una fila por empleado, una columna
+    por día y en cada celda el código del turno en el catálogo (SIN_TURNO si ese
+    día el empleado no tiene turno).
+
+    Args:
+        empleados (list): Nombres de los empleados. Los nombres repetidos ocupan una sola fila.
+        fechas (list): Fechas (date) de las columnas, en orden cronológico.
+        catalogo (CatalogoTurnos, optional): Catálogo de turnos a usar.
+
+    El motor que la genera deja en infracciones (textos) las restricciones que no pudo cumplir.
+    """
+
+    def __init__(self, empleados, fechas, catalogo=None):
+        self.empleados = list(dict.fromkeys(empleados))
+        self.indice_empleado = {e: i for i, e in enumerate(self.empleados)}
+        self.fechas = list(fechas)
+        self.indice_fecha = {f: i for i, f in enumerate(self.fechas)}
+        self.catalogo = catalogo if catalogo is not None else CatalogoTurnos()
+        self.codigos = np.full((len(self.empleados), len(self.fechas)), SIN_TURNO, dtype=np.int16)
+        self.infracciones = []
+
+    @property
+    def shape(self):
+        return self.codigos.shape
+
+    def turno(self, empleado, fecha):
+        codigo = self.codigos[self.indice_empleado[empleado], self.indice_fecha[fecha]]
+        return None if codigo == SIN_TURNO else self.catalogo.turnos[codigo]
+
+    def asignar(self, empleado, fecha, turno):
+        self.codigos[self.indice_empleado[empleado], self.indice_fecha[fecha]] = self.catalogo.codigo(turno)
+
+    # Recorrer los turnos en el formato anterior (un diccionario por empleado-día)
+    # sin materializar todos los diccionarios al tiempo.
+    def iter_turnos(self):
+        fechas_str = [f.strftime("%Y-%m-%d") for f in self.fechas]
+        turnos = self.catalogo.turnos
+        horas = self.catalogo.horas
+        for fila, empleado in enumerate(self.empleados):
+            for columna in np.flatnonzero(self.codigos[fila] != SIN_TURNO):
+                codigo = self.codigos[fila, columna]
+                yield empleado, {
+                    "fecha": fechas_str[columna],
+                    "turno": turnos[codigo],
+                    "fecha_obj": self.fechas[columna],
+                    "horas": horas[codigo],
+                }
+
+    # Turnos en el formato anterior: {empleado: [ {"fecha", "turno", "fecha_obj", "horas"}, ... ]}
+    def a_turnos_por_empleado(self):
+        turnos = {empleado: [] for empleado in self.empleados}
+        for empleado, turno in self.iter_turnos():
+            turnos[empleado].append(turno)
+        return turnos
+
+    # Matriz de códigos como DataFrame (empleados x fechas) sin copiar los datos.
+    def a_dataframe_ancho(self):
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.codigos,
+            index=pd.Index(self.empleados, name="Empleado"),
+            columns=pd.DatetimeIndex(self.fechas, name="Fecha"),
+            copy=False,
+        )
+
+    # DataFrame largo (una fila por empleado-día con turno). Empleado y Turno son
+    # categóricas que reutilizan los códigos de la matriz.
+    def a_dataframe(self):
+        import pandas as pd
+
+        n_empleados, n_dias = self.codigos.shape
+        codigos = self.codigos.ravel()
+        con_turno = codigos != SIN_TURNO
+        codigos = codigos[con_turno]
+        filas = np.repeat(np.arange(n_empleados, dtype=np.int32), n_dias)[con_turno]
+        fechas = np.tile(np.asarray(self.fechas, dtype="datetime64[D]"), n_empleados)[con_turno]
+        return pd.DataFrame({
+            "Empleado": pd.Categorical.from_codes(filas, categories=pd.Index(self.empleados, dtype=object)),
+            "Fecha": fechas.astype("datetime64[s]"),
+            "Turno": pd.Categorical.from_codes(codigos, categories=pd.Index(self.catalogo.etiquetas, dtype=object)),
+            "Horas": self.catalogo.horas_array()[codigos],
+        })
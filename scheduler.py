@@ -1,18 +1,28 @@
+import heapq
 import math
 import random
 from datetime import datetime, timedelta
 from collections import defaultdict
+import numpy as np
 from calendar_utils import get_dias_laborales 
+from instrumentacion import instrumentado
+from schedule_matrix import Schedule
 
+# Turnos que no cuentan como día laborable al asignar descansos
+TURNOS_SIN_DESCANSO = ("DESCANSO", "SIN HORARIO", "DIA LIBRE")
+# Máximo de empleados que pueden descansar la misma fecha
+MAX_DESCANSOS_POR_DIA = 2
 
-def asignar_turnos_con_descanso(empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False, horario_sabado=None):
+
+@instrumentado("scheduler.rotacion")
+def asignar_turnos_matriz(empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False, horario_sabado=None, horario_viernes=None):
     """
     Asigna turnos a los empleados para un mes dado, incluyendo la asignación de un día
     de descanso al mes por empleado, asegurando que no más de dos empleados
     descansen el mismo día.
 
     Args:
-        empleados (list): Lista de nombres de los empleados.
+        empleados (list): Lista de nombres de los empleados. Los nombres repetidos se programan una sola vez.
         year (int): Año para la asignación de turnos.
         month (int): Mes para la asignación de turnos.
         horarios_lunes_a_viernes (list): Lista de horarios posibles para lunes a viernes.
@@ -20,17 +30,76 @@ def asignar_turnos_con_descanso(empleados, year, month, horarios_lunes_a_viernes
                                           Si es True, se intentará asignar un día de descanso al mes.
         horario_sabado (str o list, optional): Horario(s) específico(s) para los sábados si aplican.
                                                 Puede ser un string (un solo horario) o una lista (varios horarios para rotar).
+        horario_viernes (str o list, optional): Horario(s) específico(s) para los viernes. Si es una lista,
+                                                 rota cada semana igual que los horarios de lunes a viernes.
 
     Returns:
-        dict: Un diccionario donde las claves son nombres de empleados y los valores son
-              listas de diccionarios con 'fecha', 'turno' y 'fecha_obj'.
+        Schedule: Matriz empleados x días con los códigos de turno (ver schedule_matrix).
     """
-    turnos = {}
-    dias_laborales = get_dias_laborales(year, month)
+    dias_por_semana = dias_programables(year, month, trabajan_sabado)
+
+    schedule = Schedule(empleados, sorted(d for dias in dias_por_semana.values() for d in dias))
+
+    # Asignar turnos semanales (semana_actual_idx es el índice para la rotación de horarios por semana)
+    for semana_actual_idx, semana_num in enumerate(sorted(dias_por_semana.keys())):
+        asignar_semana(
+            schedule, dias_por_semana[semana_num], semana_actual_idx, horarios_lunes_a_viernes,
+            trabajan_sabado, horario_sabado, horario_viernes
+        )
+
+    # Asignar descansos 
+    if trabajan_sabado: #Solo asignar descansos si trabajan sábados
+        asignar_descansos(schedule)
 
-    # Agrupar días laborales por semana
+    return schedule
+
+
+# Turnos de una semana de la rotación: los empleados se dividen en dos grupos (primera
+# y segunda mitad) y cada semana el grupo B va un horario adelante del grupo A.
+# semana_actual_idx es el índice de la semana en la rotación.
+def asignar_semana(schedule, dias, semana_actual_idx, horarios_lunes_a_viernes, trabajan_sabado=False,
+                   horario_sabado=None, horario_viernes=None):
+    catalogo = schedule.catalogo
+
+    # Dividir empleados en grupos para la rotación de turnos
+    mitad = math.ceil(len(schedule.empleados) / 2)
+    grupo_a = slice(0, mitad)
+    grupo_b = slice(mitad, None)
+
+    total_horarios = len(horarios_lunes_a_viernes)
+    idx_turno_a = semana_actual_idx % total_horarios
+    idx_turno_b = (semana_actual_idx + 1) % total_horarios if total_horarios > 1 else idx_turno_a
+
+    for grupo, idx_turno, desfase in [(grupo_a, idx_turno_a, 0), (grupo_b, idx_turno_b, 1)]:
+        for dia_obj in dias:
+            turno_final = horarios_lunes_a_viernes[idx_turno]
+            if dia_obj.weekday() == 4 and horario_viernes: # Viernes con horario propio
+                if isinstance(horario_viernes, list):
+                    # Rotación de los horarios de viernes, con el mismo desfase entre grupos
+                    idx_viernes = semana_actual_idx + (desfase if len(horario_viernes) > 1 else 0)
+                    turno_final = horario_viernes[idx_viernes % len(horario_viernes)]
+                else:
+                    turno_final = horario_viernes
+            elif dia_obj.weekday() == 5 and trabajan_sabado: # Si es sábado y trabajan los sábados
+                if isinstance(horario_sabado, list) and len(horario_sabado) > 0:
+                    # Rotación entre múltiples horarios de sábado
+                    idx_sabado = semana_actual_idx % len(horario_sabado)
+                    turno_final = horario_sabado[idx_sabado]
+                elif horario_sabado: 
+                    turno_final = horario_sabado
+                else: # Si trabajan sábado pero no se especificó un horario 
+                    turno_final = "SIN HORARIO"
+            elif dia_obj.weekday() == 5 and not trabajan_sabado: 
+                turno_final = "DIA LIBRE" 
+
+            schedule.codigos[grupo, schedule.indice_fecha[dia_obj]] = catalogo.codigo(turno_final)
+
+
+# Días laborales del mes agrupados por semana ISO ({semana: [fechas]}), sin domingos
+# y sin sábados si no se trabajan
+def dias_programables(year, month, trabajan_sabado=False):
     dias_por_semana = defaultdict(list)
-    for dia in dias_laborales:
+    for dia in get_dias_laborales(year, month):
         # Excluir domingos por defecto y sábados si no trabajan ese día
         if dia.weekday() == 6:  
             continue
@@ -38,107 +107,95 @@ def asignar_turnos_con_descanso(empleados, year, month, horarios_lunes_a_viernes
             continue
         semana = dia.isocalendar()[1]
         dias_por_semana[semana].append(dia)
+    return dias_por_semana
 
-    # Dividir empleados en grupos para la rotación de turnos
-    mitad = math.ceil(len(empleados) / 2)
-    grupo_a = empleados[:mitad]
-    grupo_b = empleados[mitad:]
 
-    total_horarios = len(horarios_lunes_a_viernes)
-    semana_actual_idx = 0 # Índice para la rotación de horarios por semana
-
-    for empleado in empleados:
-        turnos[empleado] = []
-
-    # Asignar turnos semanales
-    for semana_num in sorted(dias_por_semana.keys()):
-        idx_turno_a = semana_actual_idx % total_horarios
-       
-        idx_turno_b = (semana_actual_idx + 1) % total_horarios if total_horarios > 1 else idx_turno_a
-
-        turno_base_a = horarios_lunes_a_viernes[idx_turno_a]
-        turno_base_b = horarios_lunes_a_viernes[idx_turno_b]
-
-        for grupo, turno_base in [(grupo_a, turno_base_a), (grupo_b, turno_base_b)]:
-            for empleado in grupo:
-                for dia_obj in dias_por_semana[semana_num]:
-                    turno_final = turno_base
-                    if dia_obj.weekday() == 5 and trabajan_sabado: # Si es sábado y trabajan los sábados
-                        if isinstance(horario_sabado, list) and len(horario_sabado) > 0:
-                            # Rotación entre múltiples horarios de sábado
-                            idx_sabado = semana_actual_idx % len(horario_sabado)
-                            turno_final = horario_sabado[idx_sabado]
-                        elif horario_sabado is not None: 
-                            turno_final = horario_sabado
-                        else: # Si trabajan sábado pero no se especificó un horario 
-                            turno_final = "SIN HORARIO"
-                    elif dia_obj.weekday() == 5 and not trabajan_sabado: 
-                        turno_final = "DIA LIBRE" 
-
-                    turnos[empleado].append({
-                        "fecha": dia_obj.strftime("%Y-%m-%d"),
-                        "turno": turno_final,
-                        "fecha_obj": dia_obj
-                    })
-        semana_actual_idx += 1
+def asignar_turnos_con_descanso(empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado=False, horario_sabado=None, horario_viernes=None):
+    """
+    Igual que asignar_turnos_matriz, pero devuelve los turnos en el formato de
+    diccionarios por empleado que usaban las versiones anteriores.
 
-    # Asignar descansos 
-    if trabajan_sabado: #Solo asignar descansos si trabajan sábados
-        contador_descansos_por_dia = defaultdict(int) # Cuenta cuántos descansos se han asignado a cada fecha
-        empleados_con_descanso_asignado = defaultdict(bool) # Rastrea si un empleado ya tiene su descanso del mes
-        empleados_ordenados = sorted(empleados)
+    Returns:
+        dict: Un diccionario donde las claves son nombres de empleados y los valores son
+              listas de diccionarios con 'fecha', 'turno', 'fecha_obj' y 'horas'.
+    """
+    schedule = asignar_turnos_matriz(
+        empleados, year, month, horarios_lunes_a_viernes, trabajan_sabado, horario_sabado, horario_viernes
+    )
+    return schedule.a_turnos_por_empleado()
 
-        for empleado in empleados_ordenados:
-            # Si el empleado ya tiene un descanso asignado este mes, lo saltamos
-            if empleados_con_descanso_asignado[empleado]:
+
+def asignar_descansos(schedule):
+    """
+    Asigna un día de descanso al mes a cada empleado, sin que más de dos empleados
+    descansen la misma fecha. Se revisan primero las semanas en que el empleado
+    trabaja 6 días y, dentro de cada semana, se elige la fecha con menos descansos
+    asignados (la más temprana en caso de empate).
+
+    Los días laborables de cada empleado se obtienen de la matriz de códigos, y cada
+    semana mantiene un montículo de (descansos asignados, columna), de modo que el
+    costo total es casi lineal en empleados x días.
+
+    Args:
+        schedule (Schedule): Programación a modificar. Se modifica en la misma matriz.
+    """
+    catalogo = schedule.catalogo
+    codigo_descanso = catalogo.codigo("DESCANSO")
+    # Códigos que cuentan como día laborable, excluyendo "DESCANSO", "SIN HORARIO" o "DIA LIBRE".
+    # La última posición corresponde a SIN_TURNO (-1).
+    admite_descanso = np.array(
+        [isinstance(t, str) and t.upper() not in TURNOS_SIN_DESCANSO for t in catalogo.turnos] + [False]
+    )
+    elegibles = admite_descanso[schedule.codigos].tolist()
+    semana_por_columna = [f.isocalendar()[1] for f in schedule.fechas]
+
+    contador_descansos_por_dia = [0] * len(schedule.fechas) # Cuenta cuántos descansos se han asignado a cada fecha
+    monticulos_por_semana = defaultdict(list) # Semana ISO -> montículo de (descansos, columna)
+    columnas_en_monticulo = set() # Columnas ya agregadas a algún montículo
+
+    for fila in sorted(range(len(schedule.empleados)), key=schedule.empleados.__getitem__):
+        # Días laborables del empleado agrupados por semana
+        dias_por_semana = defaultdict(list)
+        for columna, elegible in enumerate(elegibles[fila]):
+            if elegible:
+                dias_por_semana[semana_por_columna[columna]].append(columna)
+
+        # Primero, buscamos semanas donde el empleado trabajó 6 días
+        semanas_con_6_dias = [s for s, d in dias_por_semana.items() if len(d) == 6]
+        semanas_a_revisar = sorted(semanas_con_6_dias if semanas_con_6_dias else dias_por_semana.keys())
+
+        for semana_iso in semanas_a_revisar:
+            monticulo = monticulos_por_semana[semana_iso]
+            for columna in dias_por_semana[semana_iso]:
+                if columna not in columnas_en_monticulo:
+                    columnas_en_monticulo.add(columna)
+                    heapq.heappush(monticulo, (contador_descansos_por_dia[columna], columna))
+
+            columna = _fecha_con_menos_descansos(monticulo, set(dias_por_semana[semana_iso]), contador_descansos_por_dia)
+            if columna is None:
                 continue
 
-            dias_laborables_del_empleado = []
-            for t in turnos[empleado]:
-                # excluyendo los ya marcados como "DESCANSO", "SIN HORARIO" o "DIA LIBRE"
-                if isinstance(t["turno"], str) and \
-                   t["turno"].upper() not in ["DESCANSO", "SIN HORARIO", "DIA LIBRE"]:
-                    dias_laborables_del_empleado.append(t)
-
-            # Agrupar los días laborables del empleado por semana
-            turnos_por_semana_empleado = defaultdict(list)
-            for d in dias_laborables_del_empleado:
-                semana_iso = d["fecha_obj"].isocalendar()[1]
-                turnos_por_semana_empleado[semana_iso].append(d)
-                descanso_asignado_este_empleado = False
-
-            # Primero, buscamos semanas donde el empleado trabajó 6 días           
-            semanas_con_6_dias = [s for s, d in turnos_por_semana_empleado.items() if len(d) == 6]         
-            # revisar las semanas con 6 días, si no, todas las semanas donde trabajó
-            semanas_a_revisar = sorted(semanas_con_6_dias if semanas_con_6_dias else list(turnos_por_semana_empleado.keys()))
-
-            for semana_iso in semanas_a_revisar:
-                dias_de_la_semana_candidatos = turnos_por_semana_empleado[semana_iso]
-
-                # Ordenar los días : primero los que tienen menos descansos asignados
-                dias_de_la_semana_candidatos_ordenados = sorted(
-                    dias_de_la_semana_candidatos,
-                    key=lambda d: contador_descansos_por_dia[d["fecha"]]
-                )
-
-                for dia_candidato in dias_de_la_semana_candidatos_ordenados:
-                    fecha_candidata_str = dia_candidato["fecha"]
-
-                    # Solo asigna si hay menos de 2 descansos ya en esa fecha
-                    if contador_descansos_por_dia[fecha_candidata_str] < 2:
-                        # Encontrar y actualizar el turno original del empleado
-                        for turno_del_empleado in turnos[empleado]:
-                            if turno_del_empleado["fecha"] == fecha_candidata_str:
-                                turno_del_empleado["turno"] = "DESCANSO"
-                                contador_descansos_por_dia[fecha_candidata_str] += 1
-                                empleados_con_descanso_asignado[empleado] = True
-                                descanso_asignado_este_empleado = True
-                                break # Salir del bucle interno (ya se asignó el descanso para este día)
-                    
-                    if descanso_asignado_este_empleado:
-                        break # Salir del bucle de días (ya se asignó el descanso para este empleado)
-                
-                if descanso_asignado_este_empleado:
-                    break # Salir del bucle de semanas (ya se asignó el descanso para este empleado)
-    
-    return turnos
\ No newline at end of file
+            schedule.codigos[fila, columna] = codigo_descanso
+            contador_descansos_por_dia[columna] += 1
+            if contador_descansos_por_dia[columna] < MAX_DESCANSOS_POR_DIA:
+                heapq.heappush(monticulo, (contador_descansos_por_dia[columna], columna))
+            break # Ya se asignó el descanso para este empleado
+
+
+# Sacar del montículo la fecha candidata con menos descansos asignados.
+# Las entradas con un conteo desactualizado se descartan y las fechas válidas
+# que no son candidatas para este empleado se devuelven al montículo.
+def _fecha_con_menos_descansos(monticulo, candidatas, contador_descansos_por_dia):
+    apartadas = []
+    elegida = None
+    while monticulo:
+        descansos, fecha = heapq.heappop(monticulo)
+        if descansos != contador_descansos_por_dia[fecha]:
+            continue
+        if fecha in candidatas:
+            elegida = fecha
+            break
+        apartadas.append((descansos, fecha))
+    for entrada in apartadas:
+        heapq.heappush(monticulo, entrada)
+    return elegida
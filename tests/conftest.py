@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Cada prueba trabaja en su propia carpeta: los registros y las programaciones se leen y
+# escriben con rutas relativas a la carpeta actual
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
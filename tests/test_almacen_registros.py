@@ -0,0 +1,55 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+
+import almacen_registros
+
+HILOS = 8
+LOTES_POR_HILO = 20
+PROCESOS = 2
+ARCHIVO = "horas_extra.json"
+
+
+# Varios hilos agregando lotes de dos registros al mismo archivo, todos a la vez
+def _escribir(proceso):
+    barrera = threading.Barrier(HILOS)
+
+    def trabajador(hilo):
+        barrera.wait()
+        for i in range(LOTES_POR_HILO):
+            almacen_registros.agregar_registros(ARCHIVO, [
+                {"empleado": f"P{proceso}-H{hilo}-L{i}-{parte}", "horas": 1.5, "detalle": "x" * 500}
+                for parte in range(2)
+            ])
+
+    trabajadores = [threading.Thread(target=trabajador, args=(h,)) for h in range(HILOS)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+
+
+def test_escrituras_concurrentes_no_pierden_ni_mezclan_registros(carpeta):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("se necesita fork para repartir las escrituras en procesos")
+    contexto = multiprocessing.get_context("fork")
+    procesos = [contexto.Process(target=_escribir, args=(p,)) for p in range(1, PROCESOS)]
+    for p in procesos:
+        p.start()
+    _escribir(0)
+    for p in procesos:
+        p.join()
+    assert [p.exitcode for p in procesos] == [0] * len(procesos)
+
+    # Cada línea del archivo es un registro completo
+    with open(almacen_registros.ruta_jsonl(ARCHIVO), encoding="utf-8") as f:
+        registros = [json.loads(linea) for linea in f]
+    nombres = [r["empleado"] for r in registros]
+    assert len(nombres) == PROCESOS * HILOS * LOTES_POR_HILO * 2
+    assert set(nombres) == {
+        f"P{p}-H{h}-L{i}-{parte}"
+        for p in range(PROCESOS) for h in range(HILOS) for i in range(LOTES_POR_HILO) for parte in range(2)
+    }
+    assert [r["empleado"] for r in almacen_registros.leer_registros(ARCHIVO)] == nombres
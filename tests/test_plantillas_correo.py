@@ -0,0 +1,74 @@
+import plantillas_correo
+
+FECHA_REGISTRO = "2025-07-21 10:00:00"
+
+
+# Cuerpos tal como los armaban antes extras y email_utils con f-strings
+def _vacaciones_original(r):
+    cuerpo = f"""<h3>Solicitud de Vacaciones</h3>
+    <p>Cordial saludo,<br>
+    Se informa que el empleado <b>{r['nombre']}</b> ha solicitado sus vacaciones.<br>
+    Fecha solicitada: <b>{r['fecha_inicio']}</b> hasta <b>{r['fecha_fin']}</b><br>
+    <p>Correo del empleado: <b>{r['correo_em']}</b></p>  <!-- Correo del empleado -->""" + " \n    "
+    cuerpo += """
+    <p>Quedamos atentos a cualquier comentario o requerimiento adicional.</p>
+    <p>Atentamente,<br>Área de TI</p>"""
+    return cuerpo
+
+
+def _permiso_original(r, detalle_tiempo):
+    cuerpo = f"""<h3>Solicitud de Permiso</h3>
+    <p>Cordial saludo,<br>
+    Se informa que se ha solicitado un permiso para el empleado <b>{r['nombre']}</b>.<br>
+    Fecha solicitada: <b>{r['fecha']}</b><br>
+    Tipo de permiso: <b>{r['tipo']}{detalle_tiempo}</b></p>
+    <p>Correo del empleado: <b>{r['correo']}</b></p>  <!-- Correo del empleado -->"""
+    if r.get("pe_motivo"):
+        cuerpo += f"<p>Motivo del permiso especial: <b>{r['pe_motivo']}</b></p>"
+    cuerpo += """
+    <p>Quedamos atentos a cualquier comentario o requerimiento adicional.</p>
+    <p>Atentamente,<br>Área de TI</p>"""
+    return cuerpo
+
+
+def _dia_familia_original(registros):
+    cuerpo = "Cordial saludo,\n\nSe han solicitado los siguientes Días de la Familia:\n"
+    for r in registros:
+        cuerpo += f"\n- {r['empleado']} | Área: {r.get('area','N/A')} | Fecha: {r['fecha']} | Correo empleado: {r['correo']} | Correo Jefe: {r['correo_jefe']}"
+        cuerpo += f" | Firma: {r['firma']}"
+    cuerpo += f"\n\nFecha de registro: {FECHA_REGISTRO}" \
+              "\n\nQuedamos atentos a cualquier comentario o requerimiento adicional." \
+              "\n\nAtentamente,\nÁrea de TI"
+    return cuerpo
+
+
+DIA_FAMILIA = [
+    {"empleado": "Ana <Gómez>", "area": "TI", "fecha": "2025-07-21", "correo": "a@x.com", "correo_jefe": "j@x.com", "firma": "AG"},
+    {"empleado": "Luis", "fecha": "2025-07-22", "correo": "l@x.com", "correo_jefe": "j@x.com", "firma": "L"},
+]
+
+
+def test_cuerpos_iguales_a_los_anteriores():
+    vacaciones = {"nombre": "Ana", "fecha_inicio": "2025-07-01", "fecha_fin": "2025-07-15", "correo_em": "a@x.com"}
+    assert plantillas_correo.cuerpo_vacaciones(vacaciones) == _vacaciones_original(vacaciones)
+    for permiso in (
+        {"nombre": "Ana", "fecha": "2025-07-21", "tipo": "Medio dia", "correo": "a@x.com"},
+        {"nombre": "Ana", "fecha": "2025-07-21", "tipo": "Permiso especial", "correo": "a@x.com", "pe_motivo": "Trámite"},
+    ):
+        detalle = plantillas_correo.detalle_tiempo_permiso(permiso["tipo"])
+        assert plantillas_correo.cuerpo_permiso(permiso) == _permiso_original(permiso, detalle)
+    assert plantillas_correo.cuerpo_dia_familia(DIA_FAMILIA, FECHA_REGISTRO) == _dia_familia_original(DIA_FAMILIA)
+
+
+def test_resumen_conserva_saltos_de_linea_del_texto_plano():
+    texto = plantillas_correo.cuerpo_dia_familia(DIA_FAMILIA, FECHA_REGISTRO)
+    permiso = plantillas_correo.cuerpo_permiso(
+        {"nombre": "Ana", "fecha": "2025-07-21", "tipo": "Medio dia", "correo": "a@x.com"}
+    )
+    resumen = plantillas_correo.cuerpo_resumen([("Días <familia>", texto), ("Permiso", permiso)], "2025-07-21 09:00")
+
+    assert "<h4>Días &lt;familia&gt;</h4>" in resumen
+    assert "Cordial saludo,<br><br>Se han solicitado" in resumen
+    assert "<br>- Ana &lt;Gómez&gt; | Área: TI" in resumen
+    # Los cuerpos HTML se incluyen sin cambios
+    assert permiso in resumen
@@ -0,0 +1,48 @@
+import pytest
+
+from reprogramacion import ProgramacionIncremental
+from scheduler import MAX_DESCANSOS_POR_DIA, asignar_turnos_matriz
+
+EMPLEADOS = [f"Empleado {i:03d}" for i in range(10)]
+HORARIOS = [{"nombre": "7:30 AM - 17:00 PM", "horas": 9.5}, {"nombre": "8:00 AM - 17:00 PM", "horas": 9.0}]
+SABADO = [{"nombre": "8:00 AM - 13:00 PM", "horas": 5.0}]
+
+
+@pytest.fixture
+def schedule():
+    return asignar_turnos_matriz(EMPLEADOS, 2025, 7, HORARIOS, True, SABADO, None)
+
+
+# Fecha en la que la programación base no tiene descansos
+def _fecha_sin_descansos(programacion):
+    columna = int((programacion.descansos_base == 0).nonzero()[0][0])
+    return columna, programacion.schedule.fechas[columna].strftime("%Y-%m-%d")
+
+
+def test_novedades_no_agregan_turnos_al_catalogo_del_schedule(schedule):
+    etiquetas = list(schedule.catalogo.etiquetas)
+    programacion = ProgramacionIncremental(schedule, descansos={EMPLEADOS[0]: ["2025-07-15"]})
+    programacion.actualizar_empleado(EMPLEADOS[1], dias_familia="2025-07-03")
+    assert schedule.catalogo.etiquetas == etiquetas
+
+
+def test_excesos_descansos_sigue_los_cambios_de_novedades(schedule):
+    programacion = ProgramacionIncremental(schedule)
+    assert programacion.excesos_descansos() == []
+    columna, fecha = _fecha_sin_descansos(programacion)
+
+    for empleado in EMPLEADOS[:MAX_DESCANSOS_POR_DIA + 1]:
+        programacion.actualizar_empleado(empleado, descansos=[fecha])
+    assert programacion.excesos_descansos() == [
+        f"{fecha}: {MAX_DESCANSOS_POR_DIA + 1} descansos (máximo {MAX_DESCANSOS_POR_DIA})"
+    ]
+    assert programacion.descansos_por_fecha[columna] == MAX_DESCANSOS_POR_DIA + 1
+
+    programacion.actualizar_empleado(EMPLEADOS[0], descansos=None)
+    assert programacion.excesos_descansos() == []
+
+    # Con las mismas novedades desde el inicio se llega al mismo conteo
+    completa = ProgramacionIncremental(
+        schedule, descansos={empleado: [fecha] for empleado in EMPLEADOS[1:MAX_DESCANSOS_POR_DIA + 1]}
+    )
+    assert (completa.descansos_por_fecha == programacion.descansos_por_fecha).all()
@@ -0,0 +1,126 @@
+import json
+from collections import Counter
+
+import pytest
+
+import extras
+import validacion_horas_extra
+
+EMPLEADOS = [f"Empleado {i:03d}" for i in range(20)]
+
+
+@pytest.fixture
+def julio(carpeta, monkeypatch):
+    # Índice global nuevo: el de otras pruebas apunta a archivos de otra carpeta
+    monkeypatch.setattr(validacion_horas_extra, "_indice", validacion_horas_extra.IndiceHorasExtra())
+    turnos = [
+        {"Empleado": e, "Fecha": f"2025-07-{d:02d}", "Turno": "DESCANSO" if d % 7 == 5 else "8:00 AM - 17:00 PM"}
+        for e in EMPLEADOS for d in range(1, 32)
+    ]
+    with open("turnos_2025-07.json", "w", encoding="utf-8") as f:
+        json.dump({"programaciones": [{"area": "TI", "year": 2025, "month": 7, "turnos": turnos}]}, f)
+    return carpeta
+
+
+def _historial(n):
+    return [
+        {
+            "empleado": EMPLEADOS[i % len(EMPLEADOS)],
+            "fecha": f"2025-07-{1 + i % 28:02d}",
+            "horas": 1.5,
+            "horas_int": 1,
+            "minutos": 30,
+            "tipo": "diurnas" if i % 2 else "nocturnas",
+            "area": "TI",
+            "pago": "Nomina",
+            "registrado_en": "2025-01-01 00:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+# Horas nocturnas registradas antes que diurnas que se les cruzan, todas en el mismo
+# segundo. Por orden de archivos (diurnas primero) el cruce caería en las nocturnas; por
+# orden de registro (secuencia), en las diurnas.
+def _empates():
+    entradas = []
+    for empleado in EMPLEADOS:
+        base = {"empleado": empleado, "fecha": "2025-07-22", "area": "TI", "pago": "Nomina"}
+        entradas.append(dict(base, horas_nocturnas=2, hora_inicio_no="18:00"))
+        entradas.append(dict(base, horas_diurnas=3, hora_inicio_di="17:30"))
+        entradas.append(dict(base, horas_nocturnas=2, hora_inicio_no="18:00"))
+    registros = extras.construir_registros_horas_extra(entradas)
+    for r in registros:
+        r["registrado_en"] = "2025-07-31 12:00:00"
+    return registros
+
+
+def _claves(hallazgos):
+    return Counter((h["empleado"], h["fecha"], h["tipo"], h["hallazgo"]) for h in hallazgos)
+
+
+def test_auditar_mes_coincide_con_revisar_en_orden_de_registro(julio):
+    historial = _historial(400)
+    empates = _empates()
+    for archivo, registros in extras.archivos_horas_extra(historial + empates).items():
+        extras.almacen.agregar_registros(archivo, registros)
+
+    # El historial sin secuencia llega en el orden de los archivos (diurnas primero)
+    diurnas, nocturnas = extras.archivos_horas_extra(historial).values()
+    indice = validacion_horas_extra.IndiceHorasExtra()
+    indice.turnos = validacion_horas_extra.cargar_programacion(["turnos_2025-07.json"])
+    esperados = Counter()
+    for r in diurnas + nocturnas + empates:
+        esperados.update(_claves(indice.revisar([r], reservar=True)))
+
+    auditoria = validacion_horas_extra.auditar_mes("2025-07")
+    obtenidos = Counter(zip(auditoria["empleado"], auditoria["fecha"], auditoria["tipo"], auditoria["hallazgo"]))
+    assert obtenidos == esperados
+    # El cruce de los empates cae en las diurnas, que se registraron después
+    assert obtenidos[(EMPLEADOS[0], "2025-07-22", "diurnas", "solapa_horas_extra")] == 1
+
+
+def test_secuencia_crece_dentro_del_mismo_segundo():
+    registros = extras.construir_registros_horas_extra(
+        [{"empleado": "X", "fecha": "2025-07-01", "horas_diurnas": 1, "horas_nocturnas": 1}] * 50
+    )
+    secuencias = [r["secuencia"] for r in registros]
+    assert secuencias == sorted(set(secuencias))
+
+
+def _guardar_programacion(ruta, mes, turno):
+    turnos = [{"Empleado": e, "Fecha": f"{mes}-{d:02d}", "Turno": turno} for e in EMPLEADOS[:2] for d in range(1, 29)]
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"programaciones": [{"area": "TI", "turnos": turnos}]}, f)
+
+
+def test_indice_carga_solo_la_programacion_de_los_meses_revisados(carpeta, monkeypatch):
+    leidos = []
+    leer = validacion_horas_extra._leer_programacion
+    monkeypatch.setattr(validacion_horas_extra, "_leer_programacion", lambda ruta, meses=None: leidos.append(ruta) or leer(ruta, meses))
+    for month in range(1, 7):
+        _guardar_programacion(f"turnos_2025-{month:02d}.json", f"2025-{month:02d}", "8:00 AM - 17:00 PM")
+    # La de la aplicación va después por nombre y reemplaza la del mismo mes
+    _guardar_programacion("turnos_2025-03_ti.json", "2025-03", "DESCANSO")
+
+    indice = validacion_horas_extra.IndiceHorasExtra()
+    indice.ponerse_al_dia(meses={"2025-03"})
+    assert sorted(leidos) == ["turnos_2025-03.json", "turnos_2025-03_ti.json"]
+    assert indice.turnos[(validacion_horas_extra.normalizar_nombre(EMPLEADOS[0]), "2025-03-02")] == "DESCANSO"
+
+    for mes in ("2025-04", "2025-05", "2025-06"):
+        indice.ponerse_al_dia(meses={mes})
+    assert indice.meses == ["2025-04", "2025-05", "2025-06"]
+    assert {fecha[:7] for _, fecha in indice.turnos} == {"2025-04", "2025-05", "2025-06"}
+    assert "turnos_2025-01.json" not in leidos
+    # Cada archivo se leyó una sola vez
+    assert sorted(leidos) == sorted(set(leidos))
+
+
+def test_programacion_sin_mes_en_el_nombre_se_lee_por_contenido(carpeta):
+    _guardar_programacion("turnos_julio.json", "2025-07", "DESCANSO")
+    indice = validacion_horas_extra.IndiceHorasExtra()
+    indice.ponerse_al_dia(meses={"2025-07"})
+    assert len(indice.turnos) == 2 * 28
+    indice.ponerse_al_dia(meses={"2025-08"})
+    assert {fecha[:7] for _, fecha in indice.turnos} == {"2025-07"}
@@ -0,0 +1,548 @@
+import glob
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from functools import lru_cache
+
+from configuracion import entorno
+from empleados import normalizar_nombre
+from extras import ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS, almacen
+from instrumentacion import instrumentado, medir
+from procesamiento_turnos import TURNO_DESCANSO_MANUAL, TURNO_DIA_FAMILIA, TURNO_VACACIONES
+
+# Validación de horas extra contra la programación de turnos y contra las horas extra
+# ya registradas, por empleado y fecha. Los hallazgos son advertencias: el registro se
+# guarda igual y quien lo revisa decide.
+#
+#   duplicado           mismo empleado, fecha, tipo, horas y hora de inicio que un registro anterior
+#   misma_fecha         el empleado ya tiene horas del mismo tipo en esa fecha
+#   dia_no_laboral      la programación tiene ese día como descanso, vacaciones, ...
+#   solapa_turno        el intervalo de las horas extra (con hora_inicio) cruza el turno
+#   solapa_horas_extra  el intervalo cruza otras horas extra con hora_inicio
+#   excede_franja       las horas del tipo en el día no caben en su franja (diurna o
+#                       nocturna) sin cruzarse con el turno
+#
+# Los turnos salen de los JSON de programación (ARCHIVOS_PROGRAMACION, un patrón de
+# glob): los que escribe cli_turnos.py y los que guarda la aplicación con "Guardar como
+# programación vigente" (programacion.guardar_programacion); si una fecha está en varios
+# archivos vale el último por nombre. Solo se leen los archivos de los meses que se revisan:
+# el mes sale del nombre (turnos_AAAA-MM..., turnos_AAAA-MM_AAAA-MM...) y, si el nombre no
+# lo dice, del contenido. Sin programación guardada para el mes no se revisan
+# los días no laborales ni los cruces con el turno. Las horas de inicio son opcionales en
+# el formulario y en la API; sin ellas no se revisan los cruces (solapa_*).
+#
+# Al registrar se usa un índice en memoria por (empleado, fecha) que se mantiene al día
+# leyendo solo lo agregado a los archivos, como los acumulados de nómina. Para auditar
+# un mes completo, auditar hace las mismas revisiones sobre columnas de pandas.
+ARCHIVOS_PROGRAMACION = entorno("ARCHIVOS_PROGRAMACION", "turnos_*.json")
+FUENTES = (ARCHIVO_HORAS_EXTRA, ARCHIVO_HORAS_EXTRA_NOCTURNAS)
+TURNOS_NO_LABORALES = ("DESCANSO", "DIA LIBRE", TURNO_DESCANSO_MANUAL, TURNO_VACACIONES, TURNO_DIA_FAMILIA)
+# Franja diurna en minutos desde la medianoche; el resto del día es la franja nocturna
+INICIO_DIURNO = 6 * 60
+INICIO_NOCTURNO = 21 * 60
+MINUTOS_DIA = 24 * 60
+# Cada cuánto (segundos) se leen los registros que agregaron otros procesos y se busca si
+# cambiaron los archivos de programación; los de este proceso entran al índice al revisarlos
+REVISION_ARCHIVOS = 0.5
+# Meses de programación que el índice mantiene cargados (los últimos revisados)
+MESES_PROGRAMACION = 3
+COLUMNAS_HALLAZGOS = ["empleado", "fecha", "tipo", "horas", "area", "turno", "hallazgo", "detalle"]
+
+_HORA = re.compile(r"(\d{1,2}):(\d{2})\s*([AaPp][Mm])?")
+# Meses en el nombre de un archivo de programación: turnos_2025-07, turnos_2025-07_2025-09
+# (cli_turnos.py) o turnos_2025-07_<área> (programacion.guardar_programacion)
+_MESES_NOMBRE = re.compile(r"turnos_(\d{4})-(\d{2})(?:_(\d{4})-(\d{2}))?(?![\d-])")
+
+
+# Minutos desde la medianoche de "HH:MM" (también "7:30 AM", "17:00 PM"); None si no es una hora
+def minutos_hora(texto):
+    coincidencia = _HORA.fullmatch(str(texto).strip()) if texto is not None else None
+    if coincidencia is None:
+        return None
+    return _minutos(*coincidencia.groups())
+
+
+def _minutos(hora, minuto, sufijo):
+    hora, minuto = int(hora), int(minuto)
+    # Los horarios de la empresa escriben la tarde en 24 horas ("17:00 PM"): el sufijo
+    # solo cuenta cuando la hora es de 1 a 12
+    if sufijo and hora <= 12:
+        if sufijo.upper() == "PM" and hora < 12:
+            hora += 12
+        elif sufijo.upper() == "AM" and hora == 12:
+            hora = 0
+    if hora > 23 or minuto > 59:
+        return None
+    return hora * 60 + minuto
+
+
+# (inicio, fin) en minutos de un turno como "7:30 AM - 17:00 PM"; None si no tiene horas
+# (DESCANSO, Vacaciones, ...). Un turno que pasa la medianoche termina después de MINUTOS_DIA.
+@lru_cache(maxsize=256)
+def intervalo_turno(turno):
+    horas = _HORA.findall(str(turno))
+    if len(horas) != 2:
+        return None
+    inicio, fin = _minutos(*horas[0]), _minutos(*horas[1])
+    if inicio is None or fin is None:
+        return None
+    return inicio, fin + MINUTOS_DIA if fin <= inicio else fin
+
+
+# Minutos de [inicio, fin) que caen dentro de [desde, hasta)
+def _cruce(inicio, fin, desde, hasta):
+    return max(0, min(fin, hasta) - max(inicio, desde))
+
+
+# Minutos de la franja del tipo que quedan libres fuera del turno
+def capacidad_franja(tipo, intervalo):
+    diurna = INICIO_NOCTURNO - INICIO_DIURNO
+    if intervalo is None:
+        ocupado_diurno = ocupado_total = 0
+    else:
+        ocupado_diurno = _cruce(*intervalo, INICIO_DIURNO, INICIO_NOCTURNO)
+        ocupado_total = _cruce(*intervalo, 0, MINUTOS_DIA)
+    if tipo == "diurnas":
+        return diurna - ocupado_diurno
+    return MINUTOS_DIA - diurna - (ocupado_total - ocupado_diurno)
+
+
+def _minutos_registro(r):
+    return round(float(r["horas"]) * 60)
+
+
+def _hallazgo(r, hallazgo, turno=None):
+    tipo = r.get("tipo")
+    if hallazgo == "duplicado":
+        detalle = f"Registro repetido: ya hay {r.get('horas')} h {tipo} del empleado en esa fecha"
+    elif hallazgo == "misma_fecha":
+        detalle = f"El empleado ya tiene horas {tipo} registradas en esa fecha"
+    elif hallazgo == "dia_no_laboral":
+        detalle = f"Horas extra en un día de {turno} según la programación"
+    elif hallazgo == "solapa_turno":
+        detalle = f"Desde las {r.get('hora_inicio')} se cruza con el turno {turno}"
+    elif hallazgo == "solapa_horas_extra":
+        detalle = f"Desde las {r.get('hora_inicio')} se cruza con otras horas extra del mismo día"
+    else:
+        franja = "diurna" if tipo == "diurnas" else "nocturna"
+        detalle = f"Las horas {tipo} del día no caben en la franja {franja}" + (f" fuera del turno {turno}" if turno else "")
+    return {
+        "empleado": r.get("empleado"),
+        "fecha": str(r.get("fecha"))[:10],
+        "tipo": tipo,
+        "horas": r.get("horas"),
+        "area": r.get("area"),
+        "turno": turno,
+        "hallazgo": hallazgo,
+        "detalle": detalle,
+    }
+
+
+# Meses ("AAAA-MM") que cubre un archivo de programación según su nombre, o None si el
+# nombre no los dice
+def _meses_nombre(ruta):
+    encontrado = _MESES_NOMBRE.match(os.path.basename(ruta))
+    if encontrado is None:
+        return None
+    year, month, year_fin, month_fin = encontrado.groups()
+    actual, fin = int(year) * 12 + int(month) - 1, int(year_fin or year) * 12 + int(month_fin or month) - 1
+    return {f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(actual, fin + 1)}
+
+
+# Turnos de un archivo de programación por mes: {mes: {(empleado normalizado, fecha): turno}},
+# solo de los meses pedidos (todos si meses es None)
+def _leer_programacion(ruta, meses=None):
+    with open(ruta, "r", encoding="utf-8") as f:
+        datos = json.load(f)
+    por_mes = {}
+    for programacion in datos.get("programaciones", []):
+        for fila in programacion.get("turnos", []):
+            fecha = str(fila["Fecha"])[:10]
+            if meses is None or fecha[:7] in meses:
+                por_mes.setdefault(fecha[:7], {})[(normalizar_nombre(fila["Empleado"]), fecha)] = fila["Turno"]
+    return por_mes
+
+
+# Archivos de ARCHIVOS_PROGRAMACION, en orden, que pueden tener turnos de esos meses
+def archivos_programacion(meses):
+    rutas = []
+    for ruta in sorted(glob.glob(ARCHIVOS_PROGRAMACION)):
+        meses_ruta = _meses_nombre(ruta)
+        if meses_ruta is None or meses_ruta & set(meses):
+            rutas.append(ruta)
+    return rutas
+
+
+def cargar_programacion(rutas, meses=None):
+    """
+    Turnos programados desde los JSON de cli_turnos.py (programacion.exportar) y de la
+    aplicación (programacion.guardar_programacion).
+
+    Args:
+        rutas (iterable): Archivos en orden; los posteriores reemplazan fechas repetidas.
+        meses (iterable, optional): Solo los turnos de estos meses ("AAAA-MM"). Por defecto, todos.
+
+    Returns:
+        dict: {(empleado normalizado, "AAAA-MM-DD"): nombre del turno}.
+    """
+    meses = set(meses) if meses is not None else None
+    turnos = {}
+    for ruta in rutas:
+        for del_mes in _leer_programacion(ruta, meses).values():
+            turnos.update(del_mes)
+    return turnos
+
+
+class _Dia:
+    """
+    Horas extra registradas de un empleado en una fecha: conteo por (tipo, minutos,
+    inicio) para los duplicados, minutos por tipo para la franja e intervalos con hora de inicio
+    ordenados por inicio (búsqueda binaria).
+    """
+
+    __slots__ = ("repetidos", "por_tipo", "inicios", "intervalos")
+
+    def __init__(self):
+        self.repetidos = {}
+        self.por_tipo = {}
+        self.inicios = []
+        self.intervalos = []
+
+    def copia(self):
+        dia = _Dia()
+        dia.repetidos = dict(self.repetidos)
+        dia.por_tipo = dict(self.por_tipo)
+        dia.inicios = list(self.inicios)
+        dia.intervalos = list(self.intervalos)
+        return dia
+
+    def agregar(self, tipo, minutos, inicio, signo=1):
+        clave = (tipo, minutos, inicio)
+        self.repetidos[clave] = self.repetidos.get(clave, 0) + signo
+        self.por_tipo[tipo] = self.por_tipo.get(tipo, 0) + signo * minutos
+        if inicio is None:
+            return
+        intervalo = (inicio, inicio + minutos)
+        indice = bisect_left(self.intervalos, intervalo)
+        if signo > 0:
+            self.intervalos.insert(indice, intervalo)
+            self.inicios.insert(indice, inicio)
+        else:
+            del self.intervalos[indice], self.inicios[indice]
+
+    # Si [inicio, fin) se cruza con algún intervalo: solo se revisan los que empiezan antes de fin
+    def cruza(self, inicio, fin):
+        return any(f > inicio for _, f in self.intervalos[:bisect_left(self.inicios, fin)])
+
+
+# Identifica un registro reservado cuando vuelve a aparecer al leer los archivos
+def _huella(r):
+    return (
+        r.get("empleado"), str(r.get("fecha")), r.get("tipo"), r.get("horas"), r.get("hora_inicio"),
+        r.get("registrado_en"), r.get("secuencia"),
+    )
+
+
+class IndiceHorasExtra:
+    """
+    Índice de las horas extra registradas por (empleado normalizado, fecha), con la
+    posición leída de cada archivo de registros y los turnos programados de los últimos
+    MESES_PROGRAMACION meses revisados (cada archivo de programación se lee solo si
+    puede tener alguno de esos meses y se guarda solo lo de esos meses).
+
+    Los registros revisados con reservar=True se agregan al índice antes de escribirlos
+    (así dos solicitudes seguidas con el mismo registro se detectan aunque la primera
+    todavía no esté en disco); cuando aparecen en los archivos no se cuentan otra vez.
+    """
+
+    def __init__(self):
+        self.dias = {}
+        self.posiciones = {}
+        self.reservados = {}  # huella: [registro, veces]
+        self.turnos = {}
+        self.meses = []  # Meses de programación cargados, el último revisado al final
+        self._programaciones = {}  # ruta: (mtime_ns, meses leídos, {mes: {clave: turno}})
+        self._firma_programacion = None
+        self._revisado = None
+
+    def _dia(self, r):
+        return (normalizar_nombre(r.get("empleado") or ""), str(r.get("fecha"))[:10])
+
+    def _agregar(self, r, signo=1):
+        clave = self._dia(r)
+        dia = self.dias.get(clave)
+        if dia is None:
+            dia = self.dias[clave] = _Dia()
+        dia.agregar(r["tipo"], _minutos_registro(r), minutos_hora(r.get("hora_inicio")), signo)
+
+    def _reconstruir(self):
+        self.dias = {}
+        pendientes = {huella: [r, n] for huella, (r, n) in self.reservados.items()}
+        for archivo in FUENTES:
+            nuevos, self.posiciones[archivo], _ = almacen.leer_registros_desde(archivo)
+            for r in nuevos:
+                self._agregar(r)
+                reservado = pendientes.get(_huella(r))
+                if reservado is not None:
+                    reservado[1] -= 1
+        # Las reservas que todavía no están en disco se vuelven a sumar
+        self.reservados = {huella: par for huella, par in pendientes.items() if par[1] > 0}
+        for r, veces in self.reservados.values():
+            for _ in range(veces):
+                self._agregar(r)
+
+    # Leer lo agregado a los archivos desde la última vez (o todo, si alguno se reescribió)
+    # y la programación de los meses dados (y de los ya cargados)
+    def ponerse_al_dia(self, forzar=False, meses=()):
+        ahora = time.monotonic()
+        meses_nuevos = not set(meses) <= set(self.meses)
+        if not forzar and not meses_nuevos and self._revisado is not None and ahora - self._revisado < REVISION_ARCHIVOS:
+            return
+        self._revisado = ahora
+        if not self.posiciones:
+            with medir("validacion.indice"):
+                self._reconstruir()
+        else:
+            lecturas = []
+            for archivo in FUENTES:
+                nuevos, posicion, completo = almacen.leer_registros_desde(archivo, self.posiciones.get(archivo))
+                if completo:
+                    with medir("validacion.indice"):
+                        self._reconstruir()
+                    break
+                lecturas.append((archivo, nuevos, posicion))
+            else:
+                for archivo, nuevos, posicion in lecturas:
+                    for r in nuevos:
+                        reservado = self.reservados.get(_huella(r))
+                        if reservado is None:
+                            self._agregar(r)
+                            continue
+                        reservado[1] -= 1
+                        if not reservado[1]:
+                            del self.reservados[_huella(r)]
+                    self.posiciones[archivo] = posicion
+
+        self._actualizar_programacion(meses)
+
+    def _actualizar_programacion(self, meses):
+        for mes in meses:
+            if mes in self.meses:
+                self.meses.remove(mes)
+            self.meses.append(mes)
+        del self.meses[:-MESES_PROGRAMACION]
+        cargados = frozenset(self.meses)
+        if not cargados:
+            return
+        firma = [(ruta, os.stat(ruta).st_mtime_ns) for ruta in archivos_programacion(cargados)]
+        if (cargados, firma) == self._firma_programacion:
+            return
+        programaciones = {}
+        for ruta, mtime in firma:
+            anterior = self._programaciones.get(ruta)
+            # Se vuelve a leer si cambió o si falta alguno de los meses que puede tener
+            necesarios = cargados & (_meses_nombre(ruta) or cargados)
+            if anterior is not None and anterior[0] == mtime and necesarios <= anterior[1]:
+                por_mes = {mes: turnos for mes, turnos in anterior[2].items() if mes in cargados}
+            else:
+                por_mes = _leer_programacion(ruta, cargados)
+            programaciones[ruta] = (mtime, cargados, por_mes)
+        turnos = {}
+        for ruta, _ in firma:
+            for del_mes in programaciones[ruta][2].values():
+                turnos.update(del_mes)
+        self._programaciones, self.turnos, self._firma_programacion = programaciones, turnos, (cargados, firma)
+
+    def revisar(self, registros, reservar=False):
+        """
+        Hallazgos de registros nuevos contra el índice y contra los anteriores del mismo lote.
+
+        Args:
+            registros (list): Registros de horas extra (extras.construir_registros_horas_extra).
+            reservar (bool, optional): Agregarlos al índice (se van a guardar enseguida).
+
+        Returns:
+            list: Un diccionario por hallazgo con las columnas de COLUMNAS_HALLAZGOS.
+        """
+        hallazgos = []
+        # Copias de los días que toca el lote; el índice solo cambia si se reserva
+        dias = {}
+        for r in registros:
+            clave = self._dia(r)
+            dia = dias.get(clave)
+            if dia is None:
+                original = self.dias.get(clave)
+                dia = dias[clave] = original.copia() if original is not None else _Dia()
+            tipo, minutos = r["tipo"], _minutos_registro(r)
+            inicio = minutos_hora(r.get("hora_inicio"))
+            turno = self.turnos.get(clave)
+            intervalo = intervalo_turno(turno) if turno is not None else None
+
+            if dia.repetidos.get((tipo, minutos, inicio)):
+                hallazgos.append(_hallazgo(r, "duplicado", turno))
+            elif dia.por_tipo.get(tipo):
+                hallazgos.append(_hallazgo(r, "misma_fecha", turno))
+            if turno in TURNOS_NO_LABORALES:
+                hallazgos.append(_hallazgo(r, "dia_no_laboral", turno))
+            if inicio is not None:
+                if intervalo is not None and inicio < intervalo[1] and inicio + minutos > intervalo[0]:
+                    hallazgos.append(_hallazgo(r, "solapa_turno", turno))
+                if dia.cruza(inicio, inicio + minutos):
+                    hallazgos.append(_hallazgo(r, "solapa_horas_extra", turno))
+            if dia.por_tipo.get(tipo, 0) + minutos > capacidad_franja(tipo, intervalo):
+                hallazgos.append(_hallazgo(r, "excede_franja", turno))
+            dia.agregar(tipo, minutos, inicio)
+
+        if reservar:
+            self.dias.update(dias)
+            for r in registros:
+                reservado = self.reservados.setdefault(_huella(r), [r, 0])
+                reservado[1] += 1
+        return hallazgos
+
+    # Quitar del índice registros reservados que no se alcanzaron a guardar
+    def liberar(self, registros):
+        for r in registros:
+            reservado = self.reservados.get(_huella(r))
+            if reservado is None:
+                continue
+            reservado[1] -= 1
+            if not reservado[1]:
+                del self.reservados[_huella(r)]
+            self._agregar(r, signo=-1)
+
+
+_lock = threading.Lock()
+_indice = IndiceHorasExtra()
+
+
+# Hallazgos de registros de horas extra antes de guardarlos (ver IndiceHorasExtra.revisar).
+# Sin tramo propio: se llama en cada solicitud de la API, que ya mide la suya.
+def revisar_horas_extra(registros, reservar=True):
+    with _lock:
+        _indice.ponerse_al_dia(meses={str(r.get("fecha"))[:7] for r in registros})
+        return _indice.revisar(registros, reservar)
+
+
+# Si no se pudieron guardar los registros revisados con reservar=True
+def liberar_horas_extra(registros):
+    with _lock:
+        _indice.liberar(registros)
+
+
+# Cargar el índice de antemano (la primera revisión lee todo el historial)
+def preparar_indice():
+    with _lock:
+        _indice.ponerse_al_dia(forzar=True)
+
+
+# Turnos programados vigentes de esos meses: {(empleado normalizado, fecha): turno}
+def turnos_programados(meses):
+    return cargar_programacion(archivos_programacion(meses), meses)
+
+
+def auditar(registros, turnos=None):
+    """
+    Revisa un conjunto de registros completo (por ejemplo un mes) de una sola pasada
+    sobre columnas: los mismos hallazgos que revisar_horas_extra daría a cada registro
+    en el orden en que se registraron.
+
+    Args:
+        registros (iterable): Registros de horas extra.
+        turnos (dict, optional): Resultado de cargar_programacion. Por defecto, los de
+                                 ARCHIVOS_PROGRAMACION de los meses de los registros.
+
+    Returns:
+        pandas.DataFrame: Un hallazgo por fila con las columnas de COLUMNAS_HALLAZGOS.
+    """
+    import numpy as np
+    import pandas as pd
+
+    registros = list(registros)
+    if turnos is None:
+        turnos = turnos_programados({str(r.get("fecha"))[:7] for r in registros})
+    df = pd.DataFrame.from_records(
+        registros, columns=["empleado", "fecha", "tipo", "horas", "area", "hora_inicio", "registrado_en"]
+    )
+    if df.empty:
+        return pd.DataFrame(columns=COLUMNAS_HALLAZGOS)
+
+    # Orden de registro: registrado_en y, dentro del mismo segundo, la secuencia de
+    # extras._secuencia (entera y nula en los registros anteriores a ella, que quedan en el
+    # orden de los archivos gracias al orden estable)
+    df["secuencia"] = pd.array([r.get("secuencia") for r in registros], dtype="Int64")
+    df = df.sort_values(["registrado_en", "secuencia"], kind="stable", na_position="first")
+    posiciones = df.index.to_numpy()
+    df = df.reset_index(drop=True)
+    df["fecha"] = df["fecha"].astype(str).str[:10]
+    nombres = df["empleado"].fillna("")
+    df["clave"] = nombres.map({n: normalizar_nombre(n) for n in nombres.unique()})
+    df["minutos"] = (df["horas"].astype(np.float64) * 60).round().astype(np.int64)
+    df["turno"] = [turnos.get(clave) for clave in zip(df["clave"], df["fecha"])]
+    intervalos = df["turno"].map({t: intervalo_turno(t) for t in df["turno"].dropna().unique()})
+    con_intervalo = intervalos.notna()
+    turno_inicio = np.full(len(df), np.nan)
+    turno_fin = np.full(len(df), np.nan)
+    if con_intervalo.any():
+        turno_inicio[con_intervalo.to_numpy()], turno_fin[con_intervalo.to_numpy()] = zip(*intervalos[con_intervalo])
+    df["inicio"] = df["hora_inicio"].map(minutos_hora, na_action="ignore").astype(np.float64)
+    inicio = df["inicio"].to_numpy()
+    fin = inicio + df["minutos"].to_numpy()
+
+    dia = ["clave", "fecha", "tipo"]
+    duplicado = df.duplicated(dia + ["minutos", "inicio"]).to_numpy()
+    misma_fecha = (df.groupby(dia, sort=False).cumcount() > 0).to_numpy() & ~duplicado
+    no_laboral = df["turno"].isin(TURNOS_NO_LABORALES).to_numpy()
+    solapa_turno = (inicio < turno_fin) & (fin > turno_inicio)
+
+    # Cruces entre horas extra con hora de inicio: cada una contra las anteriores del mismo día
+    explicitos = df.loc[~np.isnan(inicio), ["clave", "fecha"]].assign(
+        orden=np.flatnonzero(~np.isnan(inicio)), inicio=inicio[~np.isnan(inicio)], fin=fin[~np.isnan(inicio)]
+    )
+    pares = explicitos.merge(explicitos, on=["clave", "fecha"])
+    pares = pares[(pares["orden_y"] < pares["orden_x"]) & (pares["inicio_y"] < pares["fin_x"]) & (pares["fin_y"] > pares["inicio_x"])]
+    solapa_horas_extra = np.zeros(len(df), dtype=bool)
+    solapa_horas_extra[pares["orden_x"].unique()] = True
+
+    # Minutos acumulados del tipo en el día contra lo que queda libre de su franja
+    con_turno = ~np.isnan(turno_inicio)
+    ocupado_diurno = np.where(
+        con_turno, np.clip(np.minimum(turno_fin, INICIO_NOCTURNO) - np.maximum(turno_inicio, INICIO_DIURNO), 0, None), 0
+    )
+    ocupado_total = np.where(con_turno, np.clip(np.minimum(turno_fin, MINUTOS_DIA) - turno_inicio, 0, None), 0)
+    diurna = INICIO_NOCTURNO - INICIO_DIURNO
+    capacidad = np.where(
+        df["tipo"].to_numpy() == "diurnas",
+        diurna - ocupado_diurno,
+        MINUTOS_DIA - diurna - (ocupado_total - ocupado_diurno),
+    )
+    excede_franja = df.groupby(dia, sort=False)["minutos"].cumsum().to_numpy() > capacidad
+
+    marcas = {
+        "duplicado": duplicado,
+        "misma_fecha": misma_fecha,
+        "dia_no_laboral": no_laboral,
+        "solapa_turno": solapa_turno,
+        "solapa_horas_extra": solapa_horas_extra,
+        "excede_franja": excede_franja,
+    }
+    # Los hallazgos se arman con los registros originales, en orden de registro
+    nombres = list(marcas)
+    turno = df["turno"].tolist()
+    encontrados = sorted((i, n) for n, marca in enumerate(marcas.values()) for i in np.flatnonzero(marca))
+    hallazgos = [_hallazgo(registros[posiciones[i]], nombres[n], turno[i]) for i, n in encontrados]
+    return pd.DataFrame(hallazgos, columns=COLUMNAS_HALLAZGOS)
+
+
+# Auditoría de las horas extra de un mes ("AAAA-MM" o una fecha del mes). Los archivos
+# se leen con leer_registros_desde, que decodifica todas las líneas de una vez.
+@instrumentado("validacion.auditar_mes")
+def auditar_mes(mes, area=None):
+    mes = str(mes)[:7]
+    return auditar(
+        r for archivo in FUENTES for r in almacen.leer_registros_desde(archivo)[0]
+        if str(r.get("fecha", ""))[:7] == mes and (area is None or r.get("area") == area)
+    )